@@ -0,0 +1,80 @@
+"""Database settings built from the environment
+
+``DATABASE_URL`` picks the database; the variables below tune how Django
+connects to PostgreSQL:
+
+``DB_CONN_MAX_AGE``
+    Seconds a connection is kept open for later requests (default 60,
+    0 closes it after every request).
+``DB_CONN_HEALTH_CHECKS``
+    Check a persistent connection before reusing it (default 1).
+``DB_POOL``
+    Use a psycopg 3 connection pool per process instead of persistent
+    connections (default 0). Sized by ``DB_POOL_MIN_SIZE``,
+    ``DB_POOL_MAX_SIZE`` and ``DB_POOL_TIMEOUT`` (seconds to wait for a
+    free connection). ``DB_POOL_MAX_SIZE`` defaults to the number of
+    threads that can hold a connection at once: ``GUNICORN_THREADS``, or
+    with ``ASYNC_VIEWS=1`` the event loop's executor plus the thread
+    ``sync_to_async`` runs request code on.
+``DB_PREPARE_THRESHOLD``
+    Executions after which psycopg 3 prepares a query on the server
+    (default 5, empty to disable).
+``DB_PGBOUNCER``
+    Connect through PgBouncer in transaction mode (default 0): no pool,
+    no server-side prepared statements and no server-side cursors, none
+    of which survive a connection that changes between transactions.
+"""
+
+import os
+
+import dj_database_url
+
+
+def env_flag(environ, name, default):
+    return environ.get(name, default) in ("1", "true", "True", "yes")
+
+
+def pool_max_size(environ):
+    """Most connections the threads of one worker can hold at once"""
+    if env_flag(environ, "ASYNC_VIEWS", "0"):
+        # run_concurrently gives each query a thread of the loop's default
+        # executor, which asyncio sizes like this; the rest of the request
+        # runs on the one thread sync_to_async keeps for it
+        return min(32, (os.cpu_count() or 1) + 4) + 1
+    return int(environ.get("GUNICORN_THREADS", "4"))
+
+
+def database_settings(url, environ=os.environ):
+    """Return the ``DATABASES["default"]`` dictionary for ``url``"""
+    pgbouncer = env_flag(environ, "DB_PGBOUNCER", "0")
+    pool = env_flag(environ, "DB_POOL", "0") and not pgbouncer
+    config = dj_database_url.parse(
+        url,
+        # Pooled connections go back to the pool, Django must not keep them
+        conn_max_age=0 if pool else int(environ.get("DB_CONN_MAX_AGE", "60")),
+        conn_health_checks=env_flag(environ, "DB_CONN_HEALTH_CHECKS", "1"),
+    )
+    if config["ENGINE"] != "django.db.backends.postgresql":
+        return config
+
+    options = config.setdefault("OPTIONS", {})
+    if pgbouncer:
+        config["DISABLE_SERVER_SIDE_CURSORS"] = True
+        options["prepare_threshold"] = None
+        return config
+
+    threshold = environ.get("DB_PREPARE_THRESHOLD", "5")
+    options["prepare_threshold"] = int(threshold) if threshold else None
+    if pool:
+        options["pool"] = {
+            "min_size": int(environ.get("DB_POOL_MIN_SIZE", "2")),
+            "max_size": int(environ.get("DB_POOL_MAX_SIZE", pool_max_size(environ))),
+            "timeout": float(environ.get("DB_POOL_TIMEOUT", "10")),
+        }
+        if env_flag(environ, "DB_CONN_HEALTH_CHECKS", "1"):
+            from psycopg_pool import ConnectionPool
+
+            # Ping a connection before handing it out, as CONN_HEALTH_CHECKS
+            # does for persistent connections
+            options["pool"]["check"] = ConnectionPool.check_connection
+    return config
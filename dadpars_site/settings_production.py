@@ -7,7 +7,7 @@ Based on development settings with production-specific configurations.
 import os
 from pathlib import Path
 
-import dj_database_url
+from .database import database_settings
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -36,11 +36,15 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
+    "main.middleware.CompressionMiddleware",
+    "main.middleware.QueryBudgetMiddleware",
+    "main.middleware.ServerTimingMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
+    "main.middleware.AnonymousPageCacheMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
 
@@ -50,12 +54,23 @@ TEMPLATES = [
     {
         "BACKEND": "django.template.backends.django.DjangoTemplates",
         "DIRS": [],
-        "APP_DIRS": True,
         "OPTIONS": {
             "context_processors": [
                 "django.template.context_processors.request",
                 "django.contrib.auth.context_processors.auth",
                 "django.contrib.messages.context_processors.messages",
+                "main.context_processors.canonical_url",
+            ],
+            # Templates are parsed once per process; main.warmup compiles
+            # them all at boot so no request pays for it
+            "loaders": [
+                (
+                    "django.template.loaders.cached.Loader",
+                    [
+                        "django.template.loaders.filesystem.Loader",
+                        "django.template.loaders.app_directories.Loader",
+                    ],
+                ),
             ],
         },
     },
@@ -65,14 +80,63 @@ WSGI_APPLICATION = "dadpars_site.wsgi.application"
 
 # Database
 # https://docs.djangoproject.com/en/6.0/ref/settings/#databases
+# Persistent connections, pooling and prepared statements are configured
+# through DB_* environment variables, see dadpars_site/database.py
 DATABASES = {
-    "default": dj_database_url.config(
-        default=os.environ.get(
-            "DATABASE_URL", "sqlite:///" + str(BASE_DIR / "db.sqlite3")
-        )
+    "default": database_settings(
+        os.environ.get("DATABASE_URL", "sqlite:///" + str(BASE_DIR / "db.sqlite3"))
     )
 }
 
+# Cache
+# Shared by all gunicorn workers on the host, so content version counters
+# and cached responses stay consistent between processes.
+CACHES = {
+    "default": {
+        "BACKEND": os.environ.get(
+            "CACHE_BACKEND", "django.core.cache.backends.filebased.FileBasedCache"
+        ),
+        "LOCATION": os.environ.get("CACHE_LOCATION", "/tmp/dadpars_cache"),
+    }
+}
+
+# Seconds between checks of the shared question version by the in-process
+# autocomplete index
+AUTOCOMPLETE_REFRESH_INTERVAL = int(
+    os.environ.get("AUTOCOMPLETE_REFRESH_INTERVAL", "5")
+)
+
+# Share of requests checked against the per-view query budgets; violations
+# are logged as warnings by main.middleware
+QUERY_BUDGET_SAMPLE_RATE = float(os.environ.get("QUERY_BUDGET_SAMPLE_RATE", "0.01"))
+
+# Serve the read-only pages with their async views (main.async_views);
+# only worth it under an ASGI server such as uvicorn
+ASYNC_VIEWS = os.environ.get("ASYNC_VIEWS", "0") == "1"
+
+# Send a Server-Timing header with the render time of every cached
+# template fragment, for profiling from the browser
+SERVER_TIMING_HEADER = os.environ.get("SERVER_TIMING_HEADER", "0") == "1"
+
+# Minify HTML and gzip/brotli-compress dynamic responses in
+# main.middleware.CompressionMiddleware; turn off when a proxy in front
+# already compresses them
+HTML_MINIFY = os.environ.get("HTML_MINIFY", "1") == "1"
+RESPONSE_COMPRESSION = os.environ.get("RESPONSE_COMPRESSION", "1") == "1"
+
+# Sitemaps written by `manage.py generate_sitemaps` and served instead of
+# querying the database; unset to build every sitemap on request
+SITEMAP_ROOT = os.environ.get("SITEMAP_ROOT") or None
+SITEMAP_BASE_URL = os.environ.get("SITEMAP_BASE_URL") or None
+
+# Token buckets of main.ratelimit: "local" to each worker, or "cache" to
+# share them through the default cache. The client IP is read from nginx's
+# X-Real-IP header when the connection comes from a trusted proxy network
+RATE_LIMIT_STORE = os.environ.get("RATE_LIMIT_STORE", "local")
+RATE_LIMIT_IP_HEADER = os.environ.get("RATE_LIMIT_IP_HEADER", "HTTP_X_REAL_IP")
+if os.environ.get("RATE_LIMIT_TRUSTED_PROXIES"):
+    RATE_LIMIT_TRUSTED_PROXIES = os.environ["RATE_LIMIT_TRUSTED_PROXIES"].split(",")
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -123,5 +187,12 @@ CSRF_COOKIE_SECURE = not DEBUG
 SECURE_SSL_REDIRECT = not DEBUG
 
 # Whitenoise configuration
-STATICFILES_STORAGE = "whitenoise.storage.CompressedManifestStaticFilesStorage"
-STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
+# STATICFILES_STORAGE is ignored since Django 5.1. Content-hashed names let
+# WhiteNoise serve the CSS/JS bundles with "Cache-Control: immutable" and a
+# one year max-age, plus precompressed .gz variants.
+STORAGES = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {
+        "BACKEND": "whitenoise.storage.CompressedManifestStaticFilesStorage",
+    },
+}
@@ -8,9 +8,18 @@ https://docs.djangoproject.com/en/6.0/howto/deployment/wsgi/
 """
 
 import os
+import time
 
-from django.core.wsgi import get_wsgi_application
+started = time.perf_counter()
+
+from django.core.wsgi import get_wsgi_application  # noqa: E402
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'dadpars_site.settings')
 
+imported = time.perf_counter()
 application = get_wsgi_application()
+
+from main.warmup import record_startup  # noqa: E402
+
+record_startup("import", imported - started)
+record_startup("setup", time.perf_counter() - imported)
@@ -0,0 +1,117 @@
+"""Gunicorn settings for production
+
+    gunicorn -c gunicorn.conf.py dadpars_site.wsgi:application
+
+Every value can be overridden through the environment (``WEB_CONCURRENCY``,
+``GUNICORN_THREADS``, ...) or on the command line.
+
+Measuring throughput per core: start the server with the settings to be
+compared, then from another machine (or pinned to other cores) run
+
+    python manage.py bench_concurrency http://HOST:8000/questions/ \\
+        --clients 200 --duration 30 --server-cores N
+
+and read ``requests_per_s_per_core``. Repeat with ``--slow-send 2`` to see
+how the worker model copes with clients on slow mobile links; sync workers
+are held for the whole upload, gthread and uvicorn workers are not.
+"""
+
+import gc
+import multiprocessing
+import os
+
+cores = multiprocessing.cpu_count()
+
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:8000")
+backlog = int(os.environ.get("GUNICORN_BACKLOG", "2048"))
+
+# Threaded workers: while one thread waits on PostgreSQL or on a slow
+# client, the others keep serving. Under uvicorn (ASYNC_VIEWS=1) the event
+# loop does the same, and one worker per core is enough.
+#
+# Measured on one core against SQLite (see "Gunicorn" in the README), the
+# rendering is CPU-bound: 1, 4 and 8 threads served 765, 735 and 609 req/s
+# of cached pages and about 100 req/s of /questions/ each. 4 threads cost
+# little there and cover the waits on PostgreSQL and slow clients, which
+# that run did not have.
+worker_class = os.environ.get("GUNICORN_WORKER_CLASS", "gthread")
+if worker_class.startswith("uvicorn"):
+    default_workers = cores
+else:
+    default_workers = 2 * cores + 1
+workers = int(os.environ.get("WEB_CONCURRENCY", default_workers))
+threads = int(os.environ.get("GUNICORN_THREADS", "4"))
+
+# Import Django, compile the templates and warm the in-process caches
+# once in the master (main.warmup); the forked workers share those pages
+# copy-on-write. Measured: 439 MB instead of 1082 MB for three workers at
+# the same throughput, and a recycled worker serves at once instead of
+# spending ~14 s in warmup while its queued clients wait.
+preload_app = os.environ.get("GUNICORN_PRELOAD", "1") == "1"
+
+# Recycle workers now and then so slow leaks never add up, with jitter so
+# they do not all restart at once
+max_requests = int(os.environ.get("GUNICORN_MAX_REQUESTS", "2000"))
+max_requests_jitter = int(os.environ.get("GUNICORN_MAX_REQUESTS_JITTER", "200"))
+
+# Mobile clients on slow links take a while to send a request; keep idle
+# connections open briefly so they can reuse them, but never let a stuck
+# request pin a worker for long
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", "30"))
+graceful_timeout = int(os.environ.get("GUNICORN_GRACEFUL_TIMEOUT", "30"))
+keepalive = int(os.environ.get("GUNICORN_KEEPALIVE", "5"))
+limit_request_line = 8190
+limit_request_fields = 100
+
+# The worker heartbeat file lives in memory, not on the container's overlay
+# filesystem, which can stall for seconds under I/O pressure
+worker_tmp_dir = "/dev/shm" if os.path.isdir("/dev/shm") else None
+
+accesslog = os.environ.get("GUNICORN_ACCESSLOG") or None
+errorlog = "-"
+loglevel = os.environ.get("GUNICORN_LOGLEVEL", "info")
+forwarded_allow_ips = os.environ.get("FORWARDED_ALLOW_IPS", "127.0.0.1")
+
+
+def when_ready(server):
+    if preload_app:
+        from main.warmup import format_report, warmup
+
+        server.log.info("Startup: %s", format_report(warmup()))
+
+
+def pre_fork(server, worker):
+    from django.db import connections
+
+    # Children must not inherit (and later share) the master's sockets,
+    # nor a connection pool whose sockets and threads stay behind
+    connections.close_all()
+    for conn in connections.all(initialized_only=True):
+        if hasattr(conn, "close_pool"):
+            conn.close_pool()
+    # Keep the garbage collector from touching, and so copying, the
+    # objects created before the fork
+    gc.freeze()
+
+
+def post_worker_init(worker):
+    from main import metrics
+    from main.warmup import format_report, warmup
+
+    if not preload_app:
+        worker.log.info("Startup: %s", format_report(warmup()))
+    metrics.incr("gunicorn.worker_started")
+
+
+def worker_abort(worker):
+    from main import metrics
+
+    # Timed out by the master; record it before the process is killed
+    metrics.incr("gunicorn.worker_timeout")
+    metrics.flush()
+
+
+def worker_exit(server, worker):
+    from main import metrics
+
+    metrics.flush()
@@ -78,6 +78,7 @@ class ConsultationRequestAdmin(admin.ModelAdmin):
 class ConsultationResponseAdmin(admin.ModelAdmin):
     list_display = ["consultation_request", "responder", "response_date", "is_final"]
     list_filter = ["is_final", "response_date"]
+    list_select_related = ["consultation_request", "responder"]
     search_fields = [
         "consultation_request__name",
         "consultation_request__subject",
@@ -125,14 +126,17 @@ class RecentQuestionAdmin(admin.ModelAdmin):
         "question_short",
         "category",
         "is_answered",
+        "answers_count",
+        "last_answered_at",
         "is_active",
         "order",
         "created_at",
     ]
     list_filter = ["category", "is_answered", "is_active", "created_at"]
     search_fields = ["question", "description", "questioner_name"]
-    list_editable = ["order", "is_answered", "is_active"]
+    list_editable = ["order", "is_active"]
     ordering = ["order", "-created_at"]
+    readonly_fields = ["is_answered", "answers_count", "last_answered_at"]
 
     def question_short(self, obj):
         return obj.question[:50] + "..." if len(obj.question) > 50 else obj.question
@@ -151,6 +155,7 @@ class LawyerAnswerAdmin(admin.ModelAdmin):
         "created_at",
     ]
     list_filter = ["is_active", "created_at", "lawyer"]
+    list_select_related = ["question", "lawyer"]
     search_fields = ["question__question", "answer", "short_answer", "lawyer__username"]
     list_editable = ["order", "is_active"]
     ordering = ["order", "-created_at"]
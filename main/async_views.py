@@ -0,0 +1,207 @@
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections
+from django.http import Http404, JsonResponse
+from django.shortcuts import render
+from django.views.generic import View
+
+from . import conditional
+from .content import get_content_snapshot
+from .models import LawyerAnswer, RecentQuestion
+from .pagination import KeysetPaginationMixin
+from .search import tokenize
+from .stats import get_question_stats
+from .versions import QUESTIONS, get_version
+from .views import QuestionsListView, SearchQuestionsView
+
+
+def _released(function):
+    # Worker threads keep their own connection; let CONN_MAX_AGE decide
+    # when it is closed, as the request_finished signal does for requests
+    def run():
+        try:
+            return function()
+        finally:
+            close_old_connections()
+
+    return run
+
+
+async def run_concurrently(*functions):
+    """Run blocking ORM/cache callables in parallel threads, return results
+
+    ``sync_to_async`` normally funnels all ORM work of a request through
+    one thread; independent queries are only truly concurrent when each
+    runs on its own thread and database connection.
+    """
+    return await asyncio.gather(
+        *(
+            sync_to_async(_released(function), thread_sensitive=False)()
+            for function in functions
+        )
+    )
+
+
+async def arender(request, template_name, context):
+    # Templates may still touch lazy objects such as request.user
+    return await sync_to_async(render)(request, template_name, context)
+
+
+async def home(request):
+    """Async home page, loading content and both question lists at once"""
+    content, recent_questions, lawyer_answers = await run_concurrently(
+        get_content_snapshot,
+        lambda: list(
+            RecentQuestion.objects.filter(is_active=True).order_by(
+                "order", "-created_at"
+            )[:5]
+        ),
+        lambda: list(
+            LawyerAnswer.objects.filter(is_active=True)
+            .select_related("question", "lawyer")
+            .order_by("order", "-created_at")[:5]
+        ),
+    )
+    context = {
+        "faqs": content.faqs[:6],
+        "services": content.services,
+        "consultation_types": content.consultation_types,
+        "recent_questions": recent_questions,
+        "lawyer_answers": lawyer_answers,
+    }
+    return await arender(request, "main/home.html", context)
+
+
+class LandingView(View):
+    """Async consultation landing page built from the content snapshot"""
+
+    template_name = None
+    # Consultation type keys shown on the page, None for all of them
+    consultation_type_keys = None
+    faq_count = 8
+
+    async def get(self, request):
+        content = await sync_to_async(get_content_snapshot)()
+        if self.consultation_type_keys is None:
+            consultation_types = content.consultation_types
+        else:
+            consultation_types = content.consultation_types_for(
+                *self.consultation_type_keys
+            )
+        context = {
+            "consultation_types": consultation_types,
+            "faqs": content.faqs[: self.faq_count],
+        }
+        return await arender(request, self.template_name, context)
+
+
+class TwentyFourHoursConsultationView(LandingView):
+    template_name = "main/24_hours_legal_consultation.html"
+    consultation_type_keys = ("phone", "online")
+
+
+class PhoneConsultationView(LandingView):
+    template_name = "main/phone_legal_consultation.html"
+    consultation_type_keys = ("phone",)
+
+
+class InPersonConsultationView(LandingView):
+    template_name = "main/in_person_legal_consultation.html"
+    consultation_type_keys = ("in_person",)
+
+
+class QuickLegalAdviceView(LandingView):
+    template_name = "main/quick_legal_advice.html"
+    consultation_type_keys = ("phone", "online")
+
+
+class ContactView(LandingView):
+    template_name = "main/contact.html"
+    faq_count = 6
+
+
+class RetiredJudgeConsultationView(LandingView):
+    template_name = "main/retired_judge_consultation.html"
+    consultation_type_keys = ("phone", "online", "in_person")
+
+
+class QuestionDetailView(View):
+    """Async question page, fetching the question and its answers at once"""
+
+    async def get(self, request, pk):
+        # The answers are fetched even when the client's copy turns out to
+        # be current; a 304 still skips the rendering
+        question, answers = await run_concurrently(
+            lambda: conditional.dated_questions().filter(pk=pk).first(),
+            lambda: list(
+                LawyerAnswer.objects.filter(question_id=pk, is_active=True)
+                .select_related("lawyer")
+                .order_by("order", "-created_at")
+            ),
+        )
+        if question is None:
+            raise Http404("No question found matching the query")
+        validators = await sync_to_async(conditional.validators_for)(
+            request, conditional.question_validators, question
+        )
+        response = conditional.not_modified(request, validators)
+        if response is not None:
+            return conditional.add_validators(response, validators)
+        context = {"question": question, "object": question, "answers": answers}
+        response = await arender(request, "main/question_detail.html", context)
+        return conditional.add_validators(response, validators)
+
+
+class SearchQuestionsView(SearchQuestionsView):
+    """Async search endpoint; cache hits never leave the event loop thread"""
+
+    async def get(self, request):
+        query = request.GET.get("q", "").strip()
+        if not query:
+            return JsonResponse({"questions": []})
+
+        key = " ".join(tokenize(query))
+        version = await sync_to_async(get_version)(QUESTIONS)
+        body = self.cache.get(key, version)
+        if body is not None:
+            return self.json_response(body, "HIT")
+
+        body, index, indexed_version = await sync_to_async(
+            self.search, thread_sensitive=False
+        )(query)
+        self.store(key, version, body, index, indexed_version)
+        return self.json_response(body, "MISS", index)
+
+
+class QuestionsListView(QuestionsListView):
+    """Async question list, loading statistics and the page at once"""
+
+    async def get(self, request, *args, **kwargs):
+        validators = await sync_to_async(conditional.validators_for)(
+            request, conditional.list_validators
+        )
+        response = conditional.not_modified(request, validators)
+        if response is not None:
+            return conditional.add_validators(response, validators)
+        self.object_list = self.get_queryset()
+        self.stats, self.pagination = await run_concurrently(
+            get_question_stats,
+            lambda: KeysetPaginationMixin.paginate_queryset(
+                self, self.object_list, self.paginate_by
+            ),
+        )
+        # Rendered by the handler, which moves TemplateResponse to a thread
+        response = self.render_to_response(self.get_context_data())
+        return conditional.add_validators(response, validators)
+
+    def get_pagination_count(self):
+        # Filled in from the statistics once both lookups are done
+        return None
+
+    def paginate_queryset(self, queryset, page_size):
+        paginator = self.pagination[0]
+        paginator.count = self.stats.count(
+            category=self.category, answered=self.answered
+        )
+        return self.pagination
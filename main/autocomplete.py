@@ -0,0 +1,433 @@
+import heapq
+import itertools
+import logging
+import os
+import sys
+import threading
+import time
+from bisect import bisect_left, insort
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connections
+from django.utils import timezone
+
+from .models import RecentQuestion
+from .search import serialize_question, tokenize
+from .versions import QUESTIONS, get_version
+
+logger = logging.getLogger(__name__)
+
+# Prefixes up to this length match too many tokens to merge postings per
+# keystroke, so their most recent documents are kept precomputed.
+SHORT_PREFIX_LENGTH = 3
+
+# Questions updated this long before the last sync are fetched again, for
+# clock differences between the app servers and the database
+SYNC_MARGIN = timedelta(seconds=60)
+
+# Newest questions checked against a multi-term query before falling back
+# to merging postings
+WALK_BUDGET = 300
+
+# Prefixes of more tokens than this filter the candidates of the other terms
+# instead of having their postings merged
+MERGE_TOKENS = 64
+
+# Or that match more than this many times as many questions as the rarest term
+MERGE_RATIO = 4
+
+# Documents measured for the memory estimate
+SIZE_SAMPLE = 1000
+
+
+class AutocompleteIndex:
+    """In-process prefix index over normalized question titles
+
+    Every title token goes into a sorted token list (for prefix ranges via
+    bisect) and an inverted index of token -> question ids. Short prefixes
+    additionally keep their ``limit`` most recent question ids. Results are
+    ordered newest first and carry the pre-serialized JSON row, so a lookup
+    never touches the database.
+    """
+
+    def __init__(self, limit=10):
+        self.limit = limit
+        self.version = None
+        self.synced_at = None
+        self.built_at = None
+        self._lock = threading.RLock()
+        self._documents = {}  # id -> (sort_key, tokens, result row)
+        self._postings = {}  # token -> set of ids
+        self._tokens = []  # sorted distinct tokens
+        self._order = []  # sort keys, oldest first
+        self._top = {}  # short prefix -> newest ids, newest first
+        self._size = None
+
+    def build(self, questions, version=None, synced_at=None):
+        """Fill a new index that no other thread uses yet"""
+        with self._lock:
+            for question in questions:
+                self._add(question, bulk=True)
+            self._tokens.sort()
+            self._order.sort()
+            for sort_key in reversed(self._order):
+                for token in self._documents[sort_key[1]][1]:
+                    for length in range(1, min(len(token), SHORT_PREFIX_LENGTH) + 1):
+                        top = self._top.setdefault(token[:length], [])
+                        if len(top) < self.limit and top[-1:] != [sort_key[1]]:
+                            top.append(sort_key[1])
+            self.version = version
+            self.synced_at = synced_at
+            self.built_at = time.time()
+            self._size = self._measure()
+
+    def apply(self, questions, version, synced_at):
+        """Apply the current state of changed questions, active or not"""
+        with self._lock:
+            for question in questions:
+                self._discard(question.pk)
+                if question.is_active:
+                    self._add(question)
+            self.version = version
+            self.synced_at = synced_at
+
+    def add(self, question):
+        with self._lock:
+            self._discard(question.pk)
+            if question.is_active:
+                self._add(question)
+
+    def discard(self, question_id):
+        with self._lock:
+            self._discard(question_id)
+
+    def __len__(self):
+        return len(self._documents)
+
+    def _add(self, question, bulk=False):
+        # Interned, so every question and the postings share one copy
+        tokens = frozenset(map(sys.intern, tokenize(question.question_normalized)))
+        sort_key = (question.created_at.timestamp(), question.pk)
+        self._documents[question.pk] = (sort_key, tokens, serialize_question(question))
+        if bulk:
+            # build() sorts and fills the short prefixes once at the end
+            self._order.append(sort_key)
+        else:
+            insort(self._order, sort_key)
+        for token in tokens:
+            postings = self._postings.get(token)
+            if postings is None:
+                postings = self._postings[token] = set()
+                if bulk:
+                    self._tokens.append(token)
+                else:
+                    insort(self._tokens, token)
+            postings.add(question.pk)
+            if not bulk:
+                for length in range(1, min(len(token), SHORT_PREFIX_LENGTH) + 1):
+                    self._push_top(token[:length], question.pk, sort_key)
+
+    def _push_top(self, prefix, question_id, sort_key):
+        top = self._top.setdefault(prefix, [])
+        if question_id in top:
+            return
+        if len(top) >= self.limit and sort_key <= self._documents[top[-1]][0]:
+            return
+        top.append(question_id)
+        top.sort(key=lambda pk: self._documents[pk][0], reverse=True)
+        del top[self.limit :]
+
+    def _discard(self, question_id):
+        document = self._documents.pop(question_id, None)
+        if document is None:
+            return
+        sort_key = document[0]
+        del self._order[bisect_left(self._order, sort_key)]
+        stale_prefixes = set()
+        for token in document[1]:
+            postings = self._postings[token]
+            postings.discard(question_id)
+            if not postings:
+                del self._postings[token]
+                del self._tokens[bisect_left(self._tokens, token)]
+            for length in range(1, min(len(token), SHORT_PREFIX_LENGTH) + 1):
+                stale_prefixes.add(token[:length])
+        for prefix in stale_prefixes:
+            if question_id in self._top.get(prefix, ()):
+                self._refill_top(prefix)
+
+    def _refill_top(self, prefix):
+        ids = self._matching_ids(prefix)
+        if not ids:
+            self._top.pop(prefix, None)
+            return
+        self._top[prefix] = self._newest(ids)
+
+    def _tokens_with_prefix(self, prefix):
+        tokens = self._tokens
+        position = bisect_left(tokens, prefix)
+        while position < len(tokens) and tokens[position].startswith(prefix):
+            yield tokens[position]
+            position += 1
+
+    def _matching_ids(self, prefix):
+        """Ids of questions with a token starting with ``prefix``; read only"""
+        postings = [self._postings[token] for token in self._tokens_with_prefix(prefix)]
+        if len(postings) == 1:
+            return postings[0]
+        return set().union(*postings)
+
+    def _newest(self, ids, accept=None):
+        """The newest of ``ids`` that ``accept`` (if given) accepts"""
+        if len(ids) * len(ids) > self.limit * len(self._order):
+            # Common matches: walking from the newest question finds enough
+            # of them long before the end
+            if accept is None:
+                return self._walk(ids.__contains__)
+            return self._walk(lambda pk: pk in ids and accept(pk))
+        documents = self._documents
+        if accept is None:
+            return heapq.nlargest(self.limit, ids, key=lambda pk: documents[pk][0])
+        # Checked lazily, newest first, until enough are accepted
+        heap = [(-documents[pk][0][0], -pk) for pk in ids]
+        heapq.heapify(heap)
+        newest = []
+        while heap and len(newest) < self.limit:
+            pk = -heapq.heappop(heap)[1]
+            if accept(pk):
+                newest.append(pk)
+        return newest
+
+    def _walk(self, accept, budget=None):
+        """The newest accepted ids, or None if ``budget`` questions were not enough"""
+        newest = []
+        for _, pk in itertools.islice(reversed(self._order), budget):
+            if accept(pk):
+                newest.append(pk)
+                if len(newest) == self.limit:
+                    return newest
+        if budget is not None and budget < len(self._order):
+            return None
+        return newest
+
+    def search(self, query):
+        """Return the result rows of the newest questions matching every term"""
+        terms = tokenize(query)
+        if not terms:
+            return []
+        with self._lock:
+            if len(terms) == 1 and len(terms[0]) <= SHORT_PREFIX_LENGTH:
+                ids = self._top.get(terms[0], [])
+            elif len(terms) == 1:
+                ids = self._newest(self._matching_ids(terms[0]))
+            else:
+                ids = self._search_terms(set(terms))
+            return [self._documents[pk][2] for pk in ids]
+
+    def _search_terms(self, terms):
+        documents = self._documents
+
+        def matches(pk, terms=terms):
+            tokens = documents[pk][1]
+            return all(
+                any(token.startswith(term) for token in tokens) for term in terms
+            )
+
+        # Terms most questions share are answered by the newest questions
+        # alone, without merging their postings
+        ids = self._walk(matches, budget=WALK_BUDGET)
+        if ids is not None:
+            return ids
+        # Otherwise intersect the postings of the terms, smallest first. Terms
+        # matching many tokens or many more questions than the rarest term
+        # are cheaper to check on the candidates than to merge.
+        sizes = {
+            term: sum(
+                len(self._postings[token]) for token in self._tokens_with_prefix(term)
+            )
+            for term in terms
+            if self._count_tokens(term) <= MERGE_TOKENS
+        }
+        if not sizes:
+            return self._walk(matches)
+        smallest = min(sizes.values())
+        merged = sorted(
+            (term for term, size in sizes.items() if size <= smallest * MERGE_RATIO),
+            key=sizes.get,
+        )
+        candidates = None
+        for term in merged:
+            ids = self._matching_ids(term)
+            candidates = ids if candidates is None else candidates & ids
+            if not candidates:
+                return []
+        broad = terms.difference(merged)
+        if broad:
+            return self._newest(candidates, lambda pk: matches(pk, broad))
+        return self._newest(candidates)
+
+    def _count_tokens(self, prefix):
+        tokens = self._tokens
+        return bisect_left(tokens, prefix + "\U0010ffff") - bisect_left(tokens, prefix)
+
+    def memory_usage(self):
+        """Approximate size of the index in bytes, as of the last build
+
+        Measuring walks every posting list, so syncs and local saves leave
+        the figure as it was until the next rebuild.
+        """
+        with self._lock:
+            if self._size is None:
+                self._size = self._measure()
+            return self._size
+
+    def _measure(self):
+        # Sampling the documents keeps this to milliseconds, where walking
+        # every object would take seconds on a large index
+        getsizeof = sys.getsizeof
+        size = sum(
+            map(
+                getsizeof,
+                (self._documents, self._postings, self._tokens, self._order, self._top),
+            )
+        )
+        size += sum(map(getsizeof, self._postings))
+        size += sum(map(getsizeof, self._postings.values()))
+        size += sum(map(getsizeof, self._top.values()))
+        sample = list(itertools.islice(self._documents.items(), SIZE_SAMPLE))
+        if sample:
+            per_document = sum(
+                getsizeof(pk)
+                + getsizeof(document)
+                + getsizeof(document[0])
+                + getsizeof(document[0][0])
+                + getsizeof(document[1])
+                + getsizeof(document[2])
+                + sum(map(getsizeof, document[2].values()))
+                for pk, document in sample
+            ) / len(sample)
+            size += int(per_document * len(self._documents))
+        return size
+
+
+_index = None
+_last_checked = 0.0
+_refresh_lock = threading.Lock()
+
+
+def _reset_after_fork():
+    # A refresh thread running in the parent does not exist in the child
+    global _refresh_lock
+    _refresh_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def get_autocomplete_index():
+    """Return this process's index, or None before it was first built
+
+    The shared ``questions`` version is checked at most once every
+    ``AUTOCOMPLETE_REFRESH_INTERVAL`` seconds, by a background thread that
+    applies the changes made through other workers. Requests keep using the
+    current index meanwhile and never wait for a build. An interval of None
+    turns the refreshes off.
+    """
+    global _last_checked
+    now = time.monotonic()
+    interval = getattr(settings, "AUTOCOMPLETE_REFRESH_INTERVAL", 5)
+    if interval is None:
+        return _index
+    if now - _last_checked >= interval and _refresh_lock.acquire(blocking=False):
+        _last_checked = now
+        threading.Thread(
+            target=_refresh_in_background, name="autocomplete-refresh", daemon=True
+        ).start()
+    return _index
+
+
+def _refresh_in_background():
+    try:
+        refresh_autocomplete_index()
+    except Exception:
+        logger.exception("Refreshing the autocomplete index failed")
+    finally:
+        # This thread's own database connection
+        connections.close_all()
+        _refresh_lock.release()
+
+
+def refresh_autocomplete_index():
+    """Bring this process's index up to date with the shared version
+
+    Questions whose ``updated_at`` moved since the last sync are applied
+    in place. Deletes and queryset updates leave no trace there, so when the
+    number of active questions disagrees, a new index is built instead.
+    """
+    version = get_version(QUESTIONS)
+    index = _index
+    if index is None:
+        return build_autocomplete_index(version)
+    if index.version == version:
+        return index
+    synced_at = timezone.now()
+    changed = list(
+        indexed_questions(
+            RecentQuestion.objects.filter(updated_at__gte=index.synced_at - SYNC_MARGIN)
+        )
+    )
+    index.apply(changed, version, synced_at)
+    if len(index) != RecentQuestion.objects.filter(is_active=True).count():
+        return build_autocomplete_index(version)
+    return index
+
+
+def indexed_questions(queryset):
+    return queryset.only(
+        "id",
+        "is_active",
+        "question",
+        "description",
+        "category",
+        "created_at",
+        "question_normalized",
+    )
+
+
+def build_autocomplete_index(version=None):
+    """Build a new index and swap it in; searches use the old one meanwhile"""
+    global _index
+    if version is None:
+        version = get_version(QUESTIONS)
+    synced_at = timezone.now()
+    index = AutocompleteIndex()
+    index.build(
+        indexed_questions(RecentQuestion.objects.filter(is_active=True)).iterator(
+            chunk_size=2000
+        ),
+        version=version,
+        synced_at=synced_at,
+    )
+    _index = index
+    return index
+
+
+def update_question(question, previous_version, version):
+    """Apply a local save and keep the index marked as up to date"""
+    index = _index
+    if index is None:
+        return
+    index.add(question)
+    if index.version == previous_version:
+        index.version = version
+
+
+def remove_question(question_id, previous_version, version):
+    """Apply a local delete and keep the index marked as up to date"""
+    index = _index
+    if index is None:
+        return
+    index.discard(question_id)
+    if index.version == previous_version:
+        index.version = version
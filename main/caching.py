@@ -0,0 +1,47 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class VersionedLRUCache:
+    """Small thread-safe in-process LRU cache with TTL and version checks
+
+    An entry is only returned while it is younger than ``ttl`` seconds and
+    was stored under the same ``version`` the caller asks for, so bumping a
+    version counter invalidates every entry at once without a sweep.
+    """
+
+    def __init__(self, maxsize=1024, ttl=60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, version):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires, entry_version, value = entry
+                if entry_version == version and expires > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def set(self, key, version, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, version, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
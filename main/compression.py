@@ -0,0 +1,144 @@
+"""Minified, compressed dynamic responses
+
+``CompressionMiddleware`` minifies HTML and compresses every text response
+on the way out. The page cache stores the minified page together with its
+compressed variants (``encode_variants``) and serves them through
+``serve_variant``, so a cache hit costs no compression at all. Streamed text
+responses, like the question sitemaps, are gzipped chunk by chunk.
+"""
+
+import gzip
+import re
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_sequence
+
+from .minify import minify_html
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Preferred first; brotli only when the package is installed
+ENCODINGS = ("br", "gzip") if brotli else ("gzip",)
+
+# Compression levels for responses compressed on every request, and for
+# the variants stored once in the page cache
+LIVE_LEVELS = {"br": 5, "gzip": 6}
+STORED_LEVELS = {"br": 11, "gzip": 9}
+
+COMPRESSIBLE_TYPES = (
+    "text/",
+    "application/json",
+    "application/javascript",
+    "application/xml",
+    "image/svg+xml",
+)
+
+# An item with a malformed qvalue is ignored, like an unknown coding
+ACCEPT_ENCODING_ITEM = re.compile(
+    r"\s*([\w*-]+)\s*(?:;\s*q\s*=\s*([01](?:\.\d{0,3})?))?\s*"
+)
+
+
+def is_enabled():
+    return getattr(settings, "RESPONSE_COMPRESSION", True)
+
+
+def is_minify_enabled():
+    return getattr(settings, "HTML_MINIFY", not settings.DEBUG)
+
+
+def accepted_encoding(request, encodings=ENCODINGS):
+    """The first of ``encodings`` the client accepts, or None"""
+    header = request.META.get("HTTP_ACCEPT_ENCODING", "")
+    accepted = set()
+    for item in header.lower().split(","):
+        match = ACCEPT_ENCODING_ITEM.fullmatch(item)
+        if match and float(match[2] or 1) > 0:
+            accepted.add(match[1])
+    for encoding in encodings:
+        if encoding in accepted or "*" in accepted:
+            return encoding
+    return None
+
+
+def compress(content, encoding, levels=LIVE_LEVELS):
+    if encoding == "br":
+        return brotli.compress(content, quality=levels["br"])
+    return gzip.compress(content, compresslevel=levels["gzip"], mtime=0)
+
+
+def encode_variants(content):
+    """Every encoding of ``content`` worth storing, by name"""
+    if not is_enabled():
+        return {}
+    variants = {}
+    for encoding in ENCODINGS:
+        compressed = compress(content, encoding, STORED_LEVELS)
+        if len(compressed) < len(content):
+            variants[encoding] = compressed
+    return variants
+
+
+def is_html(response):
+    return response.get("Content-Type", "").startswith("text/html")
+
+
+def minified_content(response):
+    """The response body, minified when it is an HTML page"""
+    if is_minify_enabled() and is_html(response):
+        charset = response.charset
+        return minify_html(response.content.decode(charset)).encode(charset)
+    return response.content
+
+
+def is_text(response):
+    return response.get("Content-Type", "").startswith(COMPRESSIBLE_TYPES)
+
+
+def is_compressible(response):
+    return (
+        not response.streaming
+        and not response.has_header("Content-Encoding")
+        and len(response.content) >= getattr(settings, "COMPRESSION_MIN_SIZE", 512)
+        and is_text(response)
+    )
+
+
+def compress_stream(response):
+    """Gzip a streamed text response as it is sent"""
+    patch_vary_headers(response, ("Accept-Encoding",))
+    response.streaming_content = compress_sequence(response.streaming_content)
+    response["Content-Encoding"] = "gzip"
+    del response["Content-Length"]
+    return response
+
+
+def serve_variant(request, response, variants):
+    """Send the client the stored variant it accepts, if there is one"""
+    if variants:
+        patch_vary_headers(response, ("Accept-Encoding",))
+        encoding = accepted_encoding(request)
+        if encoding in variants:
+            apply_encoding(response, encoding, variants[encoding])
+    return response
+
+
+def replace_content(response, content):
+    response.content = content
+    # Set by CommonMiddleware for the body it saw
+    if response.has_header("Content-Length"):
+        response["Content-Length"] = str(len(content))
+
+
+def apply_encoding(response, encoding, compressed):
+    replace_content(response, compressed)
+    response["Content-Encoding"] = encoding
+    # The compressed body is no longer byte-identical to an uncompressed one
+    etag = response.get("ETag")
+    if etag and etag.startswith('"'):
+        response["ETag"] = "W/" + etag
+    return response
@@ -0,0 +1,129 @@
+"""Conditional GET for the question pages
+
+A question page is dated by the newest ``updated_at`` of the question and
+its active answers, loaded with the question itself; the question list by
+the question and answer version counters, without any query. Both also depend on the
+templates and static files of the running release. Requests whose
+``If-None-Match`` or ``If-Modified-Since`` still match get a 304 without
+the page being rendered.
+
+Only anonymous reads are validated, like the page cache. Changes to a
+lawyer's name are not tracked.
+"""
+
+import datetime
+from pathlib import Path
+
+from django.apps import apps
+from django.contrib import messages
+from django.db.models import OuterRef, Subquery
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+from . import metrics
+from .models import LawyerAnswer, RecentQuestion
+from .versions import ANSWERS, QUESTIONS, get_versions
+
+_release_time = None
+
+
+def release_time():
+    """When the newest template or static file of the app was written
+
+    A deploy changes how every page looks without touching the data, so it
+    has to change the validators too.
+    """
+    global _release_time
+    if _release_time is None:
+        root = Path(apps.get_app_config("main").path)
+        newest = max(
+            path.stat().st_mtime
+            for folder in ("templates", "static")
+            for path in (root / folder).rglob("*")
+            if path.is_file()
+        )
+        _release_time = datetime.datetime.fromtimestamp(
+            int(newest), tz=datetime.timezone.utc
+        )
+    return _release_time
+
+
+def is_anonymous_read(request):
+    """GET/HEAD by an anonymous visitor without pending flash messages"""
+    if request.method not in ("GET", "HEAD"):
+        return False
+    # Requests built without the auth middleware count as anonymous
+    user = getattr(request, "user", None)
+    if user is not None and user.is_authenticated:
+        return False
+    # len() loads pending messages without marking them as shown
+    if len(messages.get_messages(request)):
+        return False
+    return True
+
+
+def dated_questions():
+    """Questions annotated with the newest ``updated_at`` of their active answers"""
+    answers = LawyerAnswer.objects.filter(question=OuterRef("pk"), is_active=True)
+    return RecentQuestion.objects.annotate(
+        answers_updated_at=Subquery(
+            answers.order_by("-updated_at").values("updated_at")[:1]
+        )
+    )
+
+
+def question_validators(question):
+    """(ETag, Last-Modified) of the page of a question from dated_questions()"""
+    last_modified = max(
+        date
+        for date in (question.updated_at, question.answers_updated_at, release_time())
+        if date
+    )
+    etag = f"q{question.pk}-{int(last_modified.timestamp() * 1e6):x}"
+    return quote_etag(etag), last_modified
+
+
+def list_validators():
+    """(ETag, Last-Modified) of the question list, from the version counters"""
+    versions = get_versions(QUESTIONS, ANSWERS)
+    etag = "l-{:x}-{:x}-{:x}".format(
+        versions[QUESTIONS], versions[ANSWERS], int(release_time().timestamp())
+    )
+    return quote_etag(etag), None
+
+
+def validators_for(request, compute, *args):
+    """``compute(*args)`` for requests that may be answered with a 304"""
+    if not is_anonymous_read(request):
+        return None
+    return compute(*args)
+
+
+def not_modified(request, validators):
+    """A 304 response when the client's copy is current, else None"""
+    if validators is None:
+        return None
+    etag, last_modified = validators
+    response = get_conditional_response(
+        request,
+        etag=etag,
+        last_modified=last_modified and int(last_modified.timestamp()),
+    )
+    metrics.incr("conditional_get.not_modified" if response else "conditional_get.full")
+    return response
+
+
+def add_validators(response, validators):
+    """Send the validators, and make browsers revalidate before reuse"""
+    if validators is None or response.status_code not in (200, 304):
+        return response
+    etag, last_modified = validators
+    response.headers.setdefault("ETag", etag)
+    if last_modified:
+        response.headers.setdefault(
+            "Last-Modified", http_date(last_modified.timestamp())
+        )
+    # Without it, Last-Modified alone lets browsers guess a freshness
+    # lifetime and skip asking
+    patch_cache_control(response, no_cache=True)
+    return response
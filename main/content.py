@@ -0,0 +1,69 @@
+import threading
+from dataclasses import dataclass
+from types import MappingProxyType
+
+from .models import FAQ, ConsultationType, Service, SiteContent
+from .versions import CONTENT_VERSIONS, get_versions
+
+
+@dataclass(frozen=True)
+class ContentSnapshot:
+    """Immutable copy of the active admin-managed content"""
+
+    version: tuple
+    faqs: tuple
+    services: tuple
+    consultation_types: tuple
+    site_content: MappingProxyType
+
+    def consultation_types_for(self, *type_keys):
+        """Active consultation types with one of ``type_keys``, in display order"""
+        return tuple(
+            consultation_type
+            for consultation_type in self.consultation_types
+            if consultation_type.type_key in type_keys
+        )
+
+
+def load_content_snapshot(version):
+    return ContentSnapshot(
+        version=version,
+        faqs=tuple(FAQ.objects.filter(is_active=True).order_by("order", "created_at")),
+        services=tuple(
+            Service.objects.filter(is_active=True).order_by("order", "created_at")
+        ),
+        consultation_types=tuple(
+            ConsultationType.objects.filter(is_active=True).order_by(
+                "order", "created_at"
+            )
+        ),
+        site_content=MappingProxyType(
+            dict(
+                SiteContent.objects.filter(is_active=True).values_list(
+                    "content_type", "content"
+                )
+            )
+        ),
+    )
+
+
+_snapshot = None
+_lock = threading.Lock()
+
+
+def get_content_snapshot():
+    """Return the content snapshot, reloading it only after an admin edit
+
+    Admin saves and deletes bump the per-model content versions; as long as
+    they are unchanged the snapshot is served without any database query.
+    """
+    global _snapshot
+    versions = get_versions(*CONTENT_VERSIONS)
+    version = tuple(versions[name] for name in CONTENT_VERSIONS)
+    snapshot = _snapshot
+    if snapshot is not None and snapshot.version == version:
+        return snapshot
+    with _lock:
+        if _snapshot is None or _snapshot.version != version:
+            _snapshot = load_content_snapshot(version)
+        return _snapshot
@@ -0,0 +1,7 @@
+def canonical_url(request):
+    """The page's absolute URL without its query string
+
+    Pages are cached for every visitor regardless of query parameters, so
+    canonical links, og:url and JSON-LD must not echo them back.
+    """
+    return {"canonical_url": request.build_absolute_uri(request.path)}
@@ -0,0 +1,107 @@
+from django.db.models import (
+    BooleanField,
+    Case,
+    Count,
+    Exists,
+    F,
+    IntegerField,
+    OuterRef,
+    Q,
+    Subquery,
+    Value,
+    When,
+)
+from django.db.models.functions import Coalesce, Now
+from django.db.models.lookups import GreaterThan
+
+from .models import LawyerAnswer, RecentQuestion
+
+
+def _active_answers():
+    return LawyerAnswer.objects.filter(question=OuterRef("pk"), is_active=True)
+
+
+def answers_count_subquery():
+    return Coalesce(
+        Subquery(
+            _active_answers()
+            .order_by()
+            .values("question")
+            .annotate(count=Count("pk"))
+            .values("count"),
+            output_field=IntegerField(),
+        ),
+        Value(0),
+    )
+
+
+def last_answered_subquery():
+    return Subquery(_active_answers().order_by("-created_at").values("created_at")[:1])
+
+
+def adjust_answer_counters(question_id, delta, answered_at=None):
+    """Move a question's answer counters by ``delta`` in a single UPDATE"""
+    if delta > 0:
+        # The newest answer wins; NULL compares false so it falls through
+        last_answered_at = Case(
+            When(last_answered_at__gt=answered_at, then=F("last_answered_at")),
+            default=Value(answered_at),
+        )
+    else:
+        last_answered_at = last_answered_subquery()
+    RecentQuestion.objects.filter(pk=question_id).update(
+        answers_count=F("answers_count") + delta,
+        last_answered_at=last_answered_at,
+        is_answered=Case(
+            When(GreaterThan(F("answers_count") + delta, 0), then=Value(True)),
+            default=Value(False),
+            output_field=BooleanField(),
+        ),
+        updated_at=Now(),
+    )
+
+
+def answer_saved(answer, created):
+    if created:
+        before = (None, False)
+    else:
+        before = getattr(answer, "_loaded_counter_state", (None, False))
+    after = (answer.question_id, answer.is_active)
+    answer._loaded_counter_state = after
+    if before == after:
+        return
+    before_question, counted_before = before
+    after_question, counted_after = after
+    if counted_before:
+        adjust_answer_counters(before_question, -1)
+    if counted_after:
+        adjust_answer_counters(after_question, +1, answer.created_at)
+
+
+def answer_deleted(answer):
+    question_id, counted = getattr(
+        answer, "_loaded_counter_state", (answer.question_id, answer.is_active)
+    )
+    if counted:
+        adjust_answer_counters(question_id, -1)
+
+
+def repair_answer_counters(queryset):
+    """Recompute the counters of ``queryset``; returns how many had drifted"""
+    count = answers_count_subquery()
+    last_answered_at = last_answered_subquery()
+    drifted = (
+        queryset.annotate(expected_count=count)
+        .filter(
+            ~Q(answers_count=F("expected_count"))
+            | Q(is_answered=True, expected_count=0)
+            | Q(is_answered=False, expected_count__gt=0)
+        )
+        .count()
+    )
+    queryset.update(
+        answers_count=count,
+        last_answered_at=last_answered_at,
+        is_answered=Exists(_active_answers()),
+    )
+    return drifted
@@ -0,0 +1,166 @@
+import asyncio
+import json
+import os
+import statistics
+import time
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+
+from .bench_views import percentile
+
+
+class Command(BaseCommand):
+    help = (
+        "Hold many concurrent, optionally slow, HTTP clients against a running "
+        "server and report throughput and latency. Compare a sync deployment "
+        "(gunicorn -c gunicorn.conf.py dadpars_site.wsgi) with the async views "
+        "(ASYNC_VIEWS=1, GUNICORN_WORKER_CLASS=uvicorn.workers.UvicornWorker, "
+        "dadpars_site.asgi) by running it against each with the same options."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "url",
+            help="Page to request, e.g. http://127.0.0.1:8000/questions/",
+        )
+        parser.add_argument(
+            "--clients",
+            type=int,
+            default=100,
+            help="Concurrent connections (default: 100)",
+        )
+        parser.add_argument(
+            "--duration",
+            type=float,
+            default=10,
+            help="Seconds to keep the clients busy (default: 10)",
+        )
+        parser.add_argument(
+            "--slow-send",
+            type=float,
+            default=0,
+            help="Seconds each client spends trickling its request headers, "
+            "like a client on a poor mobile link (default: 0)",
+        )
+        parser.add_argument(
+            "--slow-read",
+            type=float,
+            default=0,
+            help="Seconds each client waits before reading the response "
+            "(default: 0)",
+        )
+        parser.add_argument(
+            "--timeout",
+            type=float,
+            default=30,
+            help="Seconds before a request counts as failed (default: 30)",
+        )
+        parser.add_argument(
+            "--server-cores",
+            type=int,
+            default=os.cpu_count(),
+            help="CPU cores the server runs on, to report throughput per core "
+            "(default: the cores of this machine)",
+        )
+        parser.add_argument("--json", help="Write the results to this JSON file")
+
+    def handle(self, *args, **options):
+        url = urlsplit(options["url"])
+        if url.scheme != "http" or not url.hostname:
+            raise CommandError("Only plain http:// URLs are supported")
+        if options["clients"] < 1:
+            raise CommandError("--clients must be at least 1")
+        self.host = url.hostname
+        self.port = url.port or 80
+        self.path = (url.path or "/") + (f"?{url.query}" if url.query else "")
+        self.options = options
+
+        timings, errors, elapsed = asyncio.run(self.run())
+        completed = len(timings)
+        report = {
+            "url": options["url"],
+            "clients": options["clients"],
+            "duration_s": round(elapsed, 3),
+            "slow_send_s": options["slow_send"],
+            "slow_read_s": options["slow_read"],
+            "requests": completed,
+            "errors": errors,
+            "requests_per_s": round(completed / elapsed, 1),
+            "requests_per_s_per_core": round(
+                completed / elapsed / options["server_cores"], 1
+            ),
+        }
+        if timings:
+            report.update(
+                {
+                    "p50_ms": round(percentile(timings, 50), 3),
+                    "p95_ms": round(percentile(timings, 95), 3),
+                    "p99_ms": round(percentile(timings, 99), 3),
+                    "mean_ms": round(statistics.fmean(timings), 3),
+                }
+            )
+        for key, value in report.items():
+            self.stdout.write(f"{key:<24} {value}")
+        if options["json"]:
+            with open(options["json"], "w") as f:
+                json.dump(report, f, indent=2)
+            self.stdout.write(f"Results written to {options['json']}")
+        if not timings:
+            raise CommandError("No request completed")
+
+    async def run(self):
+        deadline = time.monotonic() + self.options["duration"]
+        start = time.monotonic()
+        results = await asyncio.gather(
+            *(self.client(deadline) for _ in range(self.options["clients"]))
+        )
+        timings = [timing for client, _ in results for timing in client]
+        errors = sum(count for _, count in results)
+        return timings, errors, time.monotonic() - start
+
+    async def client(self, deadline):
+        """Send requests one after another until ``deadline``"""
+        timings = []
+        errors = 0
+        while time.monotonic() < deadline:
+            start = time.perf_counter()
+            try:
+                status = await asyncio.wait_for(
+                    self.request(), timeout=self.options["timeout"]
+                )
+            except (OSError, asyncio.TimeoutError, ValueError, IndexError):
+                status = None
+            if status == 200:
+                timings.append((time.perf_counter() - start) * 1000)
+            else:
+                errors += 1
+        return timings, errors
+
+    async def request(self):
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        try:
+            head = (
+                f"GET {self.path} HTTP/1.1\r\n"
+                f"Host: {self.host}:{self.port}\r\n"
+                "User-Agent: bench_concurrency\r\n"
+                "Connection: close\r\n\r\n"
+            ).encode()
+            slow_send = self.options["slow_send"]
+            if slow_send:
+                # A few bytes at a time, keeping a sync worker waiting
+                chunks = [head[i : i + 8] for i in range(0, len(head), 8)]
+                for chunk in chunks:
+                    writer.write(chunk)
+                    await writer.drain()
+                    await asyncio.sleep(slow_send / len(chunks))
+            else:
+                writer.write(head)
+                await writer.drain()
+            if self.options["slow_read"]:
+                await asyncio.sleep(self.options["slow_read"])
+            status_line = await reader.readline()
+            await reader.read()
+            return int(status_line.split()[1])
+        finally:
+            writer.close()
@@ -0,0 +1,356 @@
+import io
+import json
+import math
+import platform
+import resource
+import statistics
+import time
+import tracemalloc
+import urllib.error
+import urllib.request
+from contextlib import ExitStack, contextmanager
+from datetime import datetime, timezone
+
+import django
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import Client
+from django.test.testcases import LiveServerThread
+from django.test.utils import (
+    override_settings,
+    setup_databases,
+    setup_test_environment,
+    teardown_databases,
+    teardown_test_environment,
+)
+from django.urls import reverse
+
+from main import sitemaps, synthetic
+from main.models import RecentQuestion
+from main.queries import QueryRecorder, record_queries
+from main.urls import urlpatterns
+
+# Routes that need a login or only accept POST are not benchmarked
+SKIPPED_ROUTES = {"consultation_list", "test_consultation_types"}
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of ``samples``"""
+    ordered = sorted(samples)
+    rank = max(math.ceil(pct / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a throwaway test database with synthetic questions and measure "
+        "latency, queries, response size and memory of every public route"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--size",
+            type=int,
+            default=1000,
+            help="Number of synthetic questions (default: 1000)",
+        )
+        parser.add_argument(
+            "--answers-per-question",
+            type=int,
+            default=1,
+            help="Answers attached to each answered question (default: 1)",
+        )
+        parser.add_argument(
+            "--requests",
+            type=int,
+            default=50,
+            help="Timed requests per route (default: 50)",
+        )
+        parser.add_argument(
+            "--warmup",
+            type=int,
+            default=5,
+            help="Untimed requests per route before measuring (default: 5)",
+        )
+        parser.add_argument(
+            "--route",
+            action="append",
+            dest="routes",
+            help="Only benchmark this route name (may be repeated)",
+        )
+        parser.add_argument(
+            "--cold",
+            action="store_true",
+            help="Clear the cache before every request (the benchmark uses "
+            "its own in-memory caches, never the configured ones)",
+        )
+        parser.add_argument(
+            "--server",
+            action="store_true",
+            help="Send requests over HTTP to a threaded WSGI server "
+            "instead of calling the test client",
+        )
+        parser.add_argument(
+            "--keepdb",
+            action="store_true",
+            help="Reuse the test database (and its seeded data) between runs",
+        )
+        parser.add_argument("--json", help="Write the results to this JSON file")
+        parser.add_argument(
+            "--baseline",
+            help="JSON file of an earlier run; fail when a route regressed",
+        )
+        parser.add_argument(
+            "--tolerance",
+            type=float,
+            default=0.25,
+            help="Allowed relative p95 slowdown against --baseline (default: 0.25)",
+        )
+
+    def handle(self, *args, **options):
+        if options["requests"] < 1:
+            raise CommandError("--requests must be at least 1")
+        # Same conditions as the test runner: DEBUG off, test database, and
+        # throwaway caches, so --cold and the seeding never clear or
+        # invalidate the cache that live workers share. --server requests
+        # go to localhost, which the test environment does not allow.
+        isolated_caches = override_settings(
+            CACHES={
+                alias: {
+                    "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+                    "LOCATION": f"bench_views-{alias}",
+                }
+                for alias in settings.CACHES
+            },
+            ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "localhost"],
+        )
+        isolated_caches.enable()
+        try:
+            setup_test_environment(debug=False)
+        except RuntimeError:
+            # Already inside a test run, like the test suite's smoke test;
+            # its test database is the throwaway one
+            old_config = None
+        else:
+            old_config = setup_databases(
+                verbosity=0, interactive=False, keepdb=options["keepdb"]
+            )
+        try:
+            if not RecentQuestion.objects.exists():
+                self.seed(options)
+            results = self.run(options)
+        finally:
+            if old_config is not None:
+                teardown_databases(old_config, verbosity=0, keepdb=options["keepdb"])
+                teardown_test_environment()
+            isolated_caches.disable()
+
+        report = {
+            "meta": {
+                "size": options["size"],
+                "answers_per_question": options["answers_per_question"],
+                "requests": options["requests"],
+                "mode": "server" if options["server"] else "client",
+                "cold": options["cold"],
+                "database": connections["default"].vendor,
+                "django": django.get_version(),
+                "python": platform.python_version(),
+                "timestamp": datetime.now(timezone.utc).isoformat(),
+            },
+            "routes": results,
+        }
+        self.print_table(results)
+        if options["json"]:
+            with open(options["json"], "w") as f:
+                json.dump(report, f, indent=2)
+            self.stdout.write(f"Results written to {options['json']}")
+        if options["baseline"]:
+            self.compare(report, options["baseline"], options["tolerance"])
+
+    def seed(self, options):
+        size = options["size"]
+        self.stdout.write(f"Seeding {size} synthetic questions...")
+        call_command("create_sample_data", stdout=io.StringIO())
+        synthetic.seed_questions(
+            size,
+            answers_per_question=options["answers_per_question"],
+            batch_size=5000,
+            progress=lambda n: self.stdout.write(f"  {n}/{size}", ending="\r"),
+        )
+        synthetic.seed_consultation_requests(max(size // 10, 1))
+        synthetic.finish()
+        self.stdout.write("")
+
+    def routes(self, selected):
+        question = (
+            RecentQuestion.objects.filter(is_active=True, is_answered=True)
+            .order_by("-created_at")
+            .first()
+        )
+        routes = {}
+        for pattern in urlpatterns:
+            name = pattern.name
+            if not name or name in SKIPPED_ROUTES:
+                continue
+            if selected and name not in selected:
+                continue
+            if name == "question_detail":
+                url = reverse("main:question_detail", args=[question.pk])
+            elif name == "sitemap_questions":
+                chunk = question.pk // sitemaps.chunk_size()
+                url = reverse("main:sitemap_questions", args=[chunk])
+            else:
+                url = reverse(f"main:{name}")
+            if name == "search_questions":
+                url += "?q=" + urllib.request.quote(synthetic.TOPICS["civil"][0])
+            routes[name] = url
+        return routes
+
+    def run(self, options):
+        cache = caches["default"]
+        server = None
+        if options["server"]:
+            server = self.start_server()
+            fetch = self.http_fetch(server)
+            recording = self.record_shared_queries
+        else:
+            fetch = self.client_fetch(Client())
+            recording = record_queries
+
+        results = {}
+        try:
+            for name, url in self.routes(options["routes"]).items():
+                for _ in range(options["warmup"]):
+                    fetch(url)
+                timings = []
+                queries = []
+                for _ in range(options["requests"]):
+                    if options["cold"]:
+                        cache.clear()
+                    with recording() as recorder:
+                        start = time.perf_counter()
+                        status, body = fetch(url)
+                        timings.append((time.perf_counter() - start) * 1000)
+                    queries.append(recorder.count)
+
+                # One extra, untimed request traced for Python allocations
+                tracemalloc.start()
+                fetch(url)
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+
+                results[name] = {
+                    "url": url,
+                    "status": status,
+                    "p50_ms": round(percentile(timings, 50), 3),
+                    "p95_ms": round(percentile(timings, 95), 3),
+                    "p99_ms": round(percentile(timings, 99), 3),
+                    "mean_ms": round(statistics.fmean(timings), 3),
+                    "queries": max(queries),
+                    "bytes": len(body),
+                    "peak_alloc_kb": round(peak / 1024, 1),
+                    "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+                }
+        finally:
+            if server:
+                server.terminate()
+                for conn in connections.all():
+                    conn.dec_thread_sharing()
+        return results
+
+    def client_fetch(self, client):
+        def fetch(url):
+            response = client.get(url)
+            if response.streaming:
+                return response.status_code, b"".join(response.streaming_content)
+            return response.status_code, response.content
+
+        return fetch
+
+    def http_fetch(self, server):
+        base = f"http://{server.host}:{server.port}"
+
+        def fetch(url):
+            try:
+                with urllib.request.urlopen(base + url) as response:
+                    return response.status, response.read()
+            except urllib.error.HTTPError as e:
+                return e.code, e.read()
+
+        return fetch
+
+    def start_server(self):
+        # Share this thread's connections so the server sees the test
+        # database (including in-memory SQLite) and its queries are counted
+        overrides = {}
+        for conn in connections.all():
+            conn.inc_thread_sharing()
+            overrides[conn.alias] = conn
+        server = LiveServerThread("localhost", lambda app: app, overrides, port=0)
+        server.daemon = True
+        server.start()
+        server.is_ready.wait()
+        if server.error:
+            raise server.error
+        return server
+
+    @contextmanager
+    def record_shared_queries(self):
+        """Record the queries of the server threads on the shared connections
+
+        Those threads do not run in this thread's context, so the recorder
+        goes on the connections themselves instead of record_queries().
+        """
+        recorder = QueryRecorder()
+        with ExitStack() as stack:
+            for conn in connections.all():
+                stack.enter_context(conn.execute_wrapper(recorder))
+            yield recorder
+
+    def print_table(self, results):
+        header = (
+            f"{'route':<30} {'status':>6} {'p50':>8} {'p95':>8} {'p99':>8} "
+            f"{'queries':>7} {'bytes':>8} {'alloc KB':>9}"
+        )
+        self.stdout.write(header)
+        self.stdout.write("-" * len(header))
+        for name, row in results.items():
+            self.stdout.write(
+                f"{name:<30} {row['status']:>6} {row['p50_ms']:>8.2f} "
+                f"{row['p95_ms']:>8.2f} {row['p99_ms']:>8.2f} {row['queries']:>7} "
+                f"{row['bytes']:>8} {row['peak_alloc_kb']:>9.1f}"
+            )
+
+    def compare(self, report, path, tolerance):
+        with open(path) as f:
+            baseline = json.load(f)
+        for key in ("size", "mode", "cold", "database"):
+            if baseline["meta"].get(key) != report["meta"][key]:
+                self.stderr.write(
+                    self.style.WARNING(
+                        f"Baseline was run with {key}={baseline['meta'].get(key)}, "
+                        f"this run with {key}={report['meta'][key]}"
+                    )
+                )
+        results = report["routes"]
+        baseline = baseline["routes"]
+        regressions = []
+        for name, row in results.items():
+            before = baseline.get(name)
+            if before is None:
+                continue
+            if row["p95_ms"] > before["p95_ms"] * (1 + tolerance):
+                regressions.append(
+                    f"{name}: p95 {row['p95_ms']}ms > {before['p95_ms']}ms "
+                    f"+{tolerance:.0%}"
+                )
+            if row["queries"] > before["queries"]:
+                regressions.append(
+                    f"{name}: {row['queries']} queries > {before['queries']}"
+                )
+        if regressions:
+            raise CommandError("Regressions found:\n" + "\n".join(regressions))
+        self.stdout.write(self.style.SUCCESS(f"No regressions against {path}"))
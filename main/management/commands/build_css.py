@@ -0,0 +1,235 @@
+import json
+import math
+import re
+import shutil
+import statistics
+import subprocess
+import time
+from pathlib import Path
+
+from django.apps import apps
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from .minify_static import gzipped_size, report_urls
+
+SOURCE = "assets/tailwind.css"
+TARGET = "static/css/tailwind.min.css"
+
+CLASS_ATTRIBUTE = re.compile(r'class="([^"]*)"')
+TEMPLATE_TAG = re.compile(r"\{[{%].*?[%}]\}", re.S)
+STYLESHEET = re.compile(r'<link rel="stylesheet" href="([^"]+)"')
+OKLCH = re.compile(
+    r"oklch\(\s*([\d.]+)(%?)\s+([\d.]+)\s+([\d.]+|none)"
+    r"(?:\s*/\s*([\d.]+)(%?))?\s*\)"
+)
+
+
+def template_classes(root):
+    """Every literal class name used in the templates under ``root``"""
+    classes = set()
+    for path in root.rglob("*.html"):
+        for value in CLASS_ATTRIBUTE.findall(path.read_text(encoding="utf-8")):
+            # Names built by a template tag, like bg-{{ color }}-500, are
+            # safelisted in the Tailwind source instead
+            value = TEMPLATE_TAG.sub("\0", value)
+            classes.update(name for name in value.split() if "\0" not in name)
+    return classes
+
+
+def srgb_hex(lightness, chroma, hue, alpha=1.0):
+    """``#rrggbb[aa]`` of an OKLCH colour, clipped to the sRGB gamut"""
+    a = chroma * math.cos(math.radians(hue))
+    b = chroma * math.sin(math.radians(hue))
+    l_ = (lightness + 0.3963377774 * a + 0.2158037573 * b) ** 3
+    m_ = (lightness - 0.1055613458 * a - 0.0638541728 * b) ** 3
+    s_ = (lightness - 0.0894841775 * a - 1.2914855480 * b) ** 3
+    linear = (
+        4.0767416621 * l_ - 3.3077115913 * m_ + 0.2309699292 * s_,
+        -1.2684380046 * l_ + 2.6097574011 * m_ - 0.3413193965 * s_,
+        -0.0041960863 * l_ - 0.7034186147 * m_ + 1.7076147010 * s_,
+    )
+    channels = []
+    for value in linear:
+        value = min(max(value, 0.0), 1.0)
+        if value <= 0.0031308:
+            value *= 12.92
+        else:
+            value = 1.055 * value ** (1 / 2.4) - 0.055
+        channels.append(round(value * 255))
+    if alpha < 1:
+        channels.append(round(alpha * 255))
+    return "#" + "".join(f"{channel:02x}" for channel in channels)
+
+
+def oklch_to_hex(css):
+    """Replace the ``oklch()`` colours of Tailwind 4's palette with hex
+
+    Browsers before Chrome 111 / Safari 15.4 drop any declaration with an
+    ``oklch()`` value, which left older Android WebViews without colours.
+    """
+
+    def replace(match):
+        lightness, percent, chroma, hue, alpha, alpha_percent = match.groups()
+        lightness = float(lightness) / (100 if percent else 1)
+        hue = 0.0 if hue == "none" else float(hue)
+        alpha = 1.0 if alpha is None else float(alpha) / (100 if alpha_percent else 1)
+        return srgb_hex(lightness, float(chroma), hue, alpha)
+
+    return OKLCH.sub(replace, css)
+
+
+def css_selector(name):
+    return "." + re.sub(r"([^\w-])", r"\\\1", name)
+
+
+class Command(BaseCommand):
+    help = (
+        "Build main/static/css/tailwind.min.css with the Tailwind CLI from "
+        "main/assets/tailwind.css, keeping only the utilities the templates "
+        "use, and report the HTML and CSS each page loads and its server "
+        "render time. Browser-side timing has to be measured in a browser."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Only verify the built stylesheet is up to date",
+        )
+        parser.add_argument(
+            "--no-pages",
+            action="store_true",
+            help="Skip rendering the pages for the per-page report",
+        )
+        parser.add_argument(
+            "--renders",
+            type=int,
+            default=5,
+            help="Timed renders per page (default: 5)",
+        )
+        parser.add_argument(
+            "--json",
+            metavar="PATH",
+            help="Write the per-page report to this file",
+        )
+        parser.add_argument(
+            "--compare",
+            metavar="PATH",
+            help="Show the difference to a report written earlier with --json",
+        )
+
+    def handle(self, *args, **options):
+        root = Path(apps.get_app_config("main").path)
+        target = root / TARGET
+        built = self.build(root / SOURCE)
+        current = target.read_text(encoding="utf-8") if target.exists() else None
+        if options["check"]:
+            if current != built:
+                raise CommandError(f"Out of date: {TARGET}; run manage.py build_css")
+            return
+        target.write_text(built, encoding="utf-8")
+        self.stdout.write(
+            f"{TARGET}: {len(built.encode())} bytes "
+            f"(gzip {gzipped_size(built.encode())})"
+        )
+
+        stylesheets = built + (root / "static/css/site.css").read_text("utf-8")
+        unstyled = sorted(
+            name
+            for name in template_classes(root / "templates")
+            if css_selector(name) not in stylesheets and not name.startswith("fa")
+        )
+        if unstyled:
+            # Mostly hooks for site.js, but a typo in a class name ends up here
+            self.stdout.write(f"Classes without a rule: {' '.join(unstyled)}")
+
+        if options["no_pages"]:
+            return
+        report = self.report_pages(options["renders"])
+        baseline = {}
+        if options["compare"]:
+            with open(options["compare"]) as handle:
+                baseline = json.load(handle)
+        self.write_report(report, baseline)
+        if options["json"]:
+            with open(options["json"], "w") as handle:
+                json.dump(report, handle, indent=2)
+
+    def build(self, source):
+        cli = getattr(settings, "TAILWIND_CLI", "tailwindcss")
+        if not shutil.which(cli):
+            raise CommandError(
+                f"Tailwind CLI {cli!r} not found; pip install tailwindcss-bin "
+                "or point settings.TAILWIND_CLI at the standalone binary"
+            )
+        result = subprocess.run(
+            [cli, "--input", str(source), "--output", "-", "--minify"],
+            capture_output=True,
+            text=True,
+        )
+        if result.returncode:
+            raise CommandError(result.stderr.strip())
+        return oklch_to_hex(result.stdout.strip()) + "\n"
+
+    def report_pages(self, renders):
+        """Bytes a browser fetches for each page and how long it takes to render"""
+        setup_test_environment()
+        try:
+            client = Client()
+            report = {}
+            for url in report_urls():
+                client.get(url)
+                timings = []
+                for _ in range(renders):
+                    started = time.perf_counter()
+                    content = client.get(url).content
+                    timings.append(time.perf_counter() - started)
+                css = b"".join(
+                    self.local_stylesheet(href)
+                    for href in STYLESHEET.findall(content.decode())
+                )
+                report[url] = {
+                    "html": len(content),
+                    "html_gzip": gzipped_size(content),
+                    "css": len(css),
+                    "css_gzip": gzipped_size(css),
+                    "external_scripts": content.count(b'<script src="http'),
+                    "render_ms": statistics.median(timings) * 1000,
+                }
+            return report
+        finally:
+            teardown_test_environment()
+
+    def local_stylesheet(self, href):
+        if not href.startswith(settings.STATIC_URL):
+            return b""
+        path = finders.find(href[len(settings.STATIC_URL) :])
+        return Path(path).read_bytes() if path else b""
+
+    def write_report(self, report, baseline):
+        self.stdout.write("")
+        self.stdout.write(
+            f"{'page':<40} {'html':>8} {'gzip':>7} {'css':>8} {'gzip':>7} "
+            f"{'ext js':>6} {'render':>9}"
+        )
+        for url, page in report.items():
+            self.stdout.write(
+                f"{url[:40]:<40} {page['html']:>8} {page['html_gzip']:>7} "
+                f"{page['css']:>8} {page['css_gzip']:>7} "
+                f"{page['external_scripts']:>6} {page['render_ms']:>7.1f}ms"
+            )
+            before = baseline.get(url)
+            if before:
+                self.stdout.write(
+                    f"{'  vs. baseline':<40} "
+                    f"{page['html'] - before['html']:>+8} "
+                    f"{page['html_gzip'] - before['html_gzip']:>+7} "
+                    f"{page['css'] - before['css']:>+8} "
+                    f"{page['css_gzip'] - before['css_gzip']:>+7} "
+                    f"{page['external_scripts'] - before['external_scripts']:>+6} "
+                    f"{page['render_ms'] - before['render_ms']:>+7.1f}ms"
+                )
@@ -1,14 +1,110 @@
+import time
+
 from django.contrib.auth.models import User
 from django.core.management.base import BaseCommand
+from django.db import connection
 from django.utils import timezone
 
+from main import synthetic
 from main.models import FAQ, ConsultationType, LawyerAnswer, RecentQuestion, Service
 
 
 class Command(BaseCommand):
     help = "Create sample data for consultation types, questions and answers"
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--questions",
+            type=int,
+            default=0,
+            help="Also generate this many synthetic questions",
+        )
+        parser.add_argument(
+            "--answers-per-question",
+            type=int,
+            default=1,
+            help="Answers given to each answered synthetic question (default: 1)",
+        )
+        parser.add_argument(
+            "--requests",
+            type=int,
+            default=0,
+            help="Also generate this many synthetic consultation requests",
+        )
+        parser.add_argument(
+            "--lawyers",
+            type=int,
+            default=20,
+            help="Size of the lawyer pool answering questions (default: 20)",
+        )
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=730,
+            help="Spread creation dates over this many past days (default: 730)",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=5000,
+            help="Rows per bulk INSERT and transaction (default: 5000)",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="Generate questions in this many parallel processes "
+            "(PostgreSQL only)",
+        )
+        parser.add_argument(
+            "--seed", type=int, default=0, help="Random seed (default: 0)"
+        )
+
     def handle(self, *args, **options):
+        self.create_fixed_content()
+        if options["questions"] or options["requests"]:
+            self.generate(options)
+
+    def generate(self, options):
+        workers = options["workers"]
+        if workers > 1 and connection.vendor == "sqlite":
+            self.stdout.write(
+                self.style.WARNING("SQLite allows a single writer, using 1 worker")
+            )
+            workers = 1
+
+        started = time.monotonic()
+        count = options["questions"]
+        if count:
+            self.stdout.write(f"Generating {count} questions...")
+            synthetic.seed_questions_parallel(
+                count,
+                workers,
+                answers_per_question=options["answers_per_question"],
+                batch_size=options["batch_size"],
+                lawyers=options["lawyers"],
+                days=options["days"],
+                seed=options["seed"],
+                progress=lambda n: self.stdout.write(f"  {n}/{count}", ending="\r"),
+            )
+            self.stdout.write("")
+        if options["requests"]:
+            self.stdout.write(f"Generating {options['requests']} requests...")
+            synthetic.seed_consultation_requests(
+                options["requests"],
+                batch_size=options["batch_size"],
+                days=options["days"],
+                seed=options["seed"],
+            )
+        self.stdout.write("Rebuilding the search index...")
+        synthetic.finish()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Generated synthetic data in {time.monotonic() - started:.1f}s"
+            )
+        )
+
+    def create_fixed_content(self):
         # Create consultation types
         phone_consultation, created = ConsultationType.objects.get_or_create(
             type_key="phone",
@@ -99,7 +195,6 @@ class Command(BaseCommand):
                 "description": "حقوقم چند ماه است پرداخت نشده و قصد دارم شکایت کنم. آیا امکان‌پذیر است؟",
                 "category": "labor",
                 "questioner_name": "کاربر مهمان",
-                "is_answered": True,
                 "order": 1,
             },
         )
@@ -114,7 +209,6 @@ class Command(BaseCommand):
                 "description": "برای درخواست طلاق، چه مراحلی باید طی شود؟",
                 "category": "family",
                 "questioner_name": "کاربر مهمان",
-                "is_answered": True,
                 "order": 2,
             },
         )
@@ -129,7 +223,6 @@ class Command(BaseCommand):
                 "description": "قرارداد اجاره املاک من سه ماه دیگر تمام می‌شود، اما می‌خواهم زودتر آن را فسخ کنم. آیا امکان‌پذیر است؟",
                 "category": "real_estate",
                 "questioner_name": "کاربر مهمان",
-                "is_answered": True,
                 "order": 3,
             },
         )
@@ -0,0 +1,175 @@
+import json
+import os
+import sys
+from datetime import datetime
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.core.serializers.json import DjangoJSONEncoder
+
+from main.models import LawyerAnswer, RecentQuestion
+
+# Lawyer accounts travel without ids or passwords and are matched by
+# username, the natural key Django uses for users
+USER_FIELDS = ("username", "first_name", "last_name", "email", "is_staff")
+
+
+class ExportEncoder(DjangoJSONEncoder):
+    """DjangoJSONEncoder that keeps microseconds instead of rounding them off"""
+
+    def default(self, o):
+        if isinstance(o, datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+def data_fields(model):
+    return [field for field in model._meta.concrete_fields if not field.primary_key]
+
+
+def exported_fields(model):
+    """Data fields minus the columns import_qa derives again"""
+    derived = set(getattr(model, "NORMALIZED_FIELDS", {}).values())
+    derived.update(getattr(model, "COUNTER_FIELDS", ()))
+    return [field for field in data_fields(model) if field.name not in derived]
+
+
+def record_key(record):
+    """The value a section is ordered by, used to resume after ``record``"""
+    if record["model"] == "auth.user":
+        return record["fields"]["username"]
+    return record["pk"]
+
+
+class Command(BaseCommand):
+    help = (
+        "Stream lawyers, questions and answers to a JSON Lines file that "
+        "import_qa can load"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "output",
+            nargs="?",
+            default="qa_data.jsonl",
+            help="File to write, or - for stdout (default: qa_data.jsonl)",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=2000,
+            help="Rows fetched per database round trip (default: 2000)",
+        )
+        parser.add_argument(
+            "--resume",
+            action="store_true",
+            help="Continue an interrupted export after its last complete line",
+        )
+
+    def handle(self, *args, **options):
+        output = options["output"]
+        self.batch_size = options["batch_size"]
+        resume = None
+        if output == "-":
+            if options["resume"]:
+                raise CommandError("--resume needs an output file")
+            stream = sys.stdout
+            self.progress = None
+        else:
+            if options["resume"] and os.path.exists(output):
+                resume = self.last_exported(output)
+            stream = open(output, "a" if resume else "w", encoding="utf-8")
+            self.progress = self.stdout
+
+        # Every row only refers to rows in an earlier section
+        sections = [
+            ("auth.user", self.users),
+            ("main.recentquestion", self.questions),
+            ("main.lawyeranswer", self.answers),
+        ]
+        if resume:
+            labels = [label for label, _ in sections]
+            sections = sections[labels.index(resume[0]) :]
+        written = 0
+        try:
+            for i, (label, records) in enumerate(sections):
+                after = resume[1] if resume and i == 0 else None
+                written += self.write(stream, label, records(after))
+        finally:
+            if stream is not sys.stdout:
+                stream.close()
+        if self.progress:
+            self.stdout.write(
+                self.style.SUCCESS(f"Exported {written} rows to {output}")
+            )
+
+    def lawyers(self):
+        return User.objects.filter(
+            pk__in=LawyerAnswer.objects.values("lawyer_id")
+        ).order_by("username")
+
+    def users(self, after):
+        queryset = self.lawyers()
+        if after is not None:
+            queryset = queryset.filter(username__gt=after)
+        for row in queryset.values(*USER_FIELDS).iterator(chunk_size=self.batch_size):
+            yield {"model": "auth.user", "fields": row}
+
+    def questions(self, after):
+        return self.rows(RecentQuestion, after)
+
+    def answers(self, after):
+        usernames = dict(self.lawyers().values_list("pk", "username"))
+        for record in self.rows(LawyerAnswer, after):
+            fields = record["fields"]
+            fields["lawyer"] = [usernames[fields["lawyer"]]]
+            yield record
+
+    def rows(self, model, after):
+        fields = exported_fields(model)
+        queryset = model.objects.order_by("pk")
+        if after is not None:
+            queryset = queryset.filter(pk__gt=after)
+        label = model._meta.label_lower
+        values = queryset.values_list("pk", *[field.attname for field in fields])
+        for pk, *row in values.iterator(chunk_size=self.batch_size):
+            yield {
+                "model": label,
+                "pk": pk,
+                "fields": {field.name: value for field, value in zip(fields, row)},
+            }
+
+    def write(self, stream, label, records):
+        count = 0
+        for record in records:
+            stream.write(
+                json.dumps(record, cls=ExportEncoder, ensure_ascii=False) + "\n"
+            )
+            count += 1
+            if self.progress and count % self.batch_size == 0:
+                stream.flush()
+                self.progress.write(f"  {label}: {count}", ending="\r")
+        if self.progress:
+            self.progress.write(f"  {label}: {count} rows")
+        return count
+
+    def last_exported(self, path):
+        """Return ``(model, key)`` of the last complete line, cutting a torn one"""
+        with open(path, "rb+") as f:
+            position = f.seek(0, os.SEEK_END)
+            tail = b""
+            while position > 0 and tail.count(b"\n") < 2:
+                step = min(65536, position)
+                position -= step
+                f.seek(position)
+                tail = f.read(step) + tail
+            if tail and not tail.endswith(b"\n"):
+                # Interrupted in the middle of a line: drop the partial record
+                cut = tail.rfind(b"\n") + 1
+                f.truncate(position + cut)
+                tail = tail[:cut]
+        lines = tail.splitlines()
+        if not lines:
+            return None
+        record = json.loads(lines[-1])
+        return record["model"], record_key(record)
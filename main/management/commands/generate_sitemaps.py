@@ -0,0 +1,115 @@
+import gzip
+import json
+import os
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from main import sitemaps
+
+STATE_FILE = "sitemap-state.json"
+
+
+def write_file(path, parts):
+    """Write ``path`` and ``path.gz`` from ``parts``, replacing both at once"""
+    temporary = path.with_name(path.name + ".tmp")
+    temporary_gz = path.with_name(path.name + ".gz.tmp")
+    with open(temporary, "wb") as plain, open(temporary_gz, "wb") as raw:
+        with gzip.GzipFile(fileobj=raw, mode="wb", compresslevel=9, mtime=0) as gz:
+            for part in parts:
+                data = part.encode()
+                plain.write(data)
+                gz.write(data)
+    os.replace(temporary_gz, path.with_name(path.name + ".gz"))
+    os.replace(temporary, path)
+
+
+class Command(BaseCommand):
+    help = (
+        "Write the sitemap index, the page sitemap and every question chunk "
+        "to SITEMAP_ROOT, with a gzipped copy of each. Only chunks whose "
+        "questions or answers changed since the last run are rewritten."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--base-url",
+            default=getattr(settings, "SITEMAP_BASE_URL", None),
+            help="Scheme and host of the site, like https://dadpars.ir "
+            "(default: settings.SITEMAP_BASE_URL)",
+        )
+        parser.add_argument(
+            "--output",
+            default=getattr(settings, "SITEMAP_ROOT", None),
+            help="Directory to write to (default: settings.SITEMAP_ROOT)",
+        )
+        parser.add_argument(
+            "--full",
+            action="store_true",
+            help="Rewrite every chunk, changed or not",
+        )
+
+    def handle(self, *args, **options):
+        base_url = (options["base_url"] or "").rstrip("/")
+        if not base_url or not options["output"]:
+            raise CommandError(
+                "Set --base-url and --output, or SITEMAP_BASE_URL and SITEMAP_ROOT"
+            )
+        output = Path(options["output"])
+        output.mkdir(parents=True, exist_ok=True)
+        started = time.perf_counter()
+
+        stats = sitemaps.chunk_stats()
+        state = {} if options["full"] else self.load_state(output, base_url)
+        written = 0
+        for chunk, (lastmod, count) in stats.items():
+            path = output / sitemaps.chunk_name(chunk)
+            if state.get(str(chunk)) == [lastmod.isoformat(), count] and path.exists():
+                continue
+            write_file(path, sitemaps.render_questions(base_url, chunk))
+            self.stdout.write(f"  {sitemaps.chunk_name(chunk)}: {count} questions")
+            written += 1
+
+        write_file(output / "sitemap-pages.xml", sitemaps.render_pages(base_url))
+        # Written after the chunks, so it never lists one that is not on disk
+        write_file(output / "sitemap.xml", sitemaps.render_index(base_url, stats))
+        self.save_state(output, base_url, stats)
+
+        # Chunks whose questions are all gone or hidden
+        current = {sitemaps.chunk_name(chunk) for chunk in stats}
+        for path in output.glob(sitemaps.chunk_name("*") + "*"):
+            if path.name.removesuffix(".gz") not in current:
+                path.unlink()
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Wrote {written} of {len(stats)} question sitemaps to {output} "
+                f"in {time.perf_counter() - started:.1f}s"
+            )
+        )
+
+    def load_state(self, output, base_url):
+        try:
+            with open(output / STATE_FILE) as handle:
+                state = json.load(handle)
+        except (FileNotFoundError, ValueError):
+            return {}
+        # Every URL changes with the base URL
+        if state.get("base_url") != base_url:
+            return {}
+        return state["chunks"]
+
+    def save_state(self, output, base_url, stats):
+        state = {
+            "base_url": base_url,
+            "chunks": {
+                str(chunk): [lastmod.isoformat(), count]
+                for chunk, (lastmod, count) in stats.items()
+            },
+        }
+        temporary = output / (STATE_FILE + ".tmp")
+        with open(temporary, "w") as handle:
+            json.dump(state, handle)
+        os.replace(temporary, output / STATE_FILE)
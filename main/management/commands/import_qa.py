@@ -0,0 +1,232 @@
+import hashlib
+import json
+import os
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection, transaction
+
+from main.counters import repair_answer_counters
+from main.models import (
+    LawyerAnswer,
+    RecentQuestion,
+    explicit_timestamps,
+    normalize_fields,
+)
+from main.search import get_search_backend
+from main.versions import ANSWERS, QUESTIONS, bump_version
+
+from .export_qa import USER_FIELDS, data_fields
+
+
+class Command(BaseCommand):
+    help = (
+        "Upsert lawyers, questions and answers from an export_qa JSON Lines "
+        "file, keeping ids; resumes where an interrupted run stopped"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "input",
+            nargs="?",
+            default="qa_data.jsonl",
+            help="File written by export_qa (default: qa_data.jsonl)",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Rows upserted per statement and transaction (default: 1000)",
+        )
+        parser.add_argument(
+            "--restart",
+            action="store_true",
+            help="Ignore the checkpoint of an earlier run and start from the top",
+        )
+
+    def handle(self, *args, **options):
+        path = options["input"]
+        if not os.path.exists(path):
+            raise CommandError(f"{path} does not exist")
+        self.checkpoint = path + ".checkpoint"
+        self.user_ids = {}
+        self.size = os.path.getsize(path)
+        self.rows = 0
+        # Of every byte applied so far, to tell on resume whether the file
+        # still starts with what the checkpoint counted
+        self.digest = hashlib.sha256()
+        offset = 0
+        if not options["restart"] and os.path.exists(self.checkpoint):
+            with open(self.checkpoint) as f:
+                state = json.load(f)
+            offset, self.rows = state["offset"], state["rows"]
+            self.verify_prefix(path, offset, state.get("sha256"))
+            self.stdout.write(f"Resuming after {self.rows} rows (byte {offset})")
+
+        upserts = {
+            "auth.user": self.upsert_users,
+            "main.recentquestion": self.upsert_questions,
+            "main.lawyeranswer": self.upsert_answers,
+        }
+        with open(path, "rb") as f:
+            f.seek(offset)
+            batch = []
+            label = None
+            for line in f:
+                if not line.endswith(b"\n"):
+                    raise CommandError(
+                        f"{path} ends in the middle of a record. Complete it with "
+                        f"export_qa --resume, then run this again to continue."
+                    )
+                if not line.strip():
+                    self.digest.update(line)
+                    offset += len(line)
+                    continue
+                record = json.loads(line)
+                if batch and (
+                    record["model"] != label or len(batch) >= options["batch_size"]
+                ):
+                    self.commit(upserts[label], batch, offset)
+                    batch = []
+                if record["model"] not in upserts:
+                    raise CommandError(f"Unexpected model {record['model']}")
+                label = record["model"]
+                batch.append(record)
+                self.digest.update(line)
+                offset += len(line)
+            if batch:
+                self.commit(upserts[label], batch, offset)
+
+        self.finish()
+        if os.path.exists(self.checkpoint):
+            os.remove(self.checkpoint)
+        self.stdout.write(self.style.SUCCESS(f"Imported {self.rows} rows from {path}"))
+
+    def commit(self, upsert, records, offset):
+        """Upsert one batch, then record how far the file has been applied"""
+        with transaction.atomic():
+            upsert(records)
+        self.rows += len(records)
+        # Written only after the commit, so a crash replays at most one
+        # batch, and replaying an upsert is harmless
+        temp = self.checkpoint + ".tmp"
+        with open(temp, "w") as f:
+            json.dump(
+                {
+                    "offset": offset,
+                    "rows": self.rows,
+                    "sha256": self.digest.hexdigest(),
+                },
+                f,
+            )
+        os.replace(temp, self.checkpoint)
+        percent = offset * 100 // self.size if self.size else 100
+        self.stdout.write(f"  {percent}% ({self.rows} rows)", ending="\r")
+
+    def verify_prefix(self, path, offset, expected):
+        """Refuse to resume unless ``path`` starts with the bytes applied before
+
+        ``export_qa --resume`` only appends, so a completed export passes.
+        A new export, or a different file under the same name, does not.
+        """
+        with open(path, "rb") as f:
+            remaining = offset
+            while remaining:
+                chunk = f.read(min(remaining, 1 << 20))
+                if not chunk:
+                    break
+                self.digest.update(chunk)
+                remaining -= len(chunk)
+        if remaining or self.digest.hexdigest() != expected:
+            raise CommandError(
+                f"{path} changed since the interrupted import stopped at byte "
+                f"{offset}. Run with --restart to import it from the top."
+            )
+
+    def upsert_users(self, records):
+        users = []
+        for record in records:
+            user = User(**record["fields"])
+            user.set_unusable_password()
+            users.append(user)
+        User.objects.bulk_create(
+            users,
+            update_conflicts=True,
+            unique_fields=["username"],
+            update_fields=[name for name in USER_FIELDS if name != "username"],
+        )
+        self.resolve_users([user.username for user in users])
+
+    def resolve_users(self, usernames):
+        missing = set(usernames) - self.user_ids.keys()
+        if missing:
+            self.user_ids.update(
+                User.objects.filter(username__in=missing).values_list("username", "pk")
+            )
+        unknown = missing - self.user_ids.keys()
+        if unknown:
+            raise CommandError(f"Unknown lawyers: {', '.join(sorted(unknown))}")
+
+    def build(self, model, record, **overrides):
+        fields = record["fields"]
+        values = {
+            field.attname: field.to_python(fields[field.name])
+            for field in data_fields(model)
+            if field.name in fields and field.attname not in overrides
+        }
+        instance = model(pk=record["pk"], **values, **overrides)
+        if instance.updated_at is None:
+            # Written by an export_qa from before the column existed
+            instance.updated_at = instance.created_at
+        # Recomputed rather than trusted, the export may predate a change
+        # to the normalization rules
+        normalize_fields(instance, {})
+        return instance
+
+    def upsert(self, model, instances):
+        with explicit_timestamps(model):
+            model.objects.bulk_create(
+                instances,
+                update_conflicts=True,
+                unique_fields=["id"],
+                update_fields=[field.name for field in data_fields(model)],
+            )
+
+    def upsert_questions(self, records):
+        questions = [self.build(RecentQuestion, record) for record in records]
+        self.upsert(RecentQuestion, questions)
+        # Exported counters only know about exported answers
+        repair_answer_counters(
+            RecentQuestion.objects.filter(pk__in=[q.pk for q in questions])
+        )
+
+    def upsert_answers(self, records):
+        self.resolve_users([record["fields"]["lawyer"][0] for record in records])
+        answers = [
+            self.build(
+                LawyerAnswer,
+                record,
+                lawyer_id=self.user_ids[record["fields"]["lawyer"][0]],
+            )
+            for record in records
+        ]
+        self.upsert(LawyerAnswer, answers)
+        repair_answer_counters(
+            RecentQuestion.objects.filter(
+                pk__in={answer.question_id for answer in answers}
+            )
+        )
+
+    def finish(self):
+        """Redo what the skipped signals and explicit ids left out"""
+        self.stdout.write("")
+        statements = connection.ops.sequence_reset_sql(
+            no_style(), [RecentQuestion, LawyerAnswer]
+        )
+        with connection.cursor() as cursor:
+            for sql in statements:
+                cursor.execute(sql)
+        get_search_backend().rebuild()
+        bump_version(QUESTIONS)
+        bump_version(ANSWERS)
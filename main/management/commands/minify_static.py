@@ -0,0 +1,98 @@
+import gzip
+from pathlib import Path
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.urls import reverse
+
+from main.middleware import PUBLIC_PAGE_URL_NAMES
+from main.minify import minify_css, minify_js
+from main.models import RecentQuestion
+
+# Source file -> minified bundle that base.html links, under main/static
+BUNDLES = {
+    "css/site.css": ("css/site.min.css", minify_css),
+    "js/site.js": ("js/site.min.js", minify_js),
+}
+
+
+def gzipped_size(data):
+    return len(gzip.compress(data, mtime=0))
+
+
+def report_urls():
+    """The pages the size reports render: the public pages and a question"""
+    urls = [reverse(name) for name in PUBLIC_PAGE_URL_NAMES]
+    urls.append(reverse("main:questions_list"))
+    question = RecentQuestion.objects.filter(is_active=True).first()
+    if question:
+        urls.append(question.get_absolute_url())
+    return urls
+
+
+class Command(BaseCommand):
+    help = (
+        "Minify the site-wide CSS/JS bundles that base.html links and report "
+        "their size and the HTML bytes every page saves by not inlining them"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Only verify the minified bundles are up to date",
+        )
+        parser.add_argument(
+            "--no-pages",
+            action="store_true",
+            help="Skip rendering the pages for the per-page report",
+        )
+
+    def handle(self, *args, **options):
+        root = Path(apps.get_app_config("main").path) / "static"
+        stale = []
+        sources = 0
+        for source, (target, minify) in BUNDLES.items():
+            text = (root / source).read_text(encoding="utf-8")
+            minified = minify(text)
+            sources += len(text.encode())
+            path = root / target
+            current = path.read_text(encoding="utf-8") if path.exists() else None
+            if current != minified:
+                stale.append(target)
+                if not options["check"]:
+                    path.write_text(minified, encoding="utf-8")
+            raw, small = text.encode(), minified.encode()
+            self.stdout.write(
+                f"{target:<20} {len(raw):>8} -> {len(small):>8} bytes "
+                f"(gzip {gzipped_size(raw):>6} -> {gzipped_size(small):>6})"
+            )
+        if options["check"]:
+            if stale:
+                raise CommandError(
+                    f"Out of date: {', '.join(stale)}; run manage.py minify_static"
+                )
+            return
+        if not options["no_pages"]:
+            self.report_pages(sources)
+
+    def report_pages(self, inlined):
+        """HTML size per page, and what inlining the bundles used to add"""
+        setup_test_environment()
+        try:
+            client = Client()
+            self.stdout.write("")
+            self.stdout.write(
+                f"{'page':<40} {'html':>8} {'gzip':>7} {'inline':>8} {'saved':>6}"
+            )
+            for url in report_urls():
+                content = client.get(url).content
+                before = len(content) + inlined
+                self.stdout.write(
+                    f"{url[:40]:<40} {len(content):>8} {gzipped_size(content):>7} "
+                    f"{before:>8} {inlined / before:>6.0%}"
+                )
+        finally:
+            teardown_test_environment()
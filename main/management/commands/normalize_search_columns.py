@@ -0,0 +1,73 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+
+from main.models import LawyerAnswer, RecentQuestion
+from main.normalization import normalize_text
+from main.search import get_search_backend
+
+
+class Command(BaseCommand):
+    help = "Backfill the normalized search columns of questions and answers"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of rows updated per query (default: 1000)",
+        )
+        parser.add_argument(
+            "--missing-only",
+            action="store_true",
+            help="Only fill rows whose normalized columns are still empty",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        updated = {}
+        for model in (RecentQuestion, LawyerAnswer):
+            queryset = model.objects.order_by("pk")
+            if options["missing_only"]:
+                missing = Q()
+                for source, target in model.NORMALIZED_FIELDS.items():
+                    missing |= Q(**{target: ""}) & ~Q(**{source: ""})
+                queryset = queryset.filter(missing)
+            updated[model] = self.backfill(model, queryset, batch_size)
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"Normalized {updated[model]} {model._meta.model_name} rows"
+                )
+            )
+
+        # Only questions are indexed, and a no-op --missing-only run must not
+        # pay for a full index rebuild
+        if updated[RecentQuestion] or not options["missing_only"]:
+            get_search_backend().rebuild()
+            self.stdout.write(self.style.SUCCESS("Rebuilt search index"))
+
+    def backfill(self, model, queryset, batch_size):
+        fields = model.NORMALIZED_FIELDS
+        columns = ["pk", *fields.keys()]
+        updated = 0
+        last_pk = 0
+        # Walk the table by primary key so each batch is an index range scan
+        while True:
+            rows = list(queryset.filter(pk__gt=last_pk).values(*columns)[:batch_size])
+            if not rows:
+                return updated
+            objects = [
+                model(
+                    pk=row["pk"],
+                    **{
+                        target: normalize_text(row[source])
+                        for source, target in fields.items()
+                    },
+                )
+                for row in rows
+            ]
+            with transaction.atomic():
+                model.objects.bulk_update(objects, list(fields.values()))
+            updated += len(objects)
+            last_pk = rows[-1]["pk"]
+            self.stdout.write(f"  {model._meta.model_name}: {updated} rows")
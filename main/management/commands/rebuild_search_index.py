@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from main.search import get_search_backend
+
+
+class Command(BaseCommand):
+    help = "Rebuild the full-text search index for recent questions"
+
+    def handle(self, *args, **options):
+        backend = get_search_backend()
+        backend.rebuild()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Rebuilt search index using {backend.__class__.__name__}"
+            )
+        )
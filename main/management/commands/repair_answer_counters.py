@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from main.counters import repair_answer_counters
+from main.models import RecentQuestion
+
+
+class Command(BaseCommand):
+    help = "Recompute answers_count, last_answered_at and is_answered of questions"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of questions recomputed per UPDATE (default: 1000)",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        repaired = 0
+        drifted = 0
+        last_pk = 0
+        while True:
+            # Fix the id range of the next batch, then repair it in one UPDATE
+            pks = list(
+                RecentQuestion.objects.filter(pk__gt=last_pk)
+                .order_by("pk")
+                .values_list("pk", flat=True)[:batch_size]
+            )
+            if not pks:
+                break
+            with transaction.atomic():
+                drifted += repair_answer_counters(
+                    RecentQuestion.objects.filter(pk__gte=pks[0], pk__lte=pks[-1])
+                )
+            repaired += len(pks)
+            last_pk = pks[-1]
+            self.stdout.write(f"  {repaired} questions checked, {drifted} repaired")
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Recomputed answer counters of {repaired} questions "
+                f"({drifted} had drifted)"
+            )
+        )
@@ -0,0 +1,55 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from main import metrics
+
+
+class Command(BaseCommand):
+    help = "Show request counters (page cache hits, etc.) reported by all workers"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--prefix", default="", help="Only show counters starting with this"
+        )
+        parser.add_argument(
+            "--per-worker", action="store_true", help="Break counters down by worker"
+        )
+        parser.add_argument("--json", action="store_true", help="Output JSON")
+        parser.add_argument(
+            "--reset", action="store_true", help="Clear all counters afterwards"
+        )
+
+    def handle(self, *args, **options):
+        prefix = options["prefix"]
+        totals, per_worker = metrics.collect()
+        totals = {k: v for k, v in sorted(totals.items()) if k.startswith(prefix)}
+
+        if options["json"]:
+            data = {"totals": totals}
+            if options["per_worker"]:
+                data["workers"] = per_worker
+            self.stdout.write(json.dumps(data, indent=2))
+        else:
+            for name, value in totals.items():
+                self.stdout.write(f"{name:40} {value}")
+            hits = totals.get("page_cache.hit", 0) + totals.get("page_cache.stale", 0)
+            lookups = (
+                hits
+                + totals.get("page_cache.miss", 0)
+                + totals.get("page_cache.refresh", 0)
+            )
+            if lookups:
+                self.stdout.write(
+                    self.style.SUCCESS(f"Page cache hit ratio: {hits / lookups:.1%}")
+                )
+            if options["per_worker"]:
+                for worker, counters in sorted(per_worker.items()):
+                    self.stdout.write(f"\n[{worker}]")
+                    for name, value in sorted(counters.items()):
+                        if name.startswith(prefix):
+                            self.stdout.write(f"  {name:38} {value}")
+
+        if options["reset"]:
+            metrics.reset()
+            self.stdout.write(self.style.WARNING("Counters reset"))
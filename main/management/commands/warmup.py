@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from main.warmup import warmup
+
+
+class Command(BaseCommand):
+    help = (
+        "Compile all templates, build the URL resolver and prime the content "
+        "caches, then report how long each step took"
+    )
+
+    def handle(self, *args, **options):
+        report = warmup()
+        counts = {}
+        for phase, value in report.items():
+            if phase.endswith("_count"):
+                counts[phase] = value
+            else:
+                self.stdout.write(f"{phase:<20} {value * 1000:8.1f} ms")
+        for phase, value in counts.items():
+            self.stdout.write(f"{phase:<20} {value:8}")
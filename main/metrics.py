@@ -0,0 +1,78 @@
+import os
+import socket
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import caches
+
+KEY_PREFIX = "main:metrics:"
+REGISTRY_KEY = KEY_PREFIX + "workers"
+
+_counters = Counter()
+_lock = threading.Lock()
+_last_flush = 0.0
+
+
+def _cache():
+    return caches[getattr(settings, "METRICS_CACHE_ALIAS", "default")]
+
+
+def _worker_id():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def incr(name, amount=1):
+    """Increment a process-local counter
+
+    Counters are published to the shared cache at most once every
+    ``METRICS_FLUSH_INTERVAL`` seconds, so recording a metric never costs a
+    cache round trip on the request path.
+    """
+    with _lock:
+        _counters[name] += amount
+    if time.monotonic() - _last_flush >= getattr(
+        settings, "METRICS_FLUSH_INTERVAL", 10
+    ):
+        flush()
+
+
+def local_counters():
+    with _lock:
+        return dict(_counters)
+
+
+def flush():
+    """Publish this process's counters to the shared cache"""
+    global _last_flush
+    _last_flush = time.monotonic()
+    cache = _cache()
+    worker = _worker_id()
+    cache.set(KEY_PREFIX + worker, local_counters(), timeout=24 * 3600)
+    workers = cache.get(REGISTRY_KEY) or {}
+    workers[worker] = time.time()
+    cache.set(REGISTRY_KEY, workers, timeout=None)
+
+
+def collect():
+    """Return ``(totals, per_worker)`` across all workers that reported"""
+    cache = _cache()
+    workers = cache.get(REGISTRY_KEY) or {}
+    found = cache.get_many([KEY_PREFIX + worker for worker in workers])
+    per_worker = {key[len(KEY_PREFIX) :]: counters for key, counters in found.items()}
+    totals = Counter()
+    for counters in per_worker.values():
+        totals.update(counters)
+    return dict(totals), per_worker
+
+
+def reset():
+    """Forget all published counters, e.g. before a measurement run"""
+    global _last_flush
+    cache = _cache()
+    workers = cache.get(REGISTRY_KEY) or {}
+    cache.delete_many([KEY_PREFIX + worker for worker in workers] + [REGISTRY_KEY])
+    with _lock:
+        _counters.clear()
+    _last_flush = 0.0
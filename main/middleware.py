@@ -0,0 +1,297 @@
+import hashlib
+import logging
+import random
+import time
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.utils.cache import patch_vary_headers
+
+from . import compression, metrics
+from .conditional import is_anonymous_read
+from .queries import get_budget, record_queries
+from .versions import (
+    ANSWERS,
+    CONSULTATION_TYPES,
+    FAQS,
+    QUESTIONS,
+    SERVICES,
+    get_versions,
+)
+
+# The home page and the consultation landing pages
+PUBLIC_PAGE_URL_NAMES = (
+    "main:home",
+    "main:24_hours_consultation",
+    "main:phone_consultation",
+    "main:in_person_consultation",
+    "main:quick_legal_advice",
+    "main:contact",
+    "main:retired_judge_consultation",
+)
+
+LANDING_PAGE_VERSIONS = (FAQS, CONSULTATION_TYPES)
+
+# The pages the page cache serves, with the versions each is rendered from.
+# The contact and retired judge pages render a CSRF token, so they could
+# never be stored.
+PAGE_CACHE_VERSIONS = {
+    "main:home": (FAQS, SERVICES, CONSULTATION_TYPES, QUESTIONS, ANSWERS),
+    "main:24_hours_consultation": LANDING_PAGE_VERSIONS,
+    "main:phone_consultation": LANDING_PAGE_VERSIONS,
+    "main:in_person_consultation": LANDING_PAGE_VERSIONS,
+    "main:quick_legal_advice": LANDING_PAGE_VERSIONS,
+}
+
+logger = logging.getLogger(__name__)
+
+# Response headers worth replaying from a cached entry
+STORED_HEADERS = ("Content-Type", "Content-Language", "X-Frame-Options")
+
+# The middleware here is sync-only on purpose. Under ASGI, an async chain
+# also runs Django's session, CSRF, auth and messages middleware in async
+# mode, each handing the request to a thread and back, where a sync chain
+# moves to a thread once. See "Gunicorn" in the README for the numbers.
+
+
+class AnonymousPageCacheMiddleware:
+    """Full-page cache for anonymous GET requests to the public pages
+
+    Entries are tagged with the content versions their page is rendered
+    from (``PAGE_CACHE_VERSIONS``) and a freshness deadline. Once either is out of date, the first worker
+    to take the regeneration lock re-renders the page while every other
+    request keeps receiving the stale copy (stale-while-revalidate).
+
+    Staff and other logged-in users, requests carrying flash messages and
+    non-GET requests always bypass the cache. Responses that set cookies or
+    use a CSRF token are never stored. Query parameters other than
+    ``PAGE_CACHE_QUERY_PARAMS`` are left out of the cache key, so tracking
+    tags and cache busters cannot fill the cache with copies of a page.
+    Pages are stored minified, together with their gzip and brotli variants,
+    so hits are not compressed again.
+    Every request is counted under ``page_cache.<hit|stale|miss|bypass>``
+    and labelled with ``X-Page-Cache``.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = getattr(settings, "PAGE_CACHE_ENABLED", not settings.DEBUG)
+        self.url_versions = getattr(settings, "PAGE_CACHE_VERSIONS", PAGE_CACHE_VERSIONS)
+        self.ttl = getattr(settings, "PAGE_CACHE_TTL", 300)
+        self.stale_ttl = getattr(settings, "PAGE_CACHE_STALE_TTL", 24 * 3600)
+        self.lock_timeout = getattr(settings, "PAGE_CACHE_LOCK_TIMEOUT", 30)
+        self.query_params = frozenset(getattr(settings, "PAGE_CACHE_QUERY_PARAMS", ()))
+        self.cache = caches[getattr(settings, "PAGE_CACHE_ALIAS", "default")]
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        state = getattr(request, "_page_cache_state", None)
+        if state is None:
+            return response
+        if state in ("miss", "refresh"):
+            if self.is_storable(request, response):
+                entry = self.store(
+                    request._page_cache_key, request._page_cache_versions, response
+                )
+                response = self.serve(request, response, entry)
+            if state == "refresh":
+                self.cache.delete(request._page_cache_key + ":lock")
+        metrics.incr(f"page_cache.{state}")
+        response["X-Page-Cache"] = state.upper()
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if not self.enabled:
+            return None
+        version_names = self.url_versions.get(request.resolver_match.view_name)
+        if version_names is None:
+            return None
+        if not self.is_cacheable_request(request):
+            request._page_cache_state = "bypass"
+            return None
+
+        key = self.cache_key(request)
+        found = get_versions(*version_names)
+        versions = tuple(found[name] for name in version_names)
+        request._page_cache_key = key
+        request._page_cache_versions = versions
+
+        entry = self.cache.get(key)
+        if entry is None:
+            request._page_cache_state = "miss"
+            return None
+        if entry["versions"] == versions and entry["expires"] > time.time():
+            request._page_cache_state = "hit"
+            return self.build_response(request, entry)
+        if self.cache.add(key + ":lock", 1, timeout=self.lock_timeout):
+            # This request regenerates the page for everybody else
+            request._page_cache_state = "refresh"
+            return None
+        request._page_cache_state = "stale"
+        return self.build_response(request, entry)
+
+    def is_cacheable_request(self, request):
+        return is_anonymous_read(request)
+
+    def is_storable(self, request, response):
+        return (
+            response.status_code == 200
+            and not response.streaming
+            and not response.cookies
+            and not request.META.get("CSRF_COOKIE_NEEDS_UPDATE")
+            and not response.has_header("Cache-Control")
+        )
+
+    def cache_key(self, request):
+        url = request.build_absolute_uri(request.path)
+        params = [
+            (name, value)
+            for name in sorted(self.query_params.intersection(request.GET))
+            for value in request.GET.getlist(name)
+        ]
+        if params:
+            url += "?" + urlencode(params)
+        return "main:page:" + hashlib.md5(url.encode()).hexdigest()
+
+    def store(self, key, versions, response):
+        content = compression.minified_content(response)
+        entry = {
+            "content": content,
+            "encoded": compression.encode_variants(content),
+            "status": response.status_code,
+            "headers": {
+                name: response[name]
+                for name in STORED_HEADERS
+                if response.has_header(name)
+            },
+            "versions": versions,
+            "expires": time.time() + self.ttl,
+        }
+        self.cache.set(key, entry, timeout=self.stale_ttl)
+        return entry
+
+    def build_response(self, request, entry):
+        response = HttpResponse(status=entry["status"])
+        for name, value in entry["headers"].items():
+            response[name] = value
+        return self.serve(request, response, entry)
+
+    def serve(self, request, response, entry):
+        """Fill ``response`` from the entry, compressed if the client accepts"""
+        compression.replace_content(response, entry["content"])
+        response._minified = True
+        return compression.serve_variant(request, response, entry.get("encoded"))
+
+
+class QueryBudgetMiddleware:
+    """Measure database work per request and report views over budget
+
+    A ``QUERY_BUDGET_SAMPLE_RATE`` share of requests (all of them under
+    DEBUG) runs with a query recorder attached. Budget violations from
+    ``main.queries`` are logged and counted as ``query_budget.<view name>``;
+    with ``QUERY_BUDGET_HEADERS`` the totals are also sent as ``X-DB-Queries``
+    and ``X-DB-Time`` response headers.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.sample_rate = getattr(
+            settings, "QUERY_BUDGET_SAMPLE_RATE", 1.0 if settings.DEBUG else 0.0
+        )
+        self.headers = getattr(settings, "QUERY_BUDGET_HEADERS", settings.DEBUG)
+
+    def __call__(self, request):
+        if not self.sample_rate or random.random() >= self.sample_rate:
+            return self.get_response(request)
+        with record_queries() as recorder:
+            response = self.get_response(request)
+
+        match = request.resolver_match
+        if match is not None:
+            problems = get_budget(match.view_name).violations(recorder)
+            if problems:
+                metrics.incr(f"query_budget.{match.view_name}")
+                logger.warning(
+                    "Query budget exceeded for %s (%s): %s",
+                    match.view_name,
+                    request.path,
+                    "; ".join(problems),
+                )
+        if self.headers:
+            response["X-DB-Queries"] = str(recorder.count)
+            response["X-DB-Time"] = f"{recorder.duration_ms:.1f}ms"
+        return response
+
+
+class ServerTimingMiddleware:
+    """Report the render time of cached template fragments
+
+    Every ``{% fragmentcache %}`` block rendered for the request is listed
+    in a ``Server-Timing`` header (shown by the browser's network panel),
+    together with whether it came from the cache. Enabled with
+    ``SERVER_TIMING_HEADER``, by default under DEBUG only.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = getattr(settings, "SERVER_TIMING_HEADER", settings.DEBUG)
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        timings = getattr(request, "fragment_timings", None)
+        if self.enabled and timings:
+            # Rendered lazily for TemplateResponse, so read after rendering
+            response["Server-Timing"] = ", ".join(
+                f'fragment-{name};desc="{state}";dur={ms:.2f}'
+                for name, state, ms in timings
+            )
+        return response
+
+
+class CompressionMiddleware:
+    """Minify HTML and compress responses for clients that accept it
+
+    HTML pages are whitespace-minified (``HTML_MINIFY``, by default when not
+    under DEBUG) and text responses of at least ``COMPRESSION_MIN_SIZE``
+    bytes are compressed with brotli or gzip, whichever the client prefers
+    (``RESPONSE_COMPRESSION``); streamed ones with gzip, as they are sent.
+    Responses from the page cache arrive already minified and compressed and
+    pass through untouched.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = compression.is_enabled()
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if response.has_header("Content-Encoding"):
+            return response
+        if response.streaming:
+            if (
+                self.enabled
+                and not response.is_async
+                and compression.is_text(response)
+                and compression.accepted_encoding(request, ("gzip",))
+            ):
+                compression.compress_stream(response)
+            return response
+        if not getattr(response, "_minified", False):
+            compression.replace_content(
+                response, compression.minified_content(response)
+            )
+        if self.enabled and compression.is_compressible(response):
+            patch_vary_headers(response, ("Accept-Encoding",))
+            encoding = compression.accepted_encoding(request)
+            if encoding:
+                started = time.perf_counter()
+                compressed = compression.compress(response.content, encoding)
+                metrics.incr(
+                    f"compression.{encoding}_us",
+                    int((time.perf_counter() - started) * 1e6),
+                )
+                if len(compressed) < len(response.content):
+                    compression.apply_encoding(response, encoding, compressed)
+        return response
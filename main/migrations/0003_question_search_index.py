@@ -0,0 +1,44 @@
+from django.db import migrations
+
+FTS_TABLE = "main_recentquestion_fts"
+GIN_INDEX = "main_recentquestion_search_gin"
+POSTGRES_DOCUMENT = (
+    "to_tsvector('simple', coalesce(question, '') || ' ' || coalesce(description, ''))"
+)
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        schema_editor.execute(
+            f"CREATE INDEX IF NOT EXISTS {GIN_INDEX} "
+            f"ON main_recentquestion USING GIN ({POSTGRES_DOCUMENT})"
+        )
+    elif vendor == "sqlite":
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+            f"question, description, tokenize = 'unicode61 remove_diacritics 2')"
+        )
+        schema_editor.execute(
+            f"INSERT INTO {FTS_TABLE} (rowid, question, description) "
+            f"SELECT id, question, description FROM main_recentquestion WHERE is_active"
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        schema_editor.execute(f"DROP INDEX IF EXISTS {GIN_INDEX}")
+    elif vendor == "sqlite":
+        schema_editor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("main", "0002_consultationtype_recentquestion_lawyeranswer"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:41
+
+from django.db import migrations, models
+
+FTS_TABLE = "main_recentquestion_fts"
+GIN_INDEX = "main_recentquestion_search_gin"
+OLD_DOCUMENT = (
+    "to_tsvector('simple', coalesce(question, '') || ' ' || coalesce(description, ''))"
+)
+NEW_DOCUMENT = (
+    "to_tsvector('simple', question_normalized || ' ' || description_normalized)"
+)
+
+
+def _recreate_search_index(schema_editor, document):
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        schema_editor.execute(f"DROP INDEX IF EXISTS {GIN_INDEX}")
+        schema_editor.execute(
+            f"CREATE INDEX {GIN_INDEX} ON main_recentquestion USING GIN ({document})"
+        )
+    elif vendor == "sqlite":
+        # Repopulated by 0008, once the columns are filled
+        schema_editor.execute(f"DELETE FROM {FTS_TABLE}")
+
+
+def index_normalized_columns(apps, schema_editor):
+    _recreate_search_index(schema_editor, NEW_DOCUMENT)
+
+
+def index_raw_columns(apps, schema_editor):
+    _recreate_search_index(schema_editor, OLD_DOCUMENT)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0003_question_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recentquestion',
+            name='description_normalized',
+            field=models.TextField(blank=True, editable=False, verbose_name='توضیحات (نرمال\u200cشده)'),
+        ),
+        migrations.AddField(
+            model_name='recentquestion',
+            name='question_normalized',
+            field=models.TextField(blank=True, editable=False, verbose_name='سوال (نرمال\u200cشده)'),
+        ),
+        migrations.RunPython(index_normalized_columns, index_raw_columns),
+    ]
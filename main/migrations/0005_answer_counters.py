@@ -0,0 +1,64 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:46
+
+from django.db import migrations, models
+from django.db.models import Count, Exists, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def compute_answer_counters(apps, schema_editor):
+    RecentQuestion = apps.get_model("main", "RecentQuestion")
+    LawyerAnswer = apps.get_model("main", "LawyerAnswer")
+    active_answers = LawyerAnswer.objects.filter(
+        question=OuterRef("pk"), is_active=True
+    )
+    RecentQuestion.objects.update(
+        answers_count=Coalesce(
+            Subquery(
+                active_answers.order_by()
+                .values("question")
+                .annotate(count=Count("pk"))
+                .values("count"),
+                output_field=IntegerField(),
+            ),
+            Value(0),
+        ),
+        last_answered_at=Subquery(
+            active_answers.order_by("-created_at").values("created_at")[:1]
+        ),
+        is_answered=Exists(active_answers),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("main", "0004_normalized_search_columns"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="recentquestion",
+            name="answers_count",
+            field=models.PositiveIntegerField(
+                default=0, editable=False, verbose_name="تعداد پاسخ\u200cها"
+            ),
+        ),
+        migrations.AddField(
+            model_name="recentquestion",
+            name="last_answered_at",
+            field=models.DateTimeField(
+                blank=True, editable=False, null=True, verbose_name="تاریخ آخرین پاسخ"
+            ),
+        ),
+        migrations.AlterField(
+            model_name="recentquestion",
+            name="is_answered",
+            field=models.BooleanField(
+                default=False,
+                editable=False,
+                help_text="بر اساس تعداد پاسخ\u200cهای فعال به\u200cطور خودکار تعیین می\u200cشود",
+                verbose_name="پاسخ داده شده",
+            ),
+        ),
+        migrations.RunPython(compute_answer_counters, migrations.RunPython.noop),
+    ]
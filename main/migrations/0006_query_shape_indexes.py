@@ -0,0 +1,99 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:50
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("main", "0005_answer_counters"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="consultationrequest",
+            index=models.Index(
+                fields=["-created_at", "-id"], name="request_created_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="consultationrequest",
+            index=models.Index(
+                fields=["status", "-created_at"], name="request_status_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="consultationtype",
+            index=models.Index(
+                condition=models.Q(("is_active", True)),
+                fields=["order", "created_at"],
+                name="constype_active_order_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="faq",
+            index=models.Index(
+                condition=models.Q(("is_active", True)),
+                fields=["order", "created_at"],
+                name="faq_active_order_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="lawyeranswer",
+            index=models.Index(
+                condition=models.Q(("is_active", True)),
+                fields=["order", "-created_at"],
+                name="answer_active_order_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="lawyeranswer",
+            index=models.Index(
+                condition=models.Q(("is_active", True)),
+                fields=["question", "order", "-created_at"],
+                name="answer_active_question_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="recentquestion",
+            index=models.Index(
+                condition=models.Q(("is_active", True)),
+                fields=["order", "-created_at"],
+                name="question_active_order_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="recentquestion",
+            index=models.Index(
+                condition=models.Q(("is_active", True)),
+                fields=["-created_at", "-id"],
+                name="question_active_recent_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="recentquestion",
+            index=models.Index(
+                condition=models.Q(("is_active", True)),
+                fields=["category", "-created_at", "-id"],
+                name="question_active_cat_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="recentquestion",
+            index=models.Index(
+                condition=models.Q(("is_active", True)),
+                fields=["is_answered", "-created_at", "-id"],
+                name="question_active_answered_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="service",
+            index=models.Index(
+                condition=models.Q(("is_active", True)),
+                fields=["order", "created_at"],
+                name="service_active_order_idx",
+            ),
+        ),
+    ]
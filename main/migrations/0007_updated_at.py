@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:27
+
+from django.db import migrations, models
+from django.db.models import F
+from django.db.models.functions import Coalesce
+
+
+def date_existing_rows(apps, schema_editor):
+    # The column was filled with the migration time; the last visible
+    # change is a better guess
+    RecentQuestion = apps.get_model("main", "RecentQuestion")
+    LawyerAnswer = apps.get_model("main", "LawyerAnswer")
+    RecentQuestion.objects.update(
+        updated_at=Coalesce(F("last_answered_at"), F("created_at"))
+    )
+    LawyerAnswer.objects.update(updated_at=F("created_at"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("main", "0006_query_shape_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="lawyeranswer",
+            name="updated_at",
+            field=models.DateTimeField(
+                auto_now=True, verbose_name="تاریخ به\u200cروزرسانی"
+            ),
+        ),
+        migrations.AddField(
+            model_name="recentquestion",
+            name="updated_at",
+            field=models.DateTimeField(
+                auto_now=True, verbose_name="تاریخ به\u200cروزرسانی"
+            ),
+        ),
+        migrations.RunPython(date_existing_rows, migrations.RunPython.noop),
+    ]
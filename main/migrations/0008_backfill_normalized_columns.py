@@ -0,0 +1,57 @@
+from django.db import migrations
+from django.db.models import Q
+
+from main.normalization import normalize_text
+
+FTS_TABLE = "main_recentquestion_fts"
+BATCH_SIZE = 1000
+
+
+def backfill_normalized_columns(apps, schema_editor):
+    # 0004 added the columns empty; questions saved since are filled already
+    RecentQuestion = apps.get_model("main", "RecentQuestion")
+    missing = RecentQuestion.objects.filter(
+        Q(question_normalized="") & ~Q(question="")
+        | Q(description_normalized="") & ~Q(description="")
+    ).order_by("pk")
+    last_pk = 0
+    while True:
+        rows = list(
+            missing.filter(pk__gt=last_pk).values("pk", "question", "description")[
+                :BATCH_SIZE
+            ]
+        )
+        if not rows:
+            break
+        RecentQuestion.objects.bulk_update(
+            [
+                RecentQuestion(
+                    pk=row["pk"],
+                    question_normalized=normalize_text(row["question"]),
+                    description_normalized=normalize_text(row["description"]),
+                )
+                for row in rows
+            ],
+            ["question_normalized", "description_normalized"],
+        )
+        last_pk = rows[-1]["pk"]
+
+    # 0004 emptied the FTS table; the PostgreSQL index follows the columns
+    if schema_editor.connection.vendor == "sqlite":
+        schema_editor.execute(f"DELETE FROM {FTS_TABLE}")
+        schema_editor.execute(
+            f"INSERT INTO {FTS_TABLE} (rowid, question, description) "
+            f"SELECT id, question_normalized, description_normalized "
+            f"FROM main_recentquestion WHERE is_active"
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("main", "0007_updated_at"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_normalized_columns, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,56 @@
+from django.db import migrations, models
+
+from main.normalization import normalize_text
+
+BATCH_SIZE = 1000
+
+
+def backfill_answer_columns(apps, schema_editor):
+    LawyerAnswer = apps.get_model("main", "LawyerAnswer")
+    answers = LawyerAnswer.objects.order_by("pk")
+    last_pk = 0
+    while True:
+        rows = list(
+            answers.filter(pk__gt=last_pk).values("pk", "answer", "short_answer")[
+                :BATCH_SIZE
+            ]
+        )
+        if not rows:
+            break
+        LawyerAnswer.objects.bulk_update(
+            [
+                LawyerAnswer(
+                    pk=row["pk"],
+                    answer_normalized=normalize_text(row["answer"]),
+                    short_answer_normalized=normalize_text(row["short_answer"]),
+                )
+                for row in rows
+            ],
+            ["answer_normalized", "short_answer_normalized"],
+        )
+        last_pk = rows[-1]["pk"]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("main", "0008_backfill_normalized_columns"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="lawyeranswer",
+            name="answer_normalized",
+            field=models.TextField(
+                blank=True, editable=False, verbose_name="پاسخ (نرمال‌شده)"
+            ),
+        ),
+        migrations.AddField(
+            model_name="lawyeranswer",
+            name="short_answer_normalized",
+            field=models.TextField(
+                blank=True, editable=False, verbose_name="خلاصه پاسخ (نرمال‌شده)"
+            ),
+        ),
+        migrations.RunPython(backfill_answer_columns, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,187 @@
+import re
+
+# Strings are copied verbatim, comments dropped unless marked /*! ... */
+CSS_TOKENS = re.compile(r"""("(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*')|(/\*.*?\*/)""", re.S)
+# Whitespace around these never matters in CSS; before a ":" it can, as in
+# "a :hover", so only the space after one goes
+CSS_PUNCTUATION = re.compile(r"\s*([{};,>])\s*|:\s+")
+
+# Elements and attribute values whose whitespace may matter, and comments
+HTML_KEPT = re.compile(
+    r"""<(pre|textarea|script|style)\b.*?</\1\s*>|<!--.*?-->|="[^"]*"|='[^']*'""",
+    re.S | re.I,
+)
+HTML_NEWLINES = re.compile(r"\n\s*")
+HTML_SPACES = re.compile(r"[ \t]{2,}")
+
+# After these characters a "/" starts a regular expression, not a division
+REGEX_PRECEDERS = set("(,=:[!&|?{};+-*%<>~^") | {""}
+
+
+def minify_css(text):
+    """Drop comments and redundant whitespace from a stylesheet"""
+    out = []
+    code = []
+    position = 0
+    for match in CSS_TOKENS.finditer(text):
+        code.append(text[position : match.start()])
+        string, comment = match.groups()
+        if string:
+            out.append(_squeeze_css("".join(code)))
+            out.append(string)
+            code = []
+        elif comment.startswith("/*!"):
+            out.append(_squeeze_css("".join(code)))
+            out.append(comment)
+            code = []
+        else:
+            code.append(" ")
+        position = match.end()
+    code.append(text[position:])
+    out.append(_squeeze_css("".join(code)))
+    return "".join(out).strip() + "\n"
+
+
+def _squeeze_css(code):
+    code = re.sub(r"\s+", " ", code)
+    code = CSS_PUNCTUATION.sub(lambda match: match.group(1) or ":", code)
+    return code.replace(";}", "}")
+
+
+def minify_html(text):
+    """Collapse the whitespace of an HTML page
+
+    A run of whitespace becomes a single line break if it contained one,
+    and a single space otherwise, which renders the same. <pre>, <textarea>,
+    <script> and <style> elements, conditional comments and attribute values
+    other than ``class`` are copied verbatim; other comments are dropped.
+    """
+    out = []
+    code = []
+    position = 0
+    for match in HTML_KEPT.finditer(text):
+        kept = match[0]
+        if kept[0] == "=":
+            # Values without a run of whitespace come out the same anyway
+            if "\n" not in kept and "  " not in kept:
+                continue
+            if text[match.start() - 5 : match.start()] == "class":
+                continue
+        code.append(text[position : match.start()])
+        position = match.end()
+        if kept.startswith("<!--") and not kept.startswith("<!--[if"):
+            # The whitespace around a dropped comment is squeezed as one run
+            continue
+        out.append(_squeeze_html("".join(code)))
+        out.append(kept)
+        code = []
+    code.append(text[position:])
+    out.append(_squeeze_html("".join(code)))
+    return "".join(out).strip() + "\n"
+
+
+def _squeeze_html(code):
+    return HTML_SPACES.sub(" ", HTML_NEWLINES.sub("\n", code))
+
+
+def minify_js(text):
+    """Drop comments, indentation and blank lines from a script
+
+    Deliberately conservative: line breaks are kept so automatic semicolon
+    insertion behaves as before, and strings, template literals and regular
+    expressions are copied verbatim.
+    """
+    out = []
+    line = []
+    i = 0
+    length = len(text)
+    braces = []  # per open template literal: depth of ${ } nesting
+    last = ""  # last significant character written
+
+    def end_line():
+        content = "".join(line).strip()
+        if content:
+            out.append(content)
+        line.clear()
+
+    while i < length:
+        char = text[i]
+        pair = text[i : i + 2]
+        if braces and braces[-1] == 0 and char != "`" and pair != "${":
+            # Inside a template literal: copy as is, line breaks included
+            line.append(char)
+            if char == "\\":
+                line.append(text[i + 1 : i + 2])
+                i += 1
+            i += 1
+            continue
+        if pair == "//":
+            while i < length and text[i] != "\n":
+                i += 1
+            continue
+        if pair == "/*":
+            end = text.find("*/", i + 2)
+            i = length if end == -1 else end + 2
+            line.append(" ")
+            continue
+        if char == "\n":
+            if braces:
+                # A line break inside ${ } of a template literal
+                line.append(char)
+            else:
+                end_line()
+            i += 1
+            continue
+        if char in "\"'":
+            end = i + 1
+            while end < length and text[end] != char:
+                end += 2 if text[end] == "\\" else 1
+            line.append(text[i : end + 1])
+            i = end + 1
+            last = char
+            continue
+        if char == "`":
+            if braces and braces[-1] == 0:
+                braces.pop()
+            else:
+                braces.append(0)
+            line.append(char)
+            i += 1
+            last = char
+            continue
+        if pair == "${" and braces and braces[-1] == 0:
+            braces[-1] = 1
+            line.append(pair)
+            i += 2
+            continue
+        if braces and braces[-1] > 0:
+            if char == "{":
+                braces[-1] += 1
+            elif char == "}":
+                braces[-1] -= 1
+        if char == "/" and last in REGEX_PRECEDERS:
+            end = i + 1
+            in_class = False
+            while end < length and (text[end] != "/" or in_class):
+                if text[end] == "\\":
+                    end += 1
+                elif text[end] == "[":
+                    in_class = True
+                elif text[end] == "]":
+                    in_class = False
+                end += 1
+            line.append(text[i : end + 1])
+            i = end + 1
+            last = "/"
+            continue
+        if char in " \t":
+            # One space between tokens, none at the start of a line
+            if line and line[-1] not in " \t":
+                line.append(" ")
+            i += 1
+            continue
+        line.append(char)
+        last = char
+        i += 1
+    end_line()
+    return "\n".join(out) + "\n"
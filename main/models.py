@@ -1,8 +1,13 @@
+from contextlib import contextmanager
+
 from django.contrib.auth.models import User
 from django.db import models
+from django.db.models import Q
 from django.urls import reverse
 from django.utils import timezone
 
+from .normalization import normalize_text
+
 
 class FAQ(models.Model):
     question = models.TextField(verbose_name="سوال")
@@ -16,6 +21,13 @@ class FAQ(models.Model):
         verbose_name = "سوال متداول"
         verbose_name_plural = "سوالات متداول"
         ordering = ["order", "created_at"]
+        indexes = [
+            models.Index(
+                fields=["order", "created_at"],
+                condition=Q(is_active=True),
+                name="faq_active_order_idx",
+            ),
+        ]
 
     def __str__(self):
         question_str = str(self.question)
@@ -57,6 +69,10 @@ class ConsultationRequest(models.Model):
         verbose_name = "درخواست مشاوره"
         verbose_name_plural = "درخواست‌های مشاوره"
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["-created_at", "-id"], name="request_created_idx"),
+            models.Index(fields=["status", "-created_at"], name="request_status_idx"),
+        ]
 
     def __str__(self):
         return f"{self.name} - {self.consultation_type}"
@@ -123,6 +139,13 @@ class Service(models.Model):
         verbose_name = "خدمت"
         verbose_name_plural = "خدمات"
         ordering = ["order", "created_at"]
+        indexes = [
+            models.Index(
+                fields=["order", "created_at"],
+                condition=Q(is_active=True),
+                name="service_active_order_idx",
+            ),
+        ]
 
     def __str__(self):
         return str(self.title)
@@ -158,6 +181,13 @@ class ConsultationType(models.Model):
         verbose_name = "نوع مشاوره"
         verbose_name_plural = "انواع مشاوره"
         ordering = ["order", "created_at"]
+        indexes = [
+            models.Index(
+                fields=["order", "created_at"],
+                condition=Q(is_active=True),
+                name="constype_active_order_idx",
+            ),
+        ]
 
     def __str__(self):
         return str(self.title)
@@ -190,20 +220,87 @@ class RecentQuestion(models.Model):
     questioner_name = models.CharField(
         max_length=100, verbose_name="نام پرسشگر", blank=True
     )
-    is_answered = models.BooleanField(default=False, verbose_name="پاسخ داده شده")
+    is_answered = models.BooleanField(
+        default=False,
+        editable=False,
+        verbose_name="پاسخ داده شده",
+        help_text="بر اساس تعداد پاسخ‌های فعال به‌طور خودکار تعیین می‌شود",
+    )
+    answers_count = models.PositiveIntegerField(
+        default=0, editable=False, verbose_name="تعداد پاسخ‌ها"
+    )
+    last_answered_at = models.DateTimeField(
+        null=True, blank=True, editable=False, verbose_name="تاریخ آخرین پاسخ"
+    )
     order = models.PositiveIntegerField(default=0, verbose_name="ترتیب نمایش")
     is_active = models.BooleanField(default=True, verbose_name="فعال")
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="تاریخ ایجاد")
+    # Also moved by the answer counters, so it dates what the question page shows
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="تاریخ به‌روزرسانی")
+    question_normalized = models.TextField(
+        blank=True, editable=False, verbose_name="سوال (نرمال‌شده)"
+    )
+    description_normalized = models.TextField(
+        blank=True, editable=False, verbose_name="توضیحات (نرمال‌شده)"
+    )
+
+    NORMALIZED_FIELDS = {
+        "question": "question_normalized",
+        "description": "description_normalized",
+    }
+
+    # Maintained by LawyerAnswer signals with UPDATE ... SET col = col + 1
+    COUNTER_FIELDS = ("is_answered", "answers_count", "last_answered_at")
 
     class Meta:
         verbose_name = "سوال اخیر"
         verbose_name_plural = "سوالات اخیر"
         ordering = ["order", "-created_at"]
+        # Partial indexes over active rows, one per list/home query shape.
+        # The (created_at, id) pairs double as keyset pagination keys.
+        indexes = [
+            models.Index(
+                fields=["order", "-created_at"],
+                condition=Q(is_active=True),
+                name="question_active_order_idx",
+            ),
+            models.Index(
+                fields=["-created_at", "-id"],
+                condition=Q(is_active=True),
+                name="question_active_recent_idx",
+            ),
+            models.Index(
+                fields=["category", "-created_at", "-id"],
+                condition=Q(is_active=True),
+                name="question_active_cat_idx",
+            ),
+            models.Index(
+                fields=["is_answered", "-created_at", "-id"],
+                condition=Q(is_active=True),
+                name="question_active_answered_idx",
+            ),
+        ]
 
     def __str__(self):
         question_str = str(self.question)
         return question_str[:50] + "..." if len(question_str) > 50 else question_str
 
+    def save(self, *args, **kwargs):
+        if (
+            not self._state.adding
+            and kwargs.get("update_fields") is None
+            and not kwargs.get("force_insert")
+        ):
+            # Never write back counters that may have moved since this
+            # instance was loaded
+            kwargs["update_fields"] = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.COUNTER_FIELDS
+            ]
+        normalize_fields(self, kwargs)
+        super().save(*args, **kwargs)
+
     def get_absolute_url(self):
         """Return URL for the question detail page"""
         return reverse("main:question_detail", args=[self.id])
@@ -233,11 +330,82 @@ class LawyerAnswer(models.Model):
     order = models.PositiveIntegerField(default=0, verbose_name="ترتیب نمایش")
     is_active = models.BooleanField(default=True, verbose_name="فعال")
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="تاریخ ایجاد")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="تاریخ به‌روزرسانی")
+    answer_normalized = models.TextField(
+        blank=True, editable=False, verbose_name="پاسخ (نرمال‌شده)"
+    )
+    short_answer_normalized = models.TextField(
+        blank=True, editable=False, verbose_name="خلاصه پاسخ (نرمال‌شده)"
+    )
+
+    NORMALIZED_FIELDS = {
+        "answer": "answer_normalized",
+        "short_answer": "short_answer_normalized",
+    }
 
     class Meta:
         verbose_name = "پاسخ وکیل"
         verbose_name_plural = "پاسخ‌های وکلا"
         ordering = ["order", "-created_at"]
+        indexes = [
+            models.Index(
+                fields=["order", "-created_at"],
+                condition=Q(is_active=True),
+                name="answer_active_order_idx",
+            ),
+            models.Index(
+                fields=["question", "order", "-created_at"],
+                condition=Q(is_active=True),
+                name="answer_active_question_idx",
+            ),
+        ]
 
     def __str__(self):
         return f"پاسخ به: {self.question.question[:30]}..."
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember what the answer counted towards when it was loaded
+        instance._loaded_counter_state = (
+            instance.__dict__.get("question_id"),
+            instance.__dict__.get("is_active"),
+        )
+        return instance
+
+    def save(self, *args, **kwargs):
+        normalize_fields(self, kwargs)
+        super().save(*args, **kwargs)
+
+
+def normalize_fields(instance, save_kwargs):
+    """Refresh the normalized shadow columns declared in NORMALIZED_FIELDS"""
+    update_fields = save_kwargs.get("update_fields")
+    if update_fields is not None:
+        update_fields = set(update_fields)
+    for source, target in getattr(instance, "NORMALIZED_FIELDS", {}).items():
+        if update_fields is not None:
+            if source not in update_fields:
+                continue
+            update_fields.add(target)
+        setattr(instance, target, normalize_text(getattr(instance, source)))
+    if update_fields is not None:
+        save_kwargs["update_fields"] = update_fields
+
+
+@contextmanager
+def explicit_timestamps(*models):
+    """Keep the given dates of auto_now/auto_now_add fields in bulk inserts"""
+    fields = [
+        (field, field.auto_now, field.auto_now_add)
+        for model in models
+        for field in model._meta.concrete_fields
+        if getattr(field, "auto_now", False) or getattr(field, "auto_now_add", False)
+    ]
+    for field, _, _ in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in fields:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
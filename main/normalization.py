@@ -0,0 +1,57 @@
+import re
+import unicodedata
+
+# Arabic code points that have a Persian counterpart, plus hamza carriers
+# folded to their base letter so "مسئله" and "مسیله" compare equal.
+CHARACTER_MAP = {
+    "ي": "ی",
+    "ى": "ی",
+    "ئ": "ی",
+    "ك": "ک",
+    "ة": "ه",
+    "ۀ": "ه",
+    "أ": "ا",
+    "إ": "ا",
+    "آ": "ا",
+    "ٱ": "ا",
+    "ؤ": "و",
+}
+
+DIGIT_MAP = {
+    **{chr(0x06F0 + i): str(i) for i in range(10)},  # Persian
+    **{chr(0x0660 + i): str(i) for i in range(10)},  # Arabic-Indic
+}
+
+# Zero-width non-joiner and friends behave like a word break for search
+ZERO_WIDTH_CHARS = "\u200c\u200d\u200e\u200f\u200b\ufeff"
+
+TRANSLATION_TABLE = str.maketrans(
+    {
+        **CHARACTER_MAP,
+        **DIGIT_MAP,
+        **{char: " " for char in ZERO_WIDTH_CHARS},
+        "\u0640": None,  # tatweel
+    }
+)
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def _is_diacritic(char):
+    return unicodedata.category(char) == "Mn"
+
+
+def normalize_text(text):
+    """Fold Persian/Arabic text into a canonical form for searching
+
+    Unifies Arabic and Persian letter variants, converts all digits to
+    Latin, strips diacritics, treats ZWNJ as a space and collapses
+    whitespace. Latin text is lowercased.
+    """
+    if not text:
+        return ""
+    # NFKC turns Arabic presentation forms into their base letters
+    text = unicodedata.normalize("NFKC", str(text))
+    text = text.translate(TRANSLATION_TABLE)
+    text = "".join(char for char in text if not _is_diacritic(char))
+    return _WHITESPACE_RE.sub(" ", text).strip().lower()
@@ -0,0 +1,212 @@
+import base64
+import json
+from datetime import datetime
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.paginator import EmptyPage, InvalidPage, PageNotAnInteger, Paginator
+from django.db.models import Q
+from django.http import Http404
+
+
+class CountedPaginator(Paginator):
+    """Paginator that takes the object count instead of running COUNT(*)"""
+
+    def __init__(self, object_list, per_page, count, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self._count = count
+
+    @property
+    def count(self):
+        if self._count is None:
+            self._count = super().count
+        return self._count
+
+    @count.setter
+    def count(self, value):
+        self._count = value
+
+
+class KeysetPage:
+    """One page of a keyset paginated queryset
+
+    Offers the parts of ``django.core.paginator.Page`` the templates use,
+    plus opaque ``next_cursor``/``previous_cursor`` tokens.
+    """
+
+    def __init__(self, object_list, number, paginator, has_next, has_previous):
+        self.object_list = object_list
+        self.number = number
+        self.paginator = paginator
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def __repr__(self):
+        return f"<Keyset page {self.number}>"
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self._has_next or self._has_previous
+
+    def next_page_number(self):
+        return self.number + 1
+
+    def previous_page_number(self):
+        return self.number - 1
+
+    @property
+    def next_cursor(self):
+        if not self._has_next or not self.object_list:
+            return None
+        return self.paginator.encode_cursor(
+            self.object_list[-1], "next", self.number + 1
+        )
+
+    @property
+    def previous_cursor(self):
+        if not self._has_previous or not self.object_list:
+            return None
+        return self.paginator.encode_cursor(
+            self.object_list[0], "previous", self.number - 1
+        )
+
+
+class KeysetPaginator(CountedPaginator):
+    """Cursor pagination on a unique ordering such as ``(-created_at, -id)``
+
+    The first ``numbered_pages`` pages can still be addressed by number
+    (``OFFSET`` stays small there); anything beyond is reached through
+    cursors that encode the sort key of the last row seen, so every page
+    costs one index range scan no matter how deep it is.
+    """
+
+    def __init__(self, object_list, per_page, ordering, count=None, numbered_pages=5):
+        super().__init__(object_list.order_by(*ordering), per_page, count=count)
+        self.ordering = ordering
+        self.numbered_pages = numbered_pages
+        self.fields = [name.lstrip("-") for name in ordering]
+
+    @property
+    def page_range(self):
+        return range(1, min(self.num_pages, self.numbered_pages) + 1)
+
+    def numbered_page(self, number):
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger("That page number is not an integer")
+        if number < 1:
+            raise EmptyPage("That page number is less than 1")
+        if number > self.numbered_pages:
+            raise InvalidPage("Deep pages are only reachable through a cursor")
+        offset = (number - 1) * self.per_page
+        # One extra row tells whether a next page exists without a COUNT
+        rows = list(self.object_list[offset : offset + self.per_page + 1])
+        if not rows and number > 1:
+            raise EmptyPage("That page contains no results")
+        return KeysetPage(
+            rows[: self.per_page],
+            number,
+            self,
+            has_next=len(rows) > self.per_page,
+            has_previous=number > 1,
+        )
+
+    def cursor_page(self, cursor):
+        values, direction, number = self.decode_cursor(cursor)
+        backwards = direction == "previous"
+        queryset = self.object_list.filter(self._after(values, backwards))
+        if backwards:
+            queryset = queryset.reverse()
+        rows = list(queryset[: self.per_page + 1])
+        if not rows:
+            # Past the end, or every row beyond the cursor has since gone
+            raise EmptyPage("That page contains no results")
+        has_more = len(rows) > self.per_page
+        rows = rows[: self.per_page]
+        if backwards:
+            rows.reverse()
+            return KeysetPage(rows, number, self, has_next=True, has_previous=has_more)
+        return KeysetPage(rows, number, self, has_next=has_more, has_previous=True)
+
+    def _after(self, values, backwards):
+        """Build ``(a, b) > (x, y)`` as ``a > x OR (a = x AND b > y)``"""
+        condition = Q()
+        equal = Q()
+        for name, field, value in zip(self.ordering, self.fields, values):
+            descending = name.startswith("-") != backwards
+            lookup = "lt" if descending else "gt"
+            condition |= equal & Q(**{f"{field}__{lookup}": value})
+            equal &= Q(**{field: value})
+        return condition
+
+    def encode_cursor(self, obj, direction, number):
+        values = []
+        for field in self.fields:
+            value = getattr(obj, field)
+            if isinstance(value, datetime):
+                value = value.isoformat()
+            values.append(value)
+        payload = json.dumps([values, direction, number], separators=(",", ":"))
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+    def decode_cursor(self, cursor):
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            values, direction, number = json.loads(base64.urlsafe_b64decode(padded))
+            model = self.object_list.model
+            values = [
+                model._meta.get_field(field).to_python(value)
+                for field, value in zip(self.fields, values, strict=True)
+            ]
+        except (ValueError, TypeError, LookupError, ValidationError):
+            raise InvalidPage("Invalid cursor")
+        if direction not in ("next", "previous") or not isinstance(number, int):
+            raise InvalidPage("Invalid cursor")
+        return values, direction, number
+
+
+class KeysetPaginationMixin:
+    """ListView mixin switching pagination to :class:`KeysetPaginator`"""
+
+    cursor_kwarg = "cursor"
+    keyset_ordering = ("-created_at", "-id")
+
+    def get_keyset_ordering(self):
+        return self.keyset_ordering
+
+    def get_pagination_count(self):
+        """Total number of objects, or None to let the paginator count them"""
+        return None
+
+    def paginate_queryset(self, queryset, page_size):
+        paginator = KeysetPaginator(
+            queryset,
+            page_size,
+            self.get_keyset_ordering(),
+            count=self.get_pagination_count(),
+            numbered_pages=getattr(settings, "PAGINATION_NUMBERED_PAGES", 5),
+        )
+        cursor = self.request.GET.get(self.cursor_kwarg)
+        try:
+            if cursor:
+                page = paginator.cursor_page(cursor)
+            else:
+                page = paginator.numbered_page(self.request.GET.get(self.page_kwarg, 1))
+        except InvalidPage as e:
+            raise Http404(str(e))
+        return paginator, page, page.object_list, page.has_other_pages()
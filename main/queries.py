@@ -0,0 +1,137 @@
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+# Default per-view budgets, measured with cold caches. Override or extend
+# them with the QUERY_BUDGETS setting; a bare int is a query-count limit.
+QUERY_BUDGETS = {
+    "main:home": {"queries": 6},
+    "main:questions_list": {"queries": 2},
+    "main:question_detail": {"queries": 2},
+    "main:search_questions": {"queries": 2},
+    "main:24_hours_consultation": {"queries": 4},
+    "main:phone_consultation": {"queries": 4},
+    "main:in_person_consultation": {"queries": 4},
+    "main:quick_legal_advice": {"queries": 4},
+    "main:retired_judge_consultation": {"queries": 4},
+    "main:contact": {"queries": 4},
+}
+
+_WHITESPACE = re.compile(r"\s+")
+_IN_LIST = re.compile(r"IN \((?:%s, )*%s\)")
+_LITERAL = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+
+
+def fingerprint(sql):
+    """Reduce ``sql`` to its shape so an N+1 shows up as one repeated entry"""
+    sql = _WHITESPACE.sub(" ", sql.strip())
+    sql = _LITERAL.sub("?", sql)
+    return _IN_LIST.sub("IN (...)", sql)
+
+
+class QueryRecorder:
+    """``execute_wrapper`` counting queries, DB time and repeated SQL shapes"""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.fingerprints = Counter()
+        # Async views run queries on several threads at once
+        self._lock = threading.Lock()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - start
+            with self._lock:
+                self.duration += duration
+                self.count += 1
+                self.fingerprints[fingerprint(sql)] += 1
+
+    @property
+    def duration_ms(self):
+        return self.duration * 1000
+
+    def repeated(self, threshold=1):
+        """SQL shapes executed more than ``threshold`` times, most frequent first"""
+        return [(sql, n) for sql, n in self.fingerprints.most_common() if n > threshold]
+
+
+# Recorders of the current context. Context variables are copied into the
+# threads sync_to_async runs code in, so an async request's recorder also
+# sees the queries its views run there, on those threads' connections.
+_recorders = ContextVar("query_recorders", default=())
+
+
+def _record(execute, sql, params, many, context):
+    for recorder in _recorders.get():
+        execute = _bind(recorder, execute)
+    return execute(sql, params, many, context)
+
+
+def _bind(recorder, execute):
+    return lambda *args: recorder(execute, *args)
+
+
+def _install(connection, **kwargs):
+    if _record not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record)
+
+
+connection_created.connect(_install)
+
+
+@contextmanager
+def record_queries():
+    """Record every query run inside the block, on any database connection"""
+    recorder = QueryRecorder()
+    # Connections opened before this module was imported
+    for connection in connections.all(initialized_only=True):
+        _install(connection)
+    token = _recorders.set(_recorders.get() + (recorder,))
+    try:
+        yield recorder
+    finally:
+        _recorders.reset(token)
+
+
+@dataclass(frozen=True)
+class QueryBudget:
+    queries: int | None = None
+    time_ms: float | None = None
+    # How often one SQL shape may run before it counts as an N+1
+    repeats: int = 2
+
+    def violations(self, recorder, check_time=True):
+        """Describe every way ``recorder`` exceeded this budget"""
+        problems = []
+        if self.queries is not None and recorder.count > self.queries:
+            problems.append(f"{recorder.count} queries > {self.queries}")
+        if (
+            check_time
+            and self.time_ms is not None
+            and recorder.duration_ms > self.time_ms
+        ):
+            problems.append(f"{recorder.duration_ms:.1f}ms DB time > {self.time_ms}ms")
+        for sql, n in recorder.repeated(self.repeats):
+            problems.append(f"{n}x {sql}")
+        return problems
+
+
+def get_budget(view_name):
+    """Return the :class:`QueryBudget` declared for ``view_name``"""
+    budgets = {**QUERY_BUDGETS, **getattr(settings, "QUERY_BUDGETS", {})}
+    budget = budgets.get(view_name, {})
+    if isinstance(budget, int):
+        budget = {"queries": budget}
+    return QueryBudget(**budget)
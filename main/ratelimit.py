@@ -0,0 +1,286 @@
+"""Token-bucket rate limits for the endpoints bots like to hammer
+
+Each endpoint in ``RATE_LIMITS`` has a bucket per client IP, phone number
+and session, with its own rate. A rate of ``"5/h"`` means a bucket holds
+five tokens and refills at five per hour; every request takes one token
+from each of its buckets and is rejected with a 429 when any is empty.
+
+``RateLimitMixin`` checks the buckets in ``dispatch``, before the form is
+validated or the database is touched. Buckets live in this process
+(``RATE_LIMIT_STORE = "local"``), or in a Django cache shared by all workers
+(``"cache"``, using ``RATE_LIMIT_CACHE_ALIAS``). The shared store does not
+lock, so workers racing on one bucket can let a request or two more through.
+
+The session is a random id this module issues in a signed cookie
+(``RATE_LIMIT_COOKIE_NAME``), not a Django session, so anonymous visitors
+cost no database row. Requests that come without a valid one share a
+session bucket per IP: dropping the cookie does not buy a fresh bucket, and
+visitors behind one carrier-grade NAT address only share the IP bucket.
+
+Rejections are counted in the ``ratelimit.<endpoint>.rejected`` and
+``ratelimit.<endpoint>.<key>`` metrics.
+
+The client IP comes from ``RATE_LIMIT_IP_HEADER`` (nginx's ``X-Real-IP``)
+when the request was passed on by one of ``RATE_LIMIT_TRUSTED_PROXIES``,
+which by default are the loopback and private networks nginx and Docker
+connect from; otherwise it is the address of the connection itself.
+"""
+
+import ipaddress
+import math
+import re
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+
+from . import metrics
+from .normalization import DIGIT_MAP
+
+# Per endpoint, the rate of each of its buckets by what it is keyed on
+DEFAULT_RATE_LIMITS = {
+    "consultation_request": {"ip": "10/h", "phone": "3/h", "session": "5/h"},
+    # Generous per IP, since many mobile visitors share one carrier address;
+    # each of them is held to the session rate
+    "search_questions": {"ip": "600/m", "session": "120/m"},
+}
+
+SESSION_SALT = "main.ratelimit.session"
+
+# A year; the id carries nothing but the bucket it picks
+SESSION_MAX_AGE = 365 * 86400
+
+DEFAULT_TRUSTED_PROXIES = (
+    "127.0.0.0/8",
+    "::1/128",
+    "10.0.0.0/8",
+    "172.16.0.0/12",
+    "192.168.0.0/16",
+    "fc00::/7",
+)
+
+PERIODS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+RATE = re.compile(r"(\d+)/(\d*)([smhd])")
+
+DIGITS = str.maketrans(DIGIT_MAP)
+
+
+def parse_rate(rate):
+    """``"10/h"`` or ``"10/5m"`` as (capacity, tokens added per second)"""
+    match = RATE.fullmatch(rate)
+    if not match:
+        raise ValueError(f"Invalid rate {rate!r}, expected e.g. '10/h' or '10/5m'")
+    capacity = int(match[1])
+    period = int(match[2] or 1) * PERIODS[match[3]]
+    return capacity, capacity / period
+
+
+def refill(bucket, capacity, per_second, now):
+    """Take a token from ``bucket``; returns (bucket, seconds until allowed)
+
+    ``bucket`` is (tokens, time of the last update), or None when new.
+    """
+    tokens, updated = bucket or (capacity, now)
+    tokens = min(capacity, tokens + (now - updated) * per_second)
+    if tokens >= 1:
+        return (tokens - 1, now), 0
+    return (tokens, now), (1 - tokens) / per_second
+
+
+class LocalBucketStore:
+    """Buckets of this process, least recently used dropped beyond ``maxsize``"""
+
+    def __init__(self, maxsize=100_000):
+        self.maxsize = maxsize
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key, capacity, per_second):
+        with self._lock:
+            bucket, wait = refill(
+                self._buckets.get(key), capacity, per_second, time.monotonic()
+            )
+            self._buckets[key] = bucket
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.maxsize:
+                self._buckets.popitem(last=False)
+        return wait
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+class CacheBucketStore:
+    """Buckets in a Django cache, shared by every worker using it"""
+
+    def __init__(self, alias):
+        self.cache = caches[alias]
+
+    def take(self, key, capacity, per_second):
+        key = "main:ratelimit:" + key
+        bucket, wait = refill(self.cache.get(key), capacity, per_second, time.time())
+        # Kept until a full bucket would have refilled anyway
+        self.cache.set(key, bucket, timeout=int(capacity / per_second) + 1)
+        return wait
+
+
+_local_store = LocalBucketStore()
+
+
+def get_store():
+    if getattr(settings, "RATE_LIMIT_STORE", "local") == "cache":
+        return CacheBucketStore(getattr(settings, "RATE_LIMIT_CACHE_ALIAS", "default"))
+    return _local_store
+
+
+def get_limits(endpoint):
+    limits = getattr(settings, "RATE_LIMITS", DEFAULT_RATE_LIMITS)
+    return limits.get(endpoint, {})
+
+
+def parse_address(value):
+    try:
+        return ipaddress.ip_address(value.strip())
+    except ValueError:
+        return None
+
+
+@lru_cache(maxsize=None)
+def trusted_proxies(networks):
+    return [ipaddress.ip_network(network) for network in networks]
+
+
+def is_trusted_proxy(address):
+    networks = getattr(settings, "RATE_LIMIT_TRUSTED_PROXIES", DEFAULT_TRUSTED_PROXIES)
+    return any(address in network for network in trusted_proxies(tuple(networks)))
+
+
+def client_ip(request):
+    """The client address, with IPv6 clients grouped by their /64 network"""
+    address = parse_address(request.META.get("REMOTE_ADDR", ""))
+    header = getattr(settings, "RATE_LIMIT_IP_HEADER", "HTTP_X_REAL_IP")
+    if address and header in request.META and is_trusted_proxy(address):
+        # The proxy appends the address it saw to X-Forwarded-For, so only
+        # the last entry can be trusted
+        address = parse_address(request.META[header].split(",")[-1])
+    if address is None:
+        return None
+    if address.version == 6:
+        # One subscriber usually gets a whole /64 to pick addresses from
+        return str(ipaddress.ip_network(f"{address}/64", strict=False))
+    return str(address)
+
+
+def client_phone(request):
+    """The phone number posted, as its last ten digits"""
+    digits = re.sub(r"\D", "", request.POST.get("phone", "").translate(DIGITS))
+    # 0912..., +98912... and 0098912... are one number
+    return digits[-10:] or None
+
+
+def session_cookie_name():
+    return getattr(settings, "RATE_LIMIT_COOKIE_NAME", "rl_session")
+
+
+def issued_session(request):
+    """The session id this module signed for the client, or None"""
+    return request.get_signed_cookie(
+        session_cookie_name(), default=None, salt=SESSION_SALT
+    )
+
+
+def client_session(request):
+    """The issued session id; clients without one share a bucket per IP"""
+    session = issued_session(request)
+    if session:
+        return session
+    ip = client_ip(request)
+    return f"none:{ip}" if ip else None
+
+
+def issue_session(response):
+    response.set_signed_cookie(
+        session_cookie_name(),
+        secrets.token_urlsafe(16),
+        salt=SESSION_SALT,
+        max_age=SESSION_MAX_AGE,
+        secure=settings.SESSION_COOKIE_SECURE,
+        httponly=True,
+        samesite="Lax",
+    )
+    return response
+
+
+KEY_FUNCTIONS = {"ip": client_ip, "phone": client_phone, "session": client_session}
+
+
+def check(request, endpoint):
+    """Seconds the client has to wait before ``endpoint`` accepts it, or 0"""
+    store = get_store()
+    for kind, rate in get_limits(endpoint).items():
+        value = KEY_FUNCTIONS[kind](request)
+        if not value:
+            continue
+        capacity, per_second = parse_rate(rate)
+        wait = store.take(f"{endpoint}:{kind}:{value}", capacity, per_second)
+        if wait:
+            metrics.incr(f"ratelimit.{endpoint}.rejected")
+            metrics.incr(f"ratelimit.{endpoint}.{kind}")
+            return wait
+    return 0
+
+
+class RateLimitMixin:
+    """Reject requests over the ``rate_limit`` endpoint's limits with a 429
+
+    Only ``rate_limit_methods`` are limited. Endpoints with a ``session``
+    limit hand clients without a session cookie a new one.
+    """
+
+    rate_limit = None
+    rate_limit_methods = ("GET", "POST")
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method in self.rate_limit_methods:
+            wait = check(request, self.rate_limit)
+            if wait:
+                response = self.rate_limited(wait)
+                response["Retry-After"] = str(math.ceil(wait))
+                if self.view_is_async:
+
+                    async def rejected():
+                        return response
+
+                    return rejected()
+                return response
+            if self.needs_session(request):
+                return self.dispatch_issuing_session(request, *args, **kwargs)
+        return super().dispatch(request, *args, **kwargs)
+
+    def needs_session(self, request):
+        limits = get_limits(self.rate_limit)
+        return "session" in limits and not issued_session(request)
+
+    def dispatch_issuing_session(self, request, *args, **kwargs):
+        response = super().dispatch(request, *args, **kwargs)
+        if self.view_is_async:
+
+            async def issued():
+                return issue_session(await response)
+
+            return issued()
+        return issue_session(response)
+
+    def rate_limited(self, wait):
+        return HttpResponse(
+            "تعداد درخواست‌های شما بیش از حد مجاز است. لطفاً کمی بعد دوباره تلاش کنید.",
+            status=429,
+            content_type="text/plain; charset=utf-8",
+        )
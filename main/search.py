@@ -0,0 +1,197 @@
+import re
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Case, IntegerField, Q, Value, When
+from django.utils.module_loading import import_string
+
+from .models import RecentQuestion
+from .normalization import normalize_text
+
+FTS_TABLE = "main_recentquestion_fts"
+GIN_INDEX = "main_recentquestion_search_gin"
+
+# Both the GIN index and the query must use exactly this expression,
+# otherwise PostgreSQL will not pick the index.
+POSTGRES_DOCUMENT = (
+    "to_tsvector('simple', question_normalized || ' ' || description_normalized)"
+)
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize(query):
+    """Normalize a user query and split it into search terms"""
+    return _TOKEN_RE.findall(normalize_text(query))
+
+
+def serialize_question(question):
+    """Build the JSON result row used by the header search box"""
+    description = question.description
+    if description and len(description) > 100:
+        description = description[:100] + "..."
+    return {
+        "id": question.id,
+        "question": question.question,
+        "description": description,
+        "category": question.get_category_display(),
+        "url": question.get_absolute_url(),
+        "created_at": question.created_at.strftime("%Y/%m/%d"),
+    }
+
+
+class BaseSearchBackend:
+    """Common interface for question search backends"""
+
+    def search(self, query, limit=10):
+        """Return active questions matching ``query``, best match first"""
+        terms = tokenize(query)
+        if not terms:
+            return []
+        ids = self.search_ids(terms, limit)
+        if not ids:
+            return []
+        return self.fetch(ids)
+
+    def search_ids(self, terms, limit):
+        raise NotImplementedError
+
+    def fetch(self, ids):
+        """Load questions by id, keeping the ranked order"""
+        preserved = Case(
+            *[When(pk=pk, then=Value(pos)) for pos, pk in enumerate(ids)],
+            output_field=IntegerField(),
+        )
+        return list(
+            RecentQuestion.objects.filter(pk__in=ids, is_active=True).order_by(
+                preserved
+            )
+        )
+
+    def update(self, question):
+        """Index (or un-index) a single question after it was saved"""
+
+    def remove(self, question_id):
+        """Remove a deleted question from the index"""
+
+    def rebuild(self):
+        """Rebuild the whole index from the questions table"""
+
+
+class DatabaseSearchBackend(BaseSearchBackend):
+    """Fallback backend using plain substring matching"""
+
+    def search(self, query, limit=10):
+        terms = tokenize(query)
+        if not terms:
+            return []
+        condition = Q()
+        for term in terms:
+            condition &= Q(question_normalized__contains=term) | Q(
+                description_normalized__contains=term
+            )
+        return list(
+            RecentQuestion.objects.filter(condition, is_active=True).order_by(
+                "-created_at"
+            )[:limit]
+        )
+
+
+class PostgresSearchBackend(BaseSearchBackend):
+    """Full-text search over a GIN-indexed tsvector expression"""
+
+    def search_ids(self, terms, limit):
+        # Every term is matched as a prefix so the typeahead works mid-word
+        tsquery = " & ".join(
+            "'%s':*" % term.replace("'", "''").replace("\\", "") for term in terms
+        )
+        sql = (
+            f"SELECT id FROM {RecentQuestion._meta.db_table} "
+            f"WHERE is_active AND {POSTGRES_DOCUMENT} @@ to_tsquery('simple', %s) "
+            f"ORDER BY ts_rank({POSTGRES_DOCUMENT}, to_tsquery('simple', %s)) DESC, "
+            f"created_at DESC LIMIT %s"
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [tsquery, tsquery, limit])
+            return [row[0] for row in cursor.fetchall()]
+
+    def rebuild(self):
+        create_postgres_index()
+
+
+class SQLiteFTSSearchBackend(BaseSearchBackend):
+    """Full-text search over an SQLite FTS5 virtual table"""
+
+    def search_ids(self, terms, limit):
+        match = " ".join('"%s"*' % term.replace('"', '""') for term in terms)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s "
+                f"ORDER BY rank LIMIT %s",
+                [match, limit],
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+    def update(self, question):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [question.pk])
+            # Only active questions are searchable, so keep the table small
+            if question.is_active:
+                cursor.execute(
+                    f"INSERT INTO {FTS_TABLE} (rowid, question, description) "
+                    f"VALUES (%s, %s, %s)",
+                    [
+                        question.pk,
+                        question.question_normalized,
+                        question.description_normalized,
+                    ],
+                )
+
+    def remove(self, question_id):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [question_id])
+
+    def rebuild(self):
+        with connection.cursor() as cursor:
+            create_sqlite_fts_table(cursor)
+            cursor.execute(f"DELETE FROM {FTS_TABLE}")
+            cursor.execute(
+                f"INSERT INTO {FTS_TABLE} (rowid, question, description) "
+                f"SELECT id, question_normalized, description_normalized "
+                f"FROM {RecentQuestion._meta.db_table} WHERE is_active"
+            )
+
+
+def create_sqlite_fts_table(cursor):
+    cursor.execute(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+        f"question, description, tokenize = 'unicode61 remove_diacritics 2')"
+    )
+
+
+def create_postgres_index():
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"CREATE INDEX IF NOT EXISTS {GIN_INDEX} "
+            f"ON {RecentQuestion._meta.db_table} USING GIN ({POSTGRES_DOCUMENT})"
+        )
+
+
+DEFAULT_BACKENDS = {
+    "postgresql": "main.search.PostgresSearchBackend",
+    "sqlite": "main.search.SQLiteFTSSearchBackend",
+}
+
+
+@lru_cache(maxsize=None)
+def get_search_backend():
+    """Return the configured search backend instance
+
+    ``settings.SEARCH_BACKEND`` may point to a backend class; otherwise the
+    backend is picked from the database vendor.
+    """
+    path = getattr(settings, "SEARCH_BACKEND", None) or DEFAULT_BACKENDS.get(
+        connection.vendor, "main.search.DatabaseSearchBackend"
+    )
+    return import_string(path)()
@@ -0,0 +1,92 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import autocomplete, counters
+from .models import (
+    FAQ,
+    ConsultationType,
+    LawyerAnswer,
+    RecentQuestion,
+    Service,
+    SiteContent,
+)
+from .search import get_search_backend
+from .versions import (
+    ANSWERS,
+    CONSULTATION_TYPES,
+    FAQS,
+    QUESTIONS,
+    SERVICES,
+    SITE_CONTENT,
+    bump_version,
+    get_version,
+)
+
+MODEL_VERSIONS = {
+    LawyerAnswer: ANSWERS,
+    FAQ: FAQS,
+    Service: SERVICES,
+    ConsultationType: CONSULTATION_TYPES,
+    SiteContent: SITE_CONTENT,
+}
+
+
+@receiver(post_save, sender=RecentQuestion)
+def question_saved(sender, instance, raw=False, using=None, **kwargs):
+    """Keep the search indexes in sync with saved questions"""
+    if raw:
+        transaction.on_commit(partial(bump_version, QUESTIONS), using=using)
+        return
+    get_search_backend().update(instance)
+    transaction.on_commit(
+        partial(questions_committed, autocomplete.update_question, instance),
+        using=using,
+    )
+
+
+@receiver(post_delete, sender=RecentQuestion)
+def question_deleted(sender, instance, using=None, **kwargs):
+    """Drop deleted questions from the search indexes"""
+    get_search_backend().remove(instance.pk)
+    transaction.on_commit(
+        partial(questions_committed, autocomplete.remove_question, instance.pk),
+        using=using,
+    )
+
+
+def questions_committed(apply, question):
+    """Bump the questions version and apply the change to the local index
+
+    Only after the commit: a refresh reading the old rows must not record
+    the bumped version, or the index would never pick the change up.
+    """
+    previous_version = get_version(QUESTIONS)
+    version = bump_version(QUESTIONS)
+    apply(question, previous_version, version)
+
+
+@receiver(post_save, sender=LawyerAnswer)
+def answer_saved(sender, instance, created, raw=False, **kwargs):
+    """Keep the question's denormalized answer counters up to date"""
+    if raw:
+        return
+    counters.answer_saved(instance, created)
+
+
+@receiver(post_delete, sender=LawyerAnswer)
+def answer_deleted(sender, instance, **kwargs):
+    counters.answer_deleted(instance)
+
+
+@receiver(post_save)
+@receiver(post_delete)
+def content_changed(sender, using=None, **kwargs):
+    """Invalidate snapshots and cached pages built from the changed model"""
+    version_name = MODEL_VERSIONS.get(sender)
+    if version_name is not None:
+        # Bumped before the commit, another worker could cache the old rows
+        # under the new version
+        transaction.on_commit(partial(bump_version, version_name), using=using)
@@ -0,0 +1,140 @@
+"""XML sitemaps for the public pages and every question page
+
+``/sitemap.xml`` is a sitemap index pointing at ``sitemap-pages.xml`` (the
+fixed pages) and one ``sitemap-questions-<n>.xml`` per ``SITEMAP_CHUNK_SIZE``
+range of question ids. Chunks are id ranges rather than offsets, so a new
+question or answer changes a single chunk and a chunk's URL never moves.
+
+Question chunks are streamed straight from a ``values_list().iterator()``
+cursor, so memory stays flat however many questions there are. A
+question's ``lastmod`` is the newest ``updated_at`` of the question and its
+active answers, the same date its page sends as ``Last-Modified``.
+
+``manage.py generate_sitemaps`` writes the same documents to
+``SITEMAP_ROOT``; once that directory holds them, the views serve the files
+and crawlers never reach the database.
+"""
+
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from django.db.models import Count, F, Max, Q
+from django.db.models.functions import Coalesce, Greatest
+from django.urls import reverse
+
+from .middleware import PUBLIC_PAGE_URL_NAMES
+from .models import LawyerAnswer, RecentQuestion
+
+XML_HEADER = '<?xml version="1.0" encoding="UTF-8"?>\n'
+XMLNS = 'xmlns="http://www.sitemaps.org/schemas/sitemap/0.9"'
+
+# URLs per chunk of a streamed sitemap
+STREAM_BATCH = 1000
+
+# Any id works; it is replaced by each question's own in render_questions()
+URL_PLACEHOLDER = 1234567890
+
+
+def chunk_size():
+    # The protocol allows at most 50,000 URLs per sitemap
+    return getattr(settings, "SITEMAP_CHUNK_SIZE", 50000)
+
+
+def chunk_name(chunk):
+    return f"sitemap-questions-{chunk}.xml"
+
+
+def chunk_exists(chunk):
+    size = chunk_size()
+    return RecentQuestion.objects.filter(
+        is_active=True, pk__gte=chunk * size, pk__lt=(chunk + 1) * size
+    ).exists()
+
+
+def chunk_stats():
+    """{chunk: (newest lastmod, active questions)}, one grouped query per table"""
+    size = chunk_size()
+    questions = (
+        RecentQuestion.objects.filter(is_active=True)
+        .annotate(chunk=F("id") / size)
+        .values_list("chunk")
+        .annotate(lastmod=Max("updated_at"), count=Count("id"))
+        .order_by("chunk")
+    )
+    stats = {chunk: (lastmod, count) for chunk, lastmod, count in questions}
+    answers = (
+        LawyerAnswer.objects.filter(is_active=True, question__is_active=True)
+        .annotate(chunk=F("question_id") / size)
+        .values_list("chunk")
+        .annotate(lastmod=Max("updated_at"))
+        .order_by()
+    )
+    for chunk, lastmod in answers:
+        newest, count = stats[chunk]
+        stats[chunk] = (max(newest, lastmod), count)
+    return stats
+
+
+def w3c_date(value):
+    return value.isoformat(timespec="seconds")
+
+
+def render_index(base_url, stats):
+    yield XML_HEADER
+    yield f"<sitemapindex {XMLNS}>\n"
+    pages = escape(base_url + reverse("main:sitemap_pages"))
+    yield f"<sitemap><loc>{pages}</loc></sitemap>\n"
+    for chunk, (lastmod, _) in stats.items():
+        loc = escape(base_url + reverse("main:sitemap_questions", args=[chunk]))
+        yield (
+            f"<sitemap><loc>{loc}</loc>"
+            f"<lastmod>{w3c_date(lastmod)}</lastmod></sitemap>\n"
+        )
+    yield "</sitemapindex>\n"
+
+
+def render_pages(base_url):
+    yield XML_HEADER
+    yield f"<urlset {XMLNS}>\n"
+    for name in (*PUBLIC_PAGE_URL_NAMES, "main:questions_list"):
+        yield f"<url><loc>{escape(base_url + reverse(name))}</loc></url>\n"
+    yield "</urlset>\n"
+
+
+def render_questions(base_url, chunk):
+    """Stream one chunk; the queryset is only run once iteration starts"""
+    size = chunk_size()
+    url = escape(
+        base_url + reverse("main:question_detail", args=[URL_PLACEHOLDER])
+    ).replace(str(URL_PLACEHOLDER), "{}")
+    rows = (
+        RecentQuestion.objects.filter(
+            is_active=True, pk__gte=chunk * size, pk__lt=(chunk + 1) * size
+        )
+        .order_by("pk")
+        .values_list("pk")
+        .annotate(
+            lastmod=Greatest(
+                "updated_at",
+                Coalesce(
+                    Max("answers__updated_at", filter=Q(answers__is_active=True)),
+                    "updated_at",
+                ),
+            )
+        )
+        .iterator(chunk_size=2000)
+    )
+    yield XML_HEADER
+    yield f"<urlset {XMLNS}>\n"
+    # A write per URL would be a syscall per line; send batches instead
+    batch = []
+    for pk, lastmod in rows:
+        batch.append(
+            f"<url><loc>{url.format(pk)}</loc>"
+            f"<lastmod>{w3c_date(lastmod)}</lastmod></url>\n"
+        )
+        if len(batch) == STREAM_BATCH:
+            yield "".join(batch)
+            batch = []
+    batch.append("</urlset>\n")
+    yield "".join(batch)
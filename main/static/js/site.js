@@ -0,0 +1,318 @@
+// Site-wide behaviour for every page extending base.html. Served as a
+// static file; the search endpoint comes from the script tag's data-search-url.
+const SEARCH_URL = document.currentScript.dataset.searchUrl;
+
+// ===== Mobile Sidebar Functions =====
+function toggleSidebar() {
+    const sidebar = document.getElementById("mobile-sidebar");
+    const overlay = document.getElementById("sidebar-overlay");
+
+    sidebar.classList.toggle("translate-x-full");
+    overlay.classList.toggle("hidden");
+    document.body.style.overflow = sidebar.classList.contains(
+        "translate-x-full",
+    )
+        ? ""
+        : "hidden";
+}
+
+function closeSidebar() {
+    const sidebar = document.getElementById("mobile-sidebar");
+    const overlay = document.getElementById("sidebar-overlay");
+
+    sidebar.classList.add("translate-x-full");
+    overlay.classList.add("hidden");
+    document.body.style.overflow = "";
+}
+
+// Mobile submenu toggle
+function toggleMobileSubmenu(id) {
+    const submenu = document.getElementById(id);
+    const arrow = document.getElementById("consultation-arrow");
+    submenu.classList.toggle("hidden");
+    arrow.classList.toggle("rotate-180");
+}
+
+// ===== Dark Mode Toggle =====
+function toggleDarkMode() {
+    document.documentElement.classList.toggle("dark");
+    localStorage.setItem(
+        "theme",
+        document.documentElement.classList.contains("dark")
+            ? "dark"
+            : "light",
+    );
+}
+
+// Initialize theme
+function initTheme() {
+    const savedTheme = localStorage.getItem("theme");
+    const prefersDark = window.matchMedia(
+        "(prefers-color-scheme: dark)",
+    ).matches;
+
+    if (savedTheme === "dark" || (!savedTheme && prefersDark)) {
+        document.documentElement.classList.add("dark");
+    }
+}
+
+// ===== Accordion Functions =====
+function setupAccordions(selector) {
+    document.querySelectorAll(selector).forEach((button) => {
+        button.addEventListener("click", () => {
+            const content = button.nextElementSibling;
+            const icon = button.querySelector("i");
+            const isOpen =
+                button.getAttribute("aria-expanded") === "true";
+
+            button.setAttribute("aria-expanded", !isOpen);
+            content.classList.toggle("hidden");
+            icon?.classList.toggle("rotate-180");
+        });
+    });
+}
+
+// FAQ Accordion
+document.querySelectorAll(".faq-question").forEach((button) => {
+    button.addEventListener("click", () => {
+        const answer = button.nextElementSibling;
+        const icon = button.querySelector("i");
+
+        // Close other open FAQs
+        document
+            .querySelectorAll(".faq-answer")
+            .forEach((otherAnswer) => {
+                if (otherAnswer !== answer) {
+                    otherAnswer.classList.add("hidden");
+                    otherAnswer.previousElementSibling
+                        .querySelector("i")
+                        .classList.remove("rotate-180");
+                }
+            });
+
+        // Toggle current FAQ
+        answer.classList.toggle("hidden");
+        icon.classList.toggle("rotate-180");
+    });
+});
+
+// Initialize all accordions
+setupAccordions(".accordion-btn");
+
+// Scroll to top button
+const scrollToTopButton = document.getElementById("scrollToTop");
+
+window.addEventListener("scroll", () => {
+    if (window.pageYOffset > 300) {
+        scrollToTopButton.classList.remove("opacity-0");
+        scrollToTopButton.classList.add("opacity-100");
+    } else {
+        scrollToTopButton.classList.remove("opacity-100");
+        scrollToTopButton.classList.add("opacity-0");
+    }
+});
+
+scrollToTopButton.addEventListener("click", () => {
+    window.scrollTo({
+        top: 0,
+        behavior: "smooth",
+    });
+});
+
+// Newsletter form submission
+document
+    .getElementById("newsletter-form")
+    ?.addEventListener("submit", function (e) {
+        e.preventDefault();
+        const email = this.querySelector(
+            'input[type="email"]',
+        ).value;
+
+        // Show success message (in a real app, you would send this to your backend)
+        alert(`ایمیل ${email} با موفقیت در خبرنامه ثبت شد.`);
+        this.reset();
+    });
+
+// Animate elements on scroll
+const animateOnScroll = () => {
+    const elements = document.querySelectorAll("[data-animate]");
+    elements.forEach((el) => {
+        const rect = el.getBoundingClientRect();
+        const windowHeight =
+            window.innerHeight ||
+            document.documentElement.clientHeight;
+
+        if (rect.top <= windowHeight - 100) {
+            el.style.animationPlayState = "running";
+        }
+    });
+};
+
+window.addEventListener("scroll", animateOnScroll);
+window.addEventListener("load", animateOnScroll);
+
+// Setup scroll animations for .animate-on-scroll elements
+function setupScrollAnimations() {
+    const animatedElements = document.querySelectorAll(".animate-on-scroll");
+
+    if (animatedElements.length === 0) return;
+
+    const observer = new IntersectionObserver((entries) => {
+        entries.forEach((entry) => {
+            if (entry.isIntersecting) {
+                entry.target.classList.add("visible");
+                observer.unobserve(entry.target);
+            }
+        });
+    }, {
+        threshold: 0.1,
+        rootMargin: "0px 0px -50px 0px"
+    });
+
+    animatedElements.forEach((el) => observer.observe(el));
+}
+
+// Initialize animations and theme
+animateOnScroll();
+initTheme();
+
+// Setup scroll animations when DOM is ready
+if (document.readyState === "loading") {
+    document.addEventListener("DOMContentLoaded", setupScrollAnimations);
+} else {
+    setupScrollAnimations();
+}
+
+// Close sidebar on escape key
+document.addEventListener("keydown", (e) => {
+    if (e.key === "Escape") {
+        closeSidebar();
+        closeSearch();
+    }
+});
+
+// ===== Search Functions =====
+let searchTimeout;
+let currentSearchResults = [];
+
+function toggleSearch() {
+    const searchContainer = document.getElementById("searchContainer");
+    const searchInput = document.getElementById("searchInput");
+
+    if (searchContainer.classList.contains("hidden")) {
+        searchContainer.classList.remove("hidden");
+        searchInput.focus();
+    } else {
+        closeSearch();
+    }
+}
+
+function closeSearch() {
+    const searchContainer = document.getElementById("searchContainer");
+    const searchInput = document.getElementById("searchInput");
+    const searchResults = document.getElementById("searchResults");
+
+    searchContainer.classList.add("hidden");
+    searchInput.value = "";
+    searchResults.innerHTML = "";
+    currentSearchResults = [];
+}
+
+function clearSearch() {
+    const searchInput = document.getElementById("searchInput");
+    const searchResults = document.getElementById("searchResults");
+
+    searchInput.value = "";
+    searchResults.innerHTML = "";
+    searchInput.focus();
+}
+
+function handleSearch(event) {
+    if (event.key === "Escape") {
+        closeSearch();
+    } else if (event.key === "Enter" && currentSearchResults.length > 0) {
+        // Navigate to first result
+        window.location.href = currentSearchResults[0].url;
+    }
+}
+
+async function searchQuestions() {
+    const searchInput = document.getElementById("searchInput");
+    const searchResults = document.getElementById("searchResults");
+    const query = searchInput.value.trim();
+
+    // Clear previous timeout
+    if (searchTimeout) {
+        clearTimeout(searchTimeout);
+    }
+
+    if (query.length < 2) {
+        searchResults.innerHTML = "";
+        currentSearchResults = [];
+        return;
+    }
+
+    // Show loading indicator
+    searchResults.innerHTML = `
+        <div class="text-center py-3 text-gray-500 dark:text-gray-400">
+            <i class="fas fa-spinner fa-spin"></i>
+            <span class="mr-2">در حال جستجو...</span>
+        </div>
+    `;
+
+    // Debounce search
+    searchTimeout = setTimeout(async () => {
+        try {
+            const response = await fetch(`${SEARCH_URL}?q=${encodeURIComponent(query)}`);
+            const data = await response.json();
+
+            currentSearchResults = data.questions;
+
+            if (data.questions.length === 0) {
+                searchResults.innerHTML = `
+                    <div class="text-center py-3 text-gray-500 dark:text-gray-400">
+                        <i class="fas fa-search"></i>
+                        <span class="mr-2">نتیجه‌ای یافت نشد</span>
+                    </div>
+                `;
+            } else {
+                const resultsHtml = data.questions.map(question => `
+                    <div class="border-b border-gray-200 dark:border-gray-600 last:border-b-0 hover:bg-gray-50 dark:hover:bg-gray-700 transition-colors cursor-pointer" onclick="navigateToQuestion('${question.url}')">
+                        <div class="p-3">
+                            <h4 class="font-medium text-gray-900 dark:text-white mb-1">${question.question}</h4>
+                            ${question.description ? `<p class="text-sm text-gray-600 dark:text-gray-300 line-clamp-2">${question.description}</p>` : ''}
+                            <div class="flex items-center justify-between mt-2">
+                                <span class="text-xs px-2 py-1 bg-blue-100 dark:bg-blue-900/50 text-blue-700 dark:text-blue-300 rounded-full">${question.category}</span>
+                                <span class="text-xs text-gray-500 dark:text-gray-400">${question.created_at}</span>
+                            </div>
+                        </div>
+                    </div>
+                `).join('');
+
+                searchResults.innerHTML = resultsHtml;
+            }
+        } catch (error) {
+            console.error('Search error:', error);
+            searchResults.innerHTML = `
+                <div class="text-center py-3 text-red-500 dark:text-red-400">
+                    <i class="fas fa-exclamation-triangle"></i>
+                    <span class="mr-2">خطا در جستجو</span>
+                </div>
+            `;
+        }
+    }, 300);
+}
+
+function navigateToQuestion(url) {
+    window.location.href = url;
+}
+
+// Close search when clicking outside
+document.addEventListener("click", (e) => {
+    const searchContainer = document.getElementById("searchContainer");
+    const searchToggle = document.getElementById("searchToggle");
+
+    if (!searchContainer.contains(e.target) && !searchToggle.contains(e.target)) {
+        closeSearch();
+    }
+});
@@ -0,0 +1,245 @@
+const SEARCH_URL = document.currentScript.dataset.searchUrl;
+function toggleSidebar() {
+const sidebar = document.getElementById("mobile-sidebar");
+const overlay = document.getElementById("sidebar-overlay");
+sidebar.classList.toggle("translate-x-full");
+overlay.classList.toggle("hidden");
+document.body.style.overflow = sidebar.classList.contains(
+"translate-x-full",
+)
+? ""
+: "hidden";
+}
+function closeSidebar() {
+const sidebar = document.getElementById("mobile-sidebar");
+const overlay = document.getElementById("sidebar-overlay");
+sidebar.classList.add("translate-x-full");
+overlay.classList.add("hidden");
+document.body.style.overflow = "";
+}
+function toggleMobileSubmenu(id) {
+const submenu = document.getElementById(id);
+const arrow = document.getElementById("consultation-arrow");
+submenu.classList.toggle("hidden");
+arrow.classList.toggle("rotate-180");
+}
+function toggleDarkMode() {
+document.documentElement.classList.toggle("dark");
+localStorage.setItem(
+"theme",
+document.documentElement.classList.contains("dark")
+? "dark"
+: "light",
+);
+}
+function initTheme() {
+const savedTheme = localStorage.getItem("theme");
+const prefersDark = window.matchMedia(
+"(prefers-color-scheme: dark)",
+).matches;
+if (savedTheme === "dark" || (!savedTheme && prefersDark)) {
+document.documentElement.classList.add("dark");
+}
+}
+function setupAccordions(selector) {
+document.querySelectorAll(selector).forEach((button) => {
+button.addEventListener("click", () => {
+const content = button.nextElementSibling;
+const icon = button.querySelector("i");
+const isOpen =
+button.getAttribute("aria-expanded") === "true";
+button.setAttribute("aria-expanded", !isOpen);
+content.classList.toggle("hidden");
+icon?.classList.toggle("rotate-180");
+});
+});
+}
+document.querySelectorAll(".faq-question").forEach((button) => {
+button.addEventListener("click", () => {
+const answer = button.nextElementSibling;
+const icon = button.querySelector("i");
+document
+.querySelectorAll(".faq-answer")
+.forEach((otherAnswer) => {
+if (otherAnswer !== answer) {
+otherAnswer.classList.add("hidden");
+otherAnswer.previousElementSibling
+.querySelector("i")
+.classList.remove("rotate-180");
+}
+});
+answer.classList.toggle("hidden");
+icon.classList.toggle("rotate-180");
+});
+});
+setupAccordions(".accordion-btn");
+const scrollToTopButton = document.getElementById("scrollToTop");
+window.addEventListener("scroll", () => {
+if (window.pageYOffset > 300) {
+scrollToTopButton.classList.remove("opacity-0");
+scrollToTopButton.classList.add("opacity-100");
+} else {
+scrollToTopButton.classList.remove("opacity-100");
+scrollToTopButton.classList.add("opacity-0");
+}
+});
+scrollToTopButton.addEventListener("click", () => {
+window.scrollTo({
+top: 0,
+behavior: "smooth",
+});
+});
+document
+.getElementById("newsletter-form")
+?.addEventListener("submit", function (e) {
+e.preventDefault();
+const email = this.querySelector(
+'input[type="email"]',
+).value;
+alert(`ایمیل ${email} با موفقیت در خبرنامه ثبت شد.`);
+this.reset();
+});
+const animateOnScroll = () => {
+const elements = document.querySelectorAll("[data-animate]");
+elements.forEach((el) => {
+const rect = el.getBoundingClientRect();
+const windowHeight =
+window.innerHeight ||
+document.documentElement.clientHeight;
+if (rect.top <= windowHeight - 100) {
+el.style.animationPlayState = "running";
+}
+});
+};
+window.addEventListener("scroll", animateOnScroll);
+window.addEventListener("load", animateOnScroll);
+function setupScrollAnimations() {
+const animatedElements = document.querySelectorAll(".animate-on-scroll");
+if (animatedElements.length === 0) return;
+const observer = new IntersectionObserver((entries) => {
+entries.forEach((entry) => {
+if (entry.isIntersecting) {
+entry.target.classList.add("visible");
+observer.unobserve(entry.target);
+}
+});
+}, {
+threshold: 0.1,
+rootMargin: "0px 0px -50px 0px"
+});
+animatedElements.forEach((el) => observer.observe(el));
+}
+animateOnScroll();
+initTheme();
+if (document.readyState === "loading") {
+document.addEventListener("DOMContentLoaded", setupScrollAnimations);
+} else {
+setupScrollAnimations();
+}
+document.addEventListener("keydown", (e) => {
+if (e.key === "Escape") {
+closeSidebar();
+closeSearch();
+}
+});
+let searchTimeout;
+let currentSearchResults = [];
+function toggleSearch() {
+const searchContainer = document.getElementById("searchContainer");
+const searchInput = document.getElementById("searchInput");
+if (searchContainer.classList.contains("hidden")) {
+searchContainer.classList.remove("hidden");
+searchInput.focus();
+} else {
+closeSearch();
+}
+}
+function closeSearch() {
+const searchContainer = document.getElementById("searchContainer");
+const searchInput = document.getElementById("searchInput");
+const searchResults = document.getElementById("searchResults");
+searchContainer.classList.add("hidden");
+searchInput.value = "";
+searchResults.innerHTML = "";
+currentSearchResults = [];
+}
+function clearSearch() {
+const searchInput = document.getElementById("searchInput");
+const searchResults = document.getElementById("searchResults");
+searchInput.value = "";
+searchResults.innerHTML = "";
+searchInput.focus();
+}
+function handleSearch(event) {
+if (event.key === "Escape") {
+closeSearch();
+} else if (event.key === "Enter" && currentSearchResults.length > 0) {
+window.location.href = currentSearchResults[0].url;
+}
+}
+async function searchQuestions() {
+const searchInput = document.getElementById("searchInput");
+const searchResults = document.getElementById("searchResults");
+const query = searchInput.value.trim();
+if (searchTimeout) {
+clearTimeout(searchTimeout);
+}
+if (query.length < 2) {
+searchResults.innerHTML = "";
+currentSearchResults = [];
+return;
+}
+searchResults.innerHTML = `
+        <div class="text-center py-3 text-gray-500 dark:text-gray-400">
+            <i class="fas fa-spinner fa-spin"></i>
+            <span class="mr-2">در حال جستجو...</span>
+        </div>
+    `;
+searchTimeout = setTimeout(async () => {
+try {
+const response = await fetch(`${SEARCH_URL}?q=${encodeURIComponent(query)}`);
+const data = await response.json();
+currentSearchResults = data.questions;
+if (data.questions.length === 0) {
+searchResults.innerHTML = `
+                    <div class="text-center py-3 text-gray-500 dark:text-gray-400">
+                        <i class="fas fa-search"></i>
+                        <span class="mr-2">نتیجه‌ای یافت نشد</span>
+                    </div>
+                `;
+} else {
+const resultsHtml = data.questions.map(question => `
+                    <div class="border-b border-gray-200 dark:border-gray-600 last:border-b-0 hover:bg-gray-50 dark:hover:bg-gray-700 transition-colors cursor-pointer" onclick="navigateToQuestion('${question.url}')">
+                        <div class="p-3">
+                            <h4 class="font-medium text-gray-900 dark:text-white mb-1">${question.question}</h4>
+                            ${question.description ? `<p class="text-sm text-gray-600 dark:text-gray-300 line-clamp-2">${question.description}</p>` : ''}
+                            <div class="flex items-center justify-between mt-2">
+                                <span class="text-xs px-2 py-1 bg-blue-100 dark:bg-blue-900/50 text-blue-700 dark:text-blue-300 rounded-full">${question.category}</span>
+                                <span class="text-xs text-gray-500 dark:text-gray-400">${question.created_at}</span>
+                            </div>
+                        </div>
+                    </div>
+                `).join('');
+searchResults.innerHTML = resultsHtml;
+}
+} catch (error) {
+console.error('Search error:', error);
+searchResults.innerHTML = `
+                <div class="text-center py-3 text-red-500 dark:text-red-400">
+                    <i class="fas fa-exclamation-triangle"></i>
+                    <span class="mr-2">خطا در جستجو</span>
+                </div>
+            `;
+}
+}, 300);
+}
+function navigateToQuestion(url) {
+window.location.href = url;
+}
+document.addEventListener("click", (e) => {
+const searchContainer = document.getElementById("searchContainer");
+const searchToggle = document.getElementById("searchToggle");
+if (!searchContainer.contains(e.target) && !searchToggle.contains(e.target)) {
+closeSearch();
+}
+});
@@ -0,0 +1,76 @@
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q
+
+from .models import RecentQuestion
+from .versions import ANSWERS, QUESTIONS, get_versions
+
+
+@dataclass(frozen=True)
+class QuestionStats:
+    """Counts of active questions, overall and per category"""
+
+    total: int
+    answered: int
+    # category -> (total, answered)
+    categories: dict
+
+    @property
+    def unanswered(self):
+        return self.total - self.answered
+
+    def count(self, category=None, answered=None):
+        """Number of active questions matching a list filter"""
+        if category is None:
+            total, answered_count = self.total, self.answered
+        else:
+            total, answered_count = self.categories.get(category, (0, 0))
+        if answered is None:
+            return total
+        return answered_count if answered else total - answered_count
+
+    def facets(self):
+        """``(category, label, total)`` for every category choice"""
+        return [
+            (category, label, self.categories[category][0])
+            for category, label in RecentQuestion.CATEGORY_CHOICES
+        ]
+
+
+def compute_question_stats():
+    """Compute every count in a single conditional-aggregate query"""
+    aggregates = {
+        "total": Count("pk"),
+        "answered": Count("pk", filter=Q(is_answered=True)),
+    }
+    for category, _ in RecentQuestion.CATEGORY_CHOICES:
+        aggregates[f"{category}__total"] = Count("pk", filter=Q(category=category))
+        aggregates[f"{category}__answered"] = Count(
+            "pk", filter=Q(category=category, is_answered=True)
+        )
+    row = RecentQuestion.objects.filter(is_active=True).aggregate(**aggregates)
+    return QuestionStats(
+        total=row["total"],
+        answered=row["answered"],
+        categories={
+            category: (row[f"{category}__total"], row[f"{category}__answered"])
+            for category, _ in RecentQuestion.CATEGORY_CHOICES
+        },
+    )
+
+
+def get_question_stats():
+    """Return cached question statistics
+
+    The cache key carries the question and answer versions (answers flip
+    ``is_answered``), so any change yields a fresh computation.
+    """
+    versions = get_versions(QUESTIONS, ANSWERS)
+    key = "main:question_stats:%s:%s" % (versions[QUESTIONS], versions[ANSWERS])
+    stats = cache.get(key)
+    if stats is None:
+        stats = compute_question_stats()
+        cache.set(key, stats, getattr(settings, "QUESTION_STATS_TTL", 3600))
+    return stats
@@ -0,0 +1,267 @@
+import multiprocessing
+import random
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+from datetime import time as dtime
+from functools import lru_cache
+
+from django.contrib.auth.models import User
+from django.db import connections, transaction
+from django.utils import timezone
+
+from .models import (
+    ConsultationRequest,
+    LawyerAnswer,
+    RecentQuestion,
+    explicit_timestamps,
+)
+from .normalization import normalize_text
+from .search import get_search_backend
+from .versions import ANSWERS, QUESTIONS, bump_version
+
+# Topic vocabulary per RecentQuestion category
+TOPICS = {
+    "family": ["طلاق", "مهریه", "نفقه", "حضانت فرزند", "اجرت‌المثل", "ازدواج مجدد"],
+    "criminal": ["کلاهبرداری", "سرقت", "دیه", "قصاص", "توهین", "ضرب و جرح"],
+    "civil": ["ارث", "وصیت‌نامه", "چک برگشتی", "سفته", "مطالبه وجه", "خسارت"],
+    "labor": ["حقوق معوقه", "سنوات", "بیمه تامین اجتماعی", "اخراج", "اضافه‌کار"],
+    "real_estate": ["قرارداد اجاره", "ودیعه رهن", "سند تک‌برگ", "پیش‌فروش", "تخلیه"],
+    "commercial": ["ثبت شرکت", "سهام", "ورشکستگی", "ضمانت‌نامه", "قرارداد مشارکت"],
+    "other": ["وکالت‌نامه", "امضای الکترونیک", "مالیات", "گذرنامه", "شکایت اداری"],
+}
+
+QUESTION_TEMPLATES = [
+    "آیا در مورد {topic} می‌توانم {action}؟",
+    "برای {topic} چه مدارکی لازم است؟",
+    "مراحل قانونی {topic} چیست؟",
+    "هزینه دادرسی {topic} چقدر است؟",
+    "اگر طرف مقابل در {topic} همکاری نکند چه باید کرد؟",
+    "مهلت اعتراض به رای {topic} چند روز است؟",
+]
+
+ACTIONS = [
+    "شکایت کنم",
+    "دادخواست بدهم",
+    "به رای اعتراض کنم",
+    "وکیل بگیرم",
+    "توافق کنم",
+    "اظهارنامه بفرستم",
+]
+
+SENTENCES = [
+    "حدود {n} ماه است که این موضوع ادامه دارد.",
+    "طرف مقابل حاضر به توافق نیست.",
+    "مدارک لازم را در اختیار دارم اما نمی‌دانم از کجا شروع کنم.",
+    "قبلاً یک بار به دادگاه مراجعه کرده‌ام.",
+    "مبلغ مورد اختلاف {n} میلیون تومان است.",
+    "در شهر دیگری زندگی می‌کنم و امکان حضور مداوم ندارم.",
+]
+
+ANSWER_SENTENCES = [
+    "طبق قانون آیین دادرسی مدنی، شما می‌توانید دادخواست خود را از طریق دفاتر "
+    "خدمات قضایی ثبت کنید.",
+    "توصیه می‌شود پیش از هر اقدامی یک اظهارنامه رسمی برای طرف مقابل ارسال کنید.",
+    "مهلت اعتراض برای اشخاص مقیم ایران بیست روز از تاریخ ابلاغ است.",
+    "جمع‌آوری مستندات و شهادت شهود در این پرونده اهمیت زیادی دارد.",
+    "در صورت نیاز می‌توانید برای بررسی دقیق‌تر مدارک، وقت مشاوره حضوری بگیرید.",
+    "هزینه دادرسی بر اساس خواسته دعوا محاسبه می‌شود.",
+]
+
+NAMES = ["علی", "زهرا", "محمد", "فاطمه", "حسین", "مریم", "رضا", "سارا", "امیر", "نرگس"]
+SURNAMES = ["احمدی", "محمدی", "حسینی", "رضایی", "کریمی", "موسوی", "جعفری", "صادقی"]
+
+LAWYER_PREFIX = "synthetic_lawyer_"
+
+# Generated texts are made of a few hundred distinct sentences, and
+# normalizing each only once keeps generation bound by the inserts
+_normalize = lru_cache(maxsize=None)(normalize_text)
+
+
+def _question_text(rng, category):
+    topic = rng.choice(TOPICS[category])
+    return rng.choice(QUESTION_TEMPLATES).format(
+        topic=topic, action=rng.choice(ACTIONS)
+    )
+
+
+def _paragraph(rng, sentences, count):
+    """Return a random paragraph and its normalized form"""
+    parts = [rng.choice(sentences).format(n=rng.randint(2, 90)) for _ in range(count)]
+    return " ".join(parts), " ".join(_normalize(part) for part in parts)
+
+
+def _skewed_datetime(rng, now, days):
+    """Random moment in the last ``days`` days, heavily skewed towards now"""
+    return now - timedelta(days=days * rng.random() ** 3, seconds=rng.random())
+
+
+def get_lawyers(count=5):
+    """Return ``count`` staff users the synthetic answers are attributed to"""
+    lawyers = []
+    for i in range(count):
+        lawyer, _ = User.objects.get_or_create(
+            username=f"{LAWYER_PREFIX}{i}",
+            defaults={
+                "first_name": NAMES[i % len(NAMES)],
+                "last_name": SURNAMES[i % len(SURNAMES)],
+                "is_staff": True,
+            },
+        )
+        lawyers.append(lawyer)
+    return lawyers
+
+
+def seed_questions(
+    count,
+    answers_per_question=1,
+    batch_size=1000,
+    lawyers=5,
+    days=730,
+    seed=0,
+    progress=None,
+):
+    """Bulk insert ``count`` questions and their answers
+
+    Questions are spread over all categories with creation dates skewed
+    towards the present; about a third stay unanswered. Normalized search
+    columns and answer counters are computed up front, since
+    ``bulk_create`` bypasses ``save()`` and the signals. Call
+    :func:`finish` once all batches are in.
+    """
+    rng = random.Random(seed)
+    lawyers = get_lawyers(lawyers)
+    categories = [key for key, _ in RecentQuestion.CATEGORY_CHOICES]
+    now = timezone.now()
+    created = 0
+    while created < count:
+        size = min(batch_size, count - created)
+        questions = []
+        answers = []
+        for _ in range(size):
+            category = rng.choice(categories)
+            text = _question_text(rng, category)
+            description, description_normalized = _paragraph(
+                rng, SENTENCES, rng.randint(1, 4)
+            )
+            question = RecentQuestion(
+                question=text,
+                question_normalized=_normalize(text),
+                description=description,
+                description_normalized=description_normalized,
+                category=category,
+                questioner_name=rng.choice(NAMES),
+                is_active=rng.random() > 0.05,
+                created_at=_skewed_datetime(rng, now, days),
+            )
+            if rng.random() > 0.33:
+                for _ in range(answers_per_question):
+                    answered_at = min(
+                        question.created_at + timedelta(hours=rng.expovariate(1 / 24)),
+                        now,
+                    )
+                    text, normalized = _paragraph(
+                        rng, ANSWER_SENTENCES, rng.randint(2, 6)
+                    )
+                    short_answer = rng.choice(ANSWER_SENTENCES)
+                    answers.append(
+                        LawyerAnswer(
+                            question=question,
+                            lawyer=rng.choice(lawyers),
+                            answer=text,
+                            answer_normalized=normalized,
+                            short_answer=short_answer,
+                            short_answer_normalized=_normalize(short_answer),
+                            created_at=answered_at,
+                            updated_at=answered_at,
+                        )
+                    )
+                    question.answers_count += 1
+                    question.last_answered_at = max(
+                        question.last_answered_at or answered_at, answered_at
+                    )
+                question.is_answered = question.answers_count > 0
+            question.updated_at = question.last_answered_at or question.created_at
+            questions.append(question)
+        with transaction.atomic(), explicit_timestamps(RecentQuestion, LawyerAnswer):
+            RecentQuestion.objects.bulk_create(questions)
+            LawyerAnswer.objects.bulk_create(answers)
+        created += size
+        if progress:
+            progress(created)
+    return created
+
+
+def seed_consultation_requests(count, batch_size=1000, days=365, seed=0):
+    """Bulk insert ``count`` consultation requests"""
+    rng = random.Random(seed)
+    types = [key for key, _ in ConsultationRequest.CONSULTATION_TYPES]
+    statuses = [key for key, _ in ConsultationRequest.STATUS_CHOICES]
+    now = timezone.now()
+    created = 0
+    while created < count:
+        size = min(batch_size, count - created)
+        requests = []
+        for _ in range(size):
+            created_at = _skewed_datetime(rng, now, days)
+            category = rng.choice(list(TOPICS))
+            requests.append(
+                ConsultationRequest(
+                    name=f"{rng.choice(NAMES)} {rng.choice(SURNAMES)}",
+                    phone=f"0912{rng.randint(0, 9999999):07d}",
+                    consultation_type=rng.choice(types),
+                    subject=rng.choice(TOPICS[category]),
+                    description=_paragraph(rng, SENTENCES, rng.randint(1, 3))[0],
+                    preferred_date=(
+                        created_at + timedelta(days=rng.randint(1, 14))
+                    ).date(),
+                    preferred_time=dtime(rng.randint(9, 17)),
+                    # Old requests have mostly been handled
+                    status=(
+                        "pending"
+                        if now - created_at < timedelta(days=3)
+                        else rng.choice(statuses)
+                    ),
+                    created_at=created_at,
+                    updated_at=created_at,
+                )
+            )
+        with transaction.atomic(), explicit_timestamps(ConsultationRequest):
+            ConsultationRequest.objects.bulk_create(requests)
+        created += size
+    return created
+
+
+def _seed_worker(kwargs):
+    return seed_questions(**kwargs)
+
+
+def seed_questions_parallel(count, workers, **kwargs):
+    """Split :func:`seed_questions` over ``workers`` processes
+
+    Every worker gets its own random seed and database connection. Only
+    useful on databases that accept concurrent writers (PostgreSQL).
+    """
+    if workers <= 1:
+        return seed_questions(count, **kwargs)
+    seed = kwargs.pop("seed", 0)
+    kwargs.pop("progress", None)
+    # Create the shared lawyer pool once, before the workers race for it
+    get_lawyers(kwargs.get("lawyers", 5))
+    shares = [count // workers + (i < count % workers) for i in range(workers)]
+    # Forked children must open their own connections, not share ours
+    connections.close_all()
+    context = multiprocessing.get_context("fork")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+        jobs = [
+            {**kwargs, "count": share, "seed": seed + i}
+            for i, share in enumerate(shares)
+            if share
+        ]
+        return sum(executor.map(_seed_worker, jobs))
+
+
+def finish():
+    """Rebuild derived state after bulk inserts that skipped the signals"""
+    get_search_backend().rebuild()
+    bump_version(QUESTIONS)
+    bump_version(ANSWERS)
@@ -0,0 +1,78 @@
+import time
+
+from django import template
+from django.conf import settings
+from django.core.cache import caches
+
+from .. import metrics
+from ..versions import get_versions
+
+register = template.Library()
+
+KEY_PREFIX = "main:fragment:"
+
+
+class FragmentCacheNode(template.Node):
+    def __init__(self, nodelist, name, version_names):
+        self.nodelist = nodelist
+        self.name = name
+        self.version_names = version_names
+
+    def render(self, context):
+        if not getattr(settings, "FRAGMENT_CACHE_ENABLED", not settings.DEBUG):
+            start = time.perf_counter()
+            content = self.nodelist.render(context)
+            self.record(context, "off", start)
+            return content
+
+        versions = get_versions(*self.version_names)
+        stamp = ".".join(str(versions[name]) for name in self.version_names)
+        key = f"{KEY_PREFIX}{self.name}:{stamp}"
+        cache = caches[getattr(settings, "FRAGMENT_CACHE_ALIAS", "default")]
+        start = time.perf_counter()
+        content = cache.get(key)
+        if content is not None:
+            self.record(context, "hit", start)
+            return content
+        content = self.nodelist.render(context)
+        self.record(context, "miss", start)
+        # The versions are part of the key, the timeout only evicts
+        # fragments nobody asks for any more
+        cache.set(key, content, getattr(settings, "FRAGMENT_CACHE_TIMEOUT", 24 * 3600))
+        return content
+
+    def record(self, context, state, start):
+        elapsed = time.perf_counter() - start
+        metrics.incr(f"fragment_cache.{self.name}.{state}")
+        metrics.incr(f"fragment_cache.{self.name}.{state}_us", int(elapsed * 1e6))
+        request = context.get("request")
+        if request is not None:
+            timings = request.__dict__.setdefault("fragment_timings", [])
+            timings.append((self.name, state, elapsed * 1000))
+
+
+@register.tag
+def fragmentcache(parser, token):
+    """Cache a template fragment until one of the named content versions moves
+
+        {% fragmentcache "home.faqs" "faqs" %} ... {% endfragmentcache %}
+
+    The first argument names the fragment, the others are counters from
+    ``main.versions`` whose bump invalidates it. Render times are counted
+    in ``main.metrics`` and, per request, in ``request.fragment_timings``.
+    """
+    bits = token.split_contents()
+    if len(bits) < 3:
+        raise template.TemplateSyntaxError(
+            f"{bits[0]} takes a fragment name and at least one version name"
+        )
+    names = []
+    for bit in bits[1:]:
+        if len(bit) < 2 or bit[0] != bit[-1] or bit[0] not in "\"'":
+            raise template.TemplateSyntaxError(
+                f"{bits[0]} arguments must be quoted strings"
+            )
+        names.append(bit[1:-1])
+    nodelist = parser.parse(("endfragmentcache",))
+    parser.delete_first_token()
+    return FragmentCacheNode(nodelist, names[0], tuple(names[1:]))
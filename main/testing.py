@@ -0,0 +1,19 @@
+from django.core.cache import cache
+
+from .queries import get_budget, record_queries
+
+
+class QueryBudgetMixin:
+    """Assert that a request stays within the budget declared for its view"""
+
+    def assertWithinQueryBudget(self, url, budget=None):
+        cache.clear()
+        with record_queries() as recorder:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, url)
+        view_name = response.resolver_match.view_name
+        budget = budget or get_budget(view_name)
+        # DB time is too noisy to assert on; production sampling checks it
+        problems = budget.violations(recorder, check_time=False)
+        self.assertFalse(problems, f"{view_name} over budget: {problems}")
+        return response
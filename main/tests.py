@@ -1,3 +1,1749 @@
-from django.test import TestCase
+import gzip
+import json
+import os
+import re
+import shutil
+import tempfile
+import unittest
+from datetime import date, time, timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import AnonymousUser, User
+from django.contrib.staticfiles import finders
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.db.models import Count, Max
+from django.db.utils import ConnectionHandler
+from django.http import Http404, HttpResponse
+from django.template import Context, Template, engines
+from django.test import (
+    AsyncRequestFactory,
+    RequestFactory,
+    TestCase,
+    TransactionTestCase,
+)
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from dadpars_site.database import database_settings
+
+from . import async_views, autocomplete, metrics, ratelimit, sitemaps, synthetic, views
+from .caching import VersionedLRUCache
+from .content import get_content_snapshot
+from .management.commands.build_css import oklch_to_hex
+from .middleware import AnonymousPageCacheMiddleware
+from .minify import minify_css, minify_html, minify_js
+from .models import (
+    FAQ,
+    ConsultationRequest,
+    ConsultationType,
+    LawyerAnswer,
+    RecentQuestion,
+    Service,
+    normalize_fields,
+)
+from .normalization import normalize_text
+from .pagination import KeysetPage
+from .queries import record_queries
+from .search import DatabaseSearchBackend, SQLiteFTSSearchBackend, get_search_backend
+from .stats import get_question_stats
+from .testing import QueryBudgetMixin
+from .versions import FAQS, QUESTIONS, SERVICES, bump_version, get_version
+from .warmup import warmup
+
+# Tables that grow with traffic and must never be read front to back
+LARGE_TABLES = {
+    model._meta.db_table
+    for model in (RecentQuestion, LawyerAnswer, ConsultationRequest)
+}
+
+SQLITE_SCAN = re.compile(r"^SCAN (?:TABLE )?(\w+)(?: AS \w+)?$")
+POSTGRES_SCAN = re.compile(r"Seq Scan on (\w+)")
+
+
+def seq_scans(sql):
+    """Return the tables ``sql`` would read with a full sequential scan"""
+    with connection.cursor() as cursor:
+        if connection.vendor == "sqlite":
+            cursor.execute("EXPLAIN QUERY PLAN " + sql)
+            details = [row[-1] for row in cursor.fetchall()]
+            pattern = SQLITE_SCAN
+        else:
+            cursor.execute("EXPLAIN " + sql)
+            details = [row[0] for row in cursor.fetchall()]
+            pattern = POSTGRES_SCAN
+    return {match[1] for line in details if (match := pattern.search(line))}
+
+
+class QueryPlanTests(TestCase):
+    """EXPLAIN every query a view runs against a large synthetic data set"""
+
+    QUESTIONS = 3000
+    CATEGORIES = [key for key, _ in RecentQuestion.CATEGORY_CHOICES]
+
+    @classmethod
+    def setUpTestData(cls):
+        now = timezone.now()
+        cls.staff = User.objects.create_user("lawyer", password="x", is_staff=True)
+        questions = RecentQuestion.objects.bulk_create(
+            RecentQuestion(
+                question=f"سوال {i}",
+                category=cls.CATEGORIES[i % len(cls.CATEGORIES)],
+                is_active=i % 10 != 0,
+                is_answered=i % 3 == 0,
+                answers_count=int(i % 3 == 0),
+                order=i % 5,
+            )
+            for i in range(cls.QUESTIONS)
+        )
+        LawyerAnswer.objects.bulk_create(
+            LawyerAnswer(
+                question=question,
+                lawyer=cls.staff,
+                answer="پاسخ",
+                short_answer="پاسخ",
+                is_active=i % 10 != 0,
+                order=i % 5,
+            )
+            for i, question in enumerate(questions)
+            if question.is_answered
+        )
+        ConsultationRequest.objects.bulk_create(
+            ConsultationRequest(
+                name=f"متقاضی {i}",
+                phone="09120000000",
+                consultation_type="phone",
+                subject="موضوع",
+                description="توضیحات",
+                preferred_date=date.today(),
+                preferred_time=time(10),
+                status=ConsultationRequest.STATUS_CHOICES[i % 4][0],
+            )
+            for i in range(cls.QUESTIONS)
+        )
+        for model, extra in (
+            (FAQ, {"question": "سوال", "answer": "پاسخ"}),
+            (Service, {"title": "خدمت", "description": "", "icon": "fas"}),
+        ):
+            model.objects.bulk_create(
+                model(order=i, is_active=i % 2 == 0, **extra) for i in range(200)
+            )
+        ConsultationType.objects.bulk_create(
+            ConsultationType(
+                type_key=f"type{i}",
+                title="مشاوره",
+                description="",
+                icon="fas",
+                button_text="رزرو",
+                order=i,
+                is_active=i % 2 == 0,
+            )
+            for i in range(200)
+        )
+        # Spread creation times so the (created_at, id) keys are realistic
+        for question in questions[::7]:
+            RecentQuestion.objects.filter(pk=question.pk).update(
+                created_at=now - timedelta(minutes=question.pk)
+            )
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+    def setUp(self):
+        cache.clear()
+        # The statistics aggregate reads every active row by design; it is
+        # cached for the list views, so keep it out of the captured queries
+        get_question_stats()
+
+    def assertNoSeqScan(self, url, client=None):
+        client = client or self.client
+        with CaptureQueriesContext(connection) as captured:
+            response = client.get(url)
+        self.assertEqual(response.status_code, 200, url)
+        self.assertQueriesUseIndexes(captured, url)
+        return response
+
+    def assertQueriesUseIndexes(self, captured, label):
+        for query in captured.captured_queries:
+            sql = query["sql"]
+            if not sql.lstrip().upper().startswith("SELECT"):
+                continue
+            scanned = seq_scans(sql) & LARGE_TABLES
+            self.assertFalse(scanned, f"{label} scans {scanned}:\n{sql}")
+
+    def test_home(self):
+        self.assertNoSeqScan(reverse("main:home"))
+
+    def test_landing_pages(self):
+        for name in (
+            "main:24_hours_consultation",
+            "main:phone_consultation",
+            "main:in_person_consultation",
+            "main:quick_legal_advice",
+        ):
+            self.assertNoSeqScan(reverse(name))
+
+    def test_questions_list(self):
+        url = reverse("main:questions_list")
+        for sort in ("newest", "oldest", "answered", "unanswered"):
+            self.assertNoSeqScan(f"{url}?sort={sort}")
+            self.assertNoSeqScan(f"{url}?sort={sort}&category=family&page=2")
+
+    def test_questions_list_cursor(self):
+        url = reverse("main:questions_list")
+        response = self.assertNoSeqScan(f"{url}?category=civil")
+        cursor = response.context["page_obj"].next_cursor
+        response = self.assertNoSeqScan(f"{url}?category=civil&cursor={cursor}")
+        cursor = response.context["page_obj"].previous_cursor
+        self.assertNoSeqScan(f"{url}?category=civil&cursor={cursor}")
+
+    def test_question_detail(self):
+        question = RecentQuestion.objects.filter(is_answered=True).first()
+        self.assertNoSeqScan(reverse("main:question_detail", args=[question.pk]))
+
+    def test_consultation_list(self):
+        # Called without rendering: the page queries run while building the
+        # context, and the staff template is not part of this app
+        view = views.ConsultationRequestListView.as_view()
+        url = reverse("main:consultation_list")
+        cursor = None
+        for _ in range(2):
+            request = RequestFactory().get(url, {"cursor": cursor} if cursor else {})
+            request.user = self.staff
+            with CaptureQueriesContext(connection) as captured:
+                response = view(request)
+            self.assertQueriesUseIndexes(captured, request.get_full_path())
+            cursor = response.context_data["page_obj"].next_cursor
+
+
+class AnswerCounterTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.lawyer = User.objects.create_user("lawyer", password="x", is_staff=True)
+        cls.question = RecentQuestion.objects.create(question="سوال", category="civil")
+        cls.other = RecentQuestion.objects.create(
+            question="سوال دیگر", category="civil"
+        )
+
+    def answer(self, question=None, **kwargs):
+        return LawyerAnswer.objects.create(
+            question=question or self.question,
+            lawyer=self.lawyer,
+            answer="پاسخ",
+            short_answer="پاسخ",
+            **kwargs,
+        )
+
+    def assertCounters(self, question, count, last_answered_at=None):
+        question.refresh_from_db()
+        self.assertEqual(question.answers_count, count)
+        self.assertEqual(question.is_answered, count > 0)
+        self.assertEqual(question.last_answered_at, last_answered_at)
+
+    def test_create(self):
+        first = self.answer()
+        self.assertCounters(self.question, 1, first.created_at)
+        second = self.answer()
+        self.assertCounters(self.question, 2, second.created_at)
+        self.answer(is_active=False)
+        self.assertCounters(self.question, 2, second.created_at)
+
+    def test_deactivate_and_reactivate(self):
+        first = self.answer()
+        second = self.answer()
+        second.is_active = False
+        second.save()
+        self.assertCounters(self.question, 1, first.created_at)
+        # Saving again without a change must not count it twice
+        second.save()
+        self.assertCounters(self.question, 1, first.created_at)
+        # A freshly loaded instance knows what it counted towards
+        answer = LawyerAnswer.objects.get(pk=second.pk)
+        answer.is_active = True
+        answer.save()
+        self.assertCounters(self.question, 2, second.created_at)
+
+    def test_move_to_another_question(self):
+        answer = self.answer()
+        answer = LawyerAnswer.objects.get(pk=answer.pk)
+        answer.question = self.other
+        answer.save()
+        self.assertCounters(self.question, 0)
+        self.assertCounters(self.other, 1, answer.created_at)
+
+    def test_delete(self):
+        first = self.answer()
+        second = self.answer()
+        second.delete()
+        self.assertCounters(self.question, 1, first.created_at)
+        LawyerAnswer.objects.get(pk=first.pk).delete()
+        self.assertCounters(self.question, 0)
+        # Deleting an inactive answer leaves the counters alone
+        self.answer(is_active=False).delete()
+        self.assertCounters(self.question, 0)
+
+    def test_repair_drifted_counters(self):
+        answer = self.answer()
+        self.answer(question=self.other, is_active=False)
+        # Queryset updates fire no signals, so the counters drift
+        RecentQuestion.objects.filter(pk=self.question.pk).update(
+            answers_count=5, is_answered=False, last_answered_at=None
+        )
+        RecentQuestion.objects.filter(pk=self.other.pk).update(
+            answers_count=1, is_answered=True
+        )
+        out = StringIO()
+        call_command("repair_answer_counters", "--batch-size=1", stdout=out)
+        self.assertIn("(2 had drifted)", out.getvalue())
+        self.assertCounters(self.question, 1, answer.created_at)
+        self.assertCounters(self.other, 0)
+
+
+class VersionedLRUCacheTests(unittest.TestCase):
+    def test_lru_eviction(self):
+        lru = VersionedLRUCache(maxsize=2)
+        lru.set("a", 1, b"a")
+        lru.set("b", 1, b"b")
+        self.assertEqual(lru.get("a", 1), b"a")
+        # "b" is now the least recently used
+        lru.set("c", 1, b"c")
+        self.assertEqual(len(lru), 2)
+        self.assertIsNone(lru.get("b", 1))
+        self.assertEqual(lru.get("a", 1), b"a")
+        self.assertEqual(lru.get("c", 1), b"c")
+        self.assertEqual((lru.hits, lru.misses), (3, 1))
+
+    def test_ttl(self):
+        lru = VersionedLRUCache(ttl=60)
+        with mock.patch("main.caching.time.monotonic", return_value=1000.0):
+            lru.set("a", 1, b"a")
+        with mock.patch("main.caching.time.monotonic", return_value=1059.0):
+            self.assertEqual(lru.get("a", 1), b"a")
+        with mock.patch("main.caching.time.monotonic", return_value=1060.0):
+            self.assertIsNone(lru.get("a", 1))
+        self.assertEqual(len(lru), 0)
+
+    def test_version(self):
+        lru = VersionedLRUCache()
+        lru.set("a", 1, b"a")
+        self.assertIsNone(lru.get("a", 2))
+        # The stale entry is dropped, not served to older versions either
+        self.assertIsNone(lru.get("a", 1))
+
+
+@override_settings(AUTOCOMPLETE_ENABLED=False)
+class SearchCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        RecentQuestion.objects.create(question="مهریه و طلاق", category="family")
+
+    def setUp(self):
+        cache.clear()
+        views.SearchQuestionsView.cache.clear()
+        self.url = reverse("main:search_questions")
+
+    def search(self, query):
+        response = self.client.get(self.url, {"q": query})
+        titles = [row["question"] for row in response.json()["questions"]]
+        return response["X-Search-Cache"], titles
+
+    def test_hit(self):
+        self.assertEqual(self.search("طلاق"), ("MISS", ["مهریه و طلاق"]))
+        with self.assertNumQueries(0):
+            self.assertEqual(self.search("طلاق"), ("HIT", ["مهریه و طلاق"]))
+        # Spelling variants normalize to the same key
+        self.assertEqual(self.search(" طلاق\u200c "), ("HIT", ["مهریه و طلاق"]))
+
+    def test_invalidated_by_question_save(self):
+        self.assertEqual(self.search("طلاق"), ("MISS", ["مهریه و طلاق"]))
+        with self.captureOnCommitCallbacks(execute=True):
+            RecentQuestion.objects.create(question="طلاق توافقی", category="family")
+        state, titles = self.search("طلاق")
+        self.assertEqual(state, "MISS")
+        self.assertCountEqual(titles, ["مهریه و طلاق", "طلاق توافقی"])
+        self.assertEqual(self.search("طلاق")[0], "HIT")
+
+
+    @override_settings(AUTOCOMPLETE_ENABLED=True, AUTOCOMPLETE_REFRESH_INTERVAL=None)
+    def test_outdated_index_not_cached(self):
+        previous = autocomplete._index
+        self.addCleanup(setattr, autocomplete, "_index", previous)
+        autocomplete.build_autocomplete_index()
+        # Saved through another worker; this process's index refresh is pending
+        RecentQuestion.objects.create(question="طلاق غیابی", category="family")
+        bump_version(QUESTIONS)
+        self.assertEqual(self.search("طلاق")[0], "MISS")
+        self.assertEqual(self.search("طلاق")[0], "MISS")
+        autocomplete.refresh_autocomplete_index()
+        self.assertEqual(
+            self.search("طلاق"), ("MISS", ["طلاق غیابی", "مهریه و طلاق"])
+        )
+        self.assertEqual(self.search("طلاق")[0], "HIT")
+
+
+class QuestionStatsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.lawyer = User.objects.create_user("lawyer", password="x", is_staff=True)
+        categories = ["family", "family", "civil", "criminal", "civil"]
+        cls.questions = [
+            RecentQuestion.objects.create(question=f"سوال {i}", category=category)
+            for i, category in enumerate(categories)
+        ]
+        RecentQuestion.objects.create(
+            question="غیرفعال", category="family", is_active=False
+        )
+        cls.answer(cls.questions[0])
+        cls.answer(cls.questions[2])
+
+    @classmethod
+    def answer(cls, question):
+        return LawyerAnswer.objects.create(
+            question=question, lawyer=cls.lawyer, answer="پاسخ", short_answer="پاسخ"
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def assertMatchesCounts(self, stats):
+        active = RecentQuestion.objects.filter(is_active=True)
+        self.assertEqual(stats.total, active.count())
+        self.assertEqual(stats.answered, active.filter(is_answered=True).count())
+        self.assertEqual(stats.unanswered, active.filter(is_answered=False).count())
+        for category, _, total in stats.facets():
+            in_category = active.filter(category=category)
+            self.assertEqual(total, in_category.count())
+            for answered in (True, False):
+                self.assertEqual(
+                    stats.count(category=category, answered=answered),
+                    in_category.filter(is_answered=answered).count(),
+                )
+
+    def test_counts(self):
+        with self.assertNumQueries(1):
+            stats = get_question_stats()
+        self.assertMatchesCounts(stats)
+        self.assertEqual((stats.total, stats.answered), (5, 2))
+        self.assertEqual(stats.count(category="family"), 2)
+        self.assertEqual(stats.count(category="labor"), 0)
+        with self.assertNumQueries(0):
+            self.assertEqual(get_question_stats(), stats)
+
+    def test_invalidated_by_question_changes(self):
+        get_question_stats()
+        with self.captureOnCommitCallbacks(execute=True):
+            RecentQuestion.objects.create(question="سوال تازه", category="labor")
+        stats = get_question_stats()
+        self.assertEqual(stats.count(category="labor"), 1)
+        self.assertMatchesCounts(stats)
+
+        question = self.questions[1]
+        question.is_active = False
+        with self.captureOnCommitCallbacks(execute=True):
+            question.save()
+        stats = get_question_stats()
+        self.assertEqual(stats.count(category="family"), 1)
+        self.assertMatchesCounts(stats)
+
+    def test_invalidated_by_answer_changes(self):
+        get_question_stats()
+        with self.captureOnCommitCallbacks(execute=True):
+            answer = self.answer(self.questions[3])
+        stats = get_question_stats()
+        self.assertEqual(stats.answered, 3)
+        self.assertMatchesCounts(stats)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            answer.delete()
+        stats = get_question_stats()
+        self.assertEqual(stats.answered, 2)
+        self.assertMatchesCounts(stats)
+
+
+class KeysetPaginationTests(TestCase):
+    QUESTIONS = 30
+    ORDERINGS = {
+        "newest": ("-created_at", "-id"),
+        "oldest": ("created_at", "id"),
+        "answered": ("-created_at", "-id"),
+        "unanswered": ("-created_at", "-id"),
+    }
+
+    @classmethod
+    def setUpTestData(cls):
+        now = timezone.now()
+        questions = RecentQuestion.objects.bulk_create(
+            RecentQuestion(
+                question=f"سوال {i}", category="civil", is_answered=i % 2 == 0
+            )
+            for i in range(cls.QUESTIONS)
+        )
+        # Groups of three share a timestamp, so the id breaks the ties
+        for i, question in enumerate(questions):
+            RecentQuestion.objects.filter(pk=question.pk).update(
+                created_at=now - timedelta(minutes=i // 3)
+            )
+
+    def setUp(self):
+        cache.clear()
+        self.url = reverse("main:questions_list")
+
+    def expected(self, sort):
+        queryset = RecentQuestion.objects.filter(is_active=True)
+        if sort in ("answered", "unanswered"):
+            queryset = queryset.filter(is_answered=sort == "answered")
+        ordered = queryset.order_by(*self.ORDERINGS[sort])
+        return list(ordered.values_list("pk", flat=True))
+
+    def page(self, sort, cursor=None):
+        url = f"{self.url}?sort={sort}"
+        if cursor:
+            url += f"&cursor={cursor}"
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, url)
+        return response.context["page_obj"]
+
+    def test_forward_and_back(self):
+        for sort in self.ORDERINGS:
+            with self.subTest(sort=sort):
+                pages = [self.page(sort)]
+                while pages[-1].next_cursor:
+                    pages.append(self.page(sort, pages[-1].next_cursor))
+                seen = [question.pk for page in pages for question in page]
+                self.assertEqual(seen, self.expected(sort))
+                self.assertEqual(pages[-1].number, len(pages))
+
+                back = [pages[-1]]
+                while back[-1].previous_cursor:
+                    back.append(self.page(sort, back[-1].previous_cursor))
+                self.assertEqual(
+                    [[q.pk for q in page] for page in reversed(back)],
+                    [[q.pk for q in page] for page in pages],
+                )
+                self.assertFalse(back[-1].has_previous())
+
+    def test_stale_cursor(self):
+        first = self.page("newest")
+        cursor = first.next_cursor
+        # Everything after the first page is deactivated meanwhile
+        RecentQuestion.objects.exclude(pk__in=[q.pk for q in first]).update(
+            is_active=False
+        )
+        response = self.client.get(f"{self.url}?sort=newest&cursor={cursor}")
+        self.assertEqual(response.status_code, 404)
+
+    def test_empty_page_has_no_cursors(self):
+        page = KeysetPage([], 2, None, has_next=True, has_previous=True)
+        self.assertIsNone(page.next_cursor)
+        self.assertIsNone(page.previous_cursor)
+
+    def test_invalid_cursor(self):
+        response = self.client.get(f"{self.url}?cursor=not-a-cursor")
+        self.assertEqual(response.status_code, 404)
+
+
+@override_settings(AUTOCOMPLETE_REFRESH_INTERVAL=None)
+class QueryBudgetTests(QueryBudgetMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser("admin", password="x")
+        cls.questions = []
+        for i in range(8):
+            lawyer = User.objects.create_user(
+                f"lawyer{i}", first_name="وکیل", is_staff=True
+            )
+            question = RecentQuestion.objects.create(
+                question=f"سوال {i}", category="civil"
+            )
+            for _ in range(2):
+                LawyerAnswer.objects.create(
+                    question=question, lawyer=lawyer, answer="پاسخ", short_answer="پاسخ"
+                )
+            cls.questions.append(question)
+
+    def test_public_views(self):
+        for name in (
+            "main:home",
+            "main:questions_list",
+            "main:24_hours_consultation",
+            "main:phone_consultation",
+            "main:in_person_consultation",
+            "main:quick_legal_advice",
+            "main:retired_judge_consultation",
+            "main:contact",
+        ):
+            self.assertWithinQueryBudget(reverse(name))
+
+    def test_question_detail(self):
+        url = reverse("main:question_detail", args=[self.questions[0].pk])
+        self.assertWithinQueryBudget(url)
+
+    def test_search(self):
+        self.assertWithinQueryBudget(reverse("main:search_questions") + "?q=سوال")
+
+    def test_admin_changelists(self):
+        self.client.force_login(self.admin)
+        for name in ("recentquestion", "lawyeranswer", "consultationresponse"):
+            self.assertWithinQueryBudget(reverse(f"admin:main_{name}_changelist"))
+
+
+CSRF_TOKEN = re.compile(r'name="csrfmiddlewaretoken" value="[^"]*"')
+
+
+@override_settings(AUTOCOMPLETE_REFRESH_INTERVAL=None)
+class AsyncViewTests(TransactionTestCase):
+    """The async views must serve exactly what their sync twins serve"""
+
+    # Not TestCase: run_concurrently queries from other threads, which
+    # cannot see rows inside the test's transaction
+    def setUp(self):
+        cache.clear()
+        views.SearchQuestionsView.cache.clear()
+        lawyer = User.objects.create_user("lawyer", first_name="وکیل", is_staff=True)
+        ConsultationType.objects.create(
+            type_key="phone",
+            title="تلفنی",
+            description="",
+            icon="fas",
+            button_text="رزرو",
+        )
+        FAQ.objects.create(question="پرسش", answer="پاسخ")
+        self.questions = []
+        for i in range(15):
+            question = RecentQuestion.objects.create(
+                question=f"سوال طلاق {i}", category="family" if i % 2 else "civil"
+            )
+            if i % 3:
+                LawyerAnswer.objects.create(
+                    question=question, lawyer=lawyer, answer="پاسخ", short_answer="پاسخ"
+                )
+            self.questions.append(question)
+
+    async def assertSamePage(self, name, url, **kwargs):
+        sync_view = getattr(views, name)
+        async_view = getattr(async_views, name)
+        if isinstance(sync_view, type):
+            sync_view, async_view = sync_view.as_view(), async_view.as_view()
+
+        request = RequestFactory().get(url)
+        request.user = AnonymousUser()
+        expected = await sync_to_async(sync_view)(request, **kwargs)
+        request = AsyncRequestFactory().get(url)
+        request.user = AnonymousUser()
+        response = await async_view(request, **kwargs)
+        for r in (expected, response):
+            if hasattr(r, "render"):
+                await sync_to_async(r.render)()
+
+        self.assertEqual(response.status_code, expected.status_code, url)
+        self.assertEqual(
+            CSRF_TOKEN.sub("", response.content.decode()),
+            CSRF_TOKEN.sub("", expected.content.decode()),
+            url,
+        )
+
+    async def test_pages(self):
+        for name, route in (
+            ("home", "main:home"),
+            ("TwentyFourHoursConsultationView", "main:24_hours_consultation"),
+            ("PhoneConsultationView", "main:phone_consultation"),
+            ("InPersonConsultationView", "main:in_person_consultation"),
+            ("QuickLegalAdviceView", "main:quick_legal_advice"),
+            ("RetiredJudgeConsultationView", "main:retired_judge_consultation"),
+            ("ContactView", "main:contact"),
+        ):
+            await self.assertSamePage(name, reverse(route))
+
+    async def test_question_detail(self):
+        pk = self.questions[1].pk
+        url = reverse("main:question_detail", args=[pk])
+        await self.assertSamePage("QuestionDetailView", url, pk=pk)
+
+    async def test_question_detail_missing(self):
+        request = AsyncRequestFactory().get("/")
+        with self.assertRaises(Http404):
+            await async_views.QuestionDetailView.as_view()(request, pk=0)
+
+    async def test_questions_list(self):
+        url = reverse("main:questions_list")
+        for query in ("", "?page=2", "?category=family&sort=answered", "?sort=oldest"):
+            await self.assertSamePage("QuestionsListView", url + query)
+
+    async def test_search(self):
+        url = reverse("main:search_questions")
+        for query in ("?q=طلاق", "?q=طلاق", "?q=", "?q=ناموجود"):
+            await self.assertSamePage("SearchQuestionsView", url + query)
+        request = AsyncRequestFactory().get(url + "?q=طلاق")
+        response = await async_views.SearchQuestionsView.as_view()(request)
+        self.assertIn(ratelimit.session_cookie_name(), response.cookies)
+
+    async def test_record_queries_across_threads(self):
+        with record_queries() as recorder:
+            await async_views.run_concurrently(
+                lambda: list(RecentQuestion.objects.all()[:1]),
+                lambda: FAQ.objects.count(),
+            )
+        self.assertEqual(recorder.count, 2)
+
+    @override_settings(
+        PAGE_CACHE_ENABLED=True,
+        RESPONSE_COMPRESSION=True,
+        QUERY_BUDGET_SAMPLE_RATE=1.0,
+        QUERY_BUDGET_HEADERS=True,
+    )
+    async def test_middleware_under_asgi(self):
+        url = reverse("main:phone_consultation")
+        miss = await self.async_client.get(url, headers={"Accept-Encoding": "gzip"})
+        hit = await self.async_client.get(url, headers={"Accept-Encoding": "gzip"})
+        self.assertEqual((miss["X-Page-Cache"], hit["X-Page-Cache"]), ("MISS", "HIT"))
+        self.assertEqual(hit["Content-Encoding"], "gzip")
+        self.assertEqual(hit.content, miss.content)
+        # The view's queries ran on another thread and were still recorded
+        self.assertGreater(int(miss["X-DB-Queries"]), 0)
+        self.assertEqual(hit["X-DB-Queries"], "0")
+
+
+POSTGRES_TEST_URL = os.environ.get("POSTGRES_TEST_URL")
+
+
+class DatabaseSettingsTests(unittest.TestCase):
+    url = "postgres://user:secret@db:5432/dadpars"
+
+    def test_persistent_connections(self):
+        config = database_settings(self.url, {})
+        self.assertEqual(config["CONN_MAX_AGE"], 60)
+        self.assertTrue(config["CONN_HEALTH_CHECKS"])
+        self.assertEqual(config["OPTIONS"], {"prepare_threshold": 5})
+
+    def test_pool(self):
+        config = database_settings(
+            self.url, {"DB_POOL": "1", "DB_POOL_MAX_SIZE": "8", "DB_CONN_MAX_AGE": "60"}
+        )
+        # Django refuses a pool combined with persistent connections
+        self.assertEqual(config["CONN_MAX_AGE"], 0)
+        pool = config["OPTIONS"]["pool"]
+        self.assertEqual((pool["min_size"], pool["max_size"]), (2, 8))
+        self.assertIn("check", pool)
+
+    def test_pool_sized_for_threads(self):
+        def max_size(environ):
+            config = database_settings(self.url, {"DB_POOL": "1", **environ})
+            return config["OPTIONS"]["pool"]["max_size"]
+
+        self.assertEqual(max_size({}), 4)
+        self.assertEqual(max_size({"GUNICORN_THREADS": "6"}), 6)
+        # One connection per query run_concurrently fans out
+        with mock.patch("os.cpu_count", return_value=2):
+            self.assertEqual(max_size({"ASYNC_VIEWS": "1"}), 7)
+        with mock.patch("os.cpu_count", return_value=64):
+            self.assertEqual(max_size({"ASYNC_VIEWS": "1"}), 33)
+        self.assertEqual(max_size({"ASYNC_VIEWS": "1", "DB_POOL_MAX_SIZE": "10"}), 10)
+
+    def test_pgbouncer(self):
+        config = database_settings(
+            self.url, {"DB_PGBOUNCER": "1", "DB_POOL": "1", "DB_PREPARE_THRESHOLD": "5"}
+        )
+        self.assertTrue(config["DISABLE_SERVER_SIDE_CURSORS"])
+        self.assertEqual(config["OPTIONS"], {"prepare_threshold": None})
+
+    def test_sqlite_untouched(self):
+        config = database_settings("sqlite:///db.sqlite3", {"DB_POOL": "1"})
+        self.assertNotIn("pool", config.get("OPTIONS", {}))
+
+
+@unittest.skipUnless(POSTGRES_TEST_URL, "set POSTGRES_TEST_URL to a local PostgreSQL")
+class PostgresConnectionTests(unittest.TestCase):
+    """Connect to a real PostgreSQL with each connection mode"""
+
+    def connect(self, environ):
+        handler = ConnectionHandler(
+            {"default": database_settings(POSTGRES_TEST_URL, environ)}
+        )
+        conn = handler["default"]
+        self.addCleanup(conn.close_pool)
+        self.addCleanup(conn.close)
+        return conn
+
+    def backend_pid(self, conn):
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT pg_backend_pid()")
+            return cursor.fetchone()[0]
+
+    def prepared_statements(self, conn):
+        for _ in range(10):
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT %s::int + 1", [1])
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT count(*) FROM pg_prepared_statements")
+            return cursor.fetchone()[0]
+
+    def test_persistent_connection_is_reused(self):
+        conn = self.connect({"DB_CONN_MAX_AGE": "60"})
+        pid = self.backend_pid(conn)
+        conn.close_if_unusable_or_obsolete()
+        self.assertEqual(self.backend_pid(conn), pid)
+        self.assertGreater(self.prepared_statements(conn), 0)
+
+    def test_pooled_connection_is_reused(self):
+        conn = self.connect({"DB_POOL": "1", "DB_POOL_MIN_SIZE": "1"})
+        self.assertIsNotNone(conn.pool)
+        pid = self.backend_pid(conn)
+        # Closing hands the connection back to the pool
+        conn.close()
+        self.assertEqual(self.backend_pid(conn), pid)
+
+    def test_pgbouncer_mode_prepares_nothing(self):
+        conn = self.connect({"DB_PGBOUNCER": "1"})
+        self.assertEqual(self.prepared_statements(conn), 0)
+
+
+class ContentSnapshotTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.faq = FAQ.objects.create(question="سوال", answer="پاسخ")
+
+    def setUp(self):
+        cache.clear()
+
+    def test_cached_snapshot_costs_no_queries(self):
+        get_content_snapshot()
+        with self.assertNumQueries(0):
+            snapshot = get_content_snapshot()
+        self.assertEqual([faq.pk for faq in snapshot.faqs], [self.faq.pk])
+
+    def test_invalidated_after_commit(self):
+        before = get_content_snapshot()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.faq.is_active = False
+            self.faq.save()
+            # Until the commit other workers must keep serving the old rows
+            self.assertIs(get_content_snapshot(), before)
+        snapshot = get_content_snapshot()
+        self.assertIsNot(snapshot, before)
+        self.assertEqual(snapshot.faqs, ())
+        with self.assertNumQueries(0):
+            get_content_snapshot()
+
+
+@override_settings(FRAGMENT_CACHE_ENABLED=True, PAGE_CACHE_ENABLED=False)
+class FragmentCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        FAQ.objects.create(question="پرسش", answer="پاسخ")
+        Service.objects.create(title="خدمت", description="", icon="fas")
+
+    def setUp(self):
+        cache.clear()
+
+    def render(self, template, **context):
+        request = RequestFactory().get("/")
+        content = Template("{% load fragment_cache %}" + template).render(
+            Context({"request": request, **context})
+        )
+        return content, [state for _, state, _ in request.fragment_timings]
+
+    def test_invalidated_by_its_versions_only(self):
+        template = (
+            '{% fragmentcache "faqs" "faqs" %}{{ value }}{% endfragmentcache %}'
+            '{% fragmentcache "services" "services" %}{{ value }}'
+            "{% endfragmentcache %}"
+        )
+        self.assertEqual(self.render(template, value=1), ("11", ["miss", "miss"]))
+        self.assertEqual(self.render(template, value=2), ("11", ["hit", "hit"]))
+        bump_version(FAQS)
+        self.assertEqual(self.render(template, value=3), ("31", ["miss", "hit"]))
+        bump_version(SERVICES)
+        self.assertEqual(self.render(template, value=4), ("34", ["hit", "miss"]))
+
+    def test_home_skips_fragment_queries(self):
+        RecentQuestion.objects.create(question="سوال", category="civil")
+        first = self.client.get(reverse("main:home"))
+        with CaptureQueriesContext(connection) as queries:
+            second = self.client.get(reverse("main:home"))
+        self.assertEqual(second.content, first.content)
+        # Both question lists come from the cached fragment
+        self.assertFalse(
+            [q for q in queries if RecentQuestion._meta.db_table in q["sql"]]
+        )
+
+    @override_settings(SERVER_TIMING_HEADER=True)
+    def test_server_timing_header(self):
+        response = self.client.get(reverse("main:home"))
+        self.assertIn('fragment-home.faqs;desc="miss"', response["Server-Timing"])
+
+
+@override_settings(AUTOCOMPLETE_REFRESH_INTERVAL=None)
+class SyntheticDataTests(TestCase):
+    def test_seed_questions(self):
+        version = get_version(QUESTIONS)
+        created = synthetic.seed_questions(30, answers_per_question=2, batch_size=7)
+        synthetic.seed_consultation_requests(5)
+        synthetic.finish()
+        self.assertEqual(created, 30)
+        self.assertEqual(RecentQuestion.objects.count(), 30)
+        self.assertEqual(ConsultationRequest.objects.count(), 5)
+        questions = RecentQuestion.objects.annotate(
+            answers_total=Count("answers"), newest_answer=Max("answers__created_at")
+        )
+        for question in questions:
+            self.assertEqual(question.answers_count, question.answers_total)
+            self.assertEqual(question.last_answered_at, question.newest_answer)
+            self.assertEqual(question.is_answered, question.answers_count > 0)
+            self.assertIn(question.answers_count, (0, 2))
+        # finish() indexes the bulk-inserted questions and invalidates caches
+        self.assertGreater(get_version(QUESTIONS), version)
+        topic = synthetic.TOPICS["civil"][0]
+        expected = RecentQuestion.objects.filter(
+            is_active=True, question__contains=topic
+        ).count()
+        results = get_search_backend().search(topic, limit=100)
+        self.assertEqual(len(results), expected)
+
+    def test_bench_views_smoke(self):
+        path = os.path.join(tempfile.mkdtemp(), "bench.json")
+        self.addCleanup(shutil.rmtree, os.path.dirname(path))
+        cache.set("live-worker-entry", 1)
+        version = get_version(QUESTIONS)
+        call_command(
+            "bench_views",
+            "--size=20",
+            "--requests=1",
+            "--warmup=0",
+            "--cold",
+            f"--json={path}",
+            stdout=StringIO(),
+        )
+        # The benchmark ran on caches of its own
+        self.assertEqual(cache.get("live-worker-entry"), 1)
+        self.assertEqual(get_version(QUESTIONS), version)
+        with open(path) as handle:
+            routes = json.load(handle)["routes"]
+        self.assertIn("search_questions", routes)
+        self.assertIn("sitemap_questions", routes)
+        self.assertEqual({row["status"] for row in routes.values()}, {200})
+
+    def test_bench_views_server(self):
+        path = os.path.join(tempfile.mkdtemp(), "bench.json")
+        self.addCleanup(shutil.rmtree, os.path.dirname(path))
+        call_command(
+            "bench_views",
+            "--size=20",
+            "--requests=1",
+            "--warmup=0",
+            "--cold",
+            "--server",
+            "--route=home",
+            "--route=questions_list",
+            f"--json={path}",
+            stdout=StringIO(),
+        )
+        with open(path) as handle:
+            routes = json.load(handle)["routes"]
+        for row in routes.values():
+            self.assertEqual(row["status"], 200)
+            # Counted on the server's threads, with the caches cleared
+            self.assertGreater(row["queries"], 0)
+
+
+class NormalizationTests(unittest.TestCase):
+    def test_normalize_text(self):
+        cases = [
+            ("علي", "علی"),  # Arabic yeh
+            ("مصطفى", "مصطفی"),  # alef maksura
+            ("مسئله", "مسیله"),  # hamza on yeh
+            ("كتاب", "کتاب"),  # Arabic kaf
+            ("مؤسسه", "موسسه"),
+            ("آزاد", "ازاد"),
+            ("خانة", "خانه"),
+            ("ﻛﺘﺎﺏ", "کتاب"),  # presentation forms
+            ("می\u200cخواهم", "می خواهم"),  # ZWNJ
+            ("نیم\u200fفاصله\u200d", "نیم فاصله"),
+            ("ماده ۱۲۳", "ماده 123"),  # Persian digits
+            ("ماده ١٢٣", "ماده 123"),  # Arabic-Indic digits
+            ("حُکمِ دادگاه", "حکم دادگاه"),  # diacritics
+            ("قاضـــی", "قاضی"),  # tatweel
+            ("  Civil\tLAW  ", "civil law"),
+            ("", ""),
+            (None, ""),
+        ]
+        for text, expected in cases:
+            with self.subTest(text=text):
+                self.assertEqual(normalize_text(text), expected)
+
+    def test_saving_fills_normalized_columns(self):
+        question = RecentQuestion(question="كيفيت", description="ماده ۱۲")
+        normalize_fields(question, {})
+        self.assertEqual(question.question_normalized, "کیفیت")
+        self.assertEqual(question.description_normalized, "ماده 12")
+        kwargs = {"update_fields": ["question"]}
+        question.question = "ملك"
+        question.description = "ماده ۱۳"
+        normalize_fields(question, kwargs)
+        self.assertEqual(kwargs["update_fields"], {"question", "question_normalized"})
+        self.assertEqual(question.question_normalized, "ملک")
+        self.assertEqual(question.description_normalized, "ماده 12")
+        answer = LawyerAnswer(answer="حكم ۱", short_answer="مسئله")
+        normalize_fields(answer, {})
+        self.assertEqual(answer.answer_normalized, "حکم 1")
+        self.assertEqual(answer.short_answer_normalized, "مسیله")
+
+
+class NormalizeSearchColumnsTests(TestCase):
+    def test_backfills_bulk_created_rows(self):
+        lawyer = User.objects.create_user("lawyer", password="x", is_staff=True)
+        question = RecentQuestion.objects.create(question="سوال")
+        # bulk_create skips save(), leaving the columns empty
+        RecentQuestion.objects.bulk_create([RecentQuestion(question="كيفيت")])
+        LawyerAnswer.objects.bulk_create(
+            [
+                LawyerAnswer(
+                    question=question,
+                    lawyer=lawyer,
+                    answer="حكم ۱",
+                    short_answer="مسئله",
+                )
+            ]
+        )
+        out = StringIO()
+        call_command("normalize_search_columns", "--missing-only", stdout=out)
+        self.assertIn("Normalized 1 recentquestion rows", out.getvalue())
+        self.assertIn("Normalized 1 lawyeranswer rows", out.getvalue())
+        self.assertTrue(
+            RecentQuestion.objects.filter(question_normalized="کیفیت").exists()
+        )
+        answer = LawyerAnswer.objects.get()
+        self.assertEqual(answer.answer_normalized, "حکم 1")
+        self.assertEqual(answer.short_answer_normalized, "مسیله")
+
+        out = StringIO()
+        call_command("normalize_search_columns", "--missing-only", stdout=out)
+        self.assertIn("Normalized 0 lawyeranswer rows", out.getvalue())
+        self.assertNotIn("Rebuilt search index", out.getvalue())
+
+
+@unittest.skipUnless(connection.vendor == "sqlite", "needs SQLite FTS5")
+class SQLiteSearchTests(TransactionTestCase):
+    # Every save commits, as in production: SQLite 3.40 corrupts an FTS5
+    # table when a prefix query runs between a delete and an insert of one
+    # transaction
+    backend = SQLiteFTSSearchBackend()
+
+    def setUp(self):
+        # The flush between tests leaves the virtual table alone
+        self.backend.rebuild()
+
+    def ids(self, query, backend=backend):
+        return [question.pk for question in backend.search(query)]
+
+    def test_index_follows_saves(self):
+        question = RecentQuestion.objects.create(
+            question="تقسیم ارث", description="سهم الارث فرزندان"
+        )
+        self.assertEqual(self.ids("ارث"), [question.pk])
+        self.assertEqual(self.ids("فرزند"), [question.pk])
+        question.question = "مهریه"
+        question.description = ""
+        question.save()
+        self.assertEqual(self.ids("ارث"), [])
+        self.assertEqual(self.ids("مهر"), [question.pk])
+        question.is_active = False
+        question.save()
+        self.assertEqual(self.ids("مهریه"), [])
+        question.is_active = True
+        question.save()
+        self.assertEqual(self.ids("مهریه"), [question.pk])
+        question.delete()
+        self.assertEqual(self.ids("مهریه"), [])
+
+    def test_rebuild_after_bulk_create(self):
+        RecentQuestion.objects.bulk_create(
+            [
+                RecentQuestion(question="چک برگشتی", question_normalized="چک برگشتی"),
+                RecentQuestion(
+                    question="چک صیادی", question_normalized="چک صیادی", is_active=False
+                ),
+            ]
+        )
+        # bulk_create sends no signals
+        self.assertEqual(self.ids("چک"), [])
+        call_command("rebuild_search_index", stdout=StringIO())
+        self.assertEqual(
+            [question.question for question in self.backend.search("چک")],
+            ["چک برگشتی"],
+        )
+
+    def test_letter_variants(self):
+        for backend in (self.backend, DatabaseSearchBackend()):
+            with self.subTest(backend=backend.__class__.__name__):
+                arabic = RecentQuestion.objects.create(question="كيفيت مسئله ملك")
+                persian = RecentQuestion.objects.create(
+                    question="می‌خواهم ماده ۱۲ را بدانم"
+                )
+                self.assertEqual(self.ids("کیفیت", backend), [arabic.pk])
+                self.assertEqual(self.ids("مسیله ملک", backend), [arabic.pk])
+                self.assertEqual(self.ids("خواهم ١٢", backend), [persian.pk])
+                self.assertEqual(self.ids("ماده 12", backend), [persian.pk])
+                arabic.delete()
+                persian.delete()
+
+
+@override_settings(AUTOCOMPLETE_REFRESH_INTERVAL=None)
+class AutocompleteTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.questions = [
+            RecentQuestion.objects.create(question=title, category="civil")
+            for title in ("مهریه و طلاق", "تقسیم ارث", "طلاق توافقی", "چک برگشتی")
+        ]
+
+    def setUp(self):
+        cache.clear()
+        views.SearchQuestionsView.cache.clear()
+        previous = autocomplete._index
+        self.addCleanup(setattr, autocomplete, "_index", previous)
+        self.index = autocomplete.build_autocomplete_index()
+
+    def titles(self, query):
+        return [row["question"] for row in self.index.search(query)]
+
+    def test_search(self):
+        self.assertEqual(self.titles("طلا"), ["طلاق توافقی", "مهریه و طلاق"])
+        self.assertEqual(self.titles("طلاق مه"), ["مهریه و طلاق"])
+        self.assertEqual(self.titles("ارث طلاق"), [])
+        self.assertEqual(self.titles("ارث چک"), [])
+        self.assertGreater(self.index.memory_usage(), 0)
+
+    def test_refresh_applies_changes_of_other_workers(self):
+        question = self.questions[3]
+        # Queryset updates, like a save in another process, fire no signals
+        RecentQuestion.objects.filter(pk=question.pk).update(
+            question="چک صیادی",
+            question_normalized=normalize_text("چک صیادی"),
+            updated_at=timezone.now(),
+        )
+        RecentQuestion.objects.filter(pk=self.questions[1].pk).update(
+            is_active=False, updated_at=timezone.now()
+        )
+        bump_version(QUESTIONS)
+        # Measuring walks the whole index, so only builds do it
+        with mock.patch.object(self.index, "_measure") as measure:
+            self.assertIs(autocomplete.refresh_autocomplete_index(), self.index)
+        measure.assert_not_called()
+        self.assertEqual(self.titles("صیاد"), ["چک صیادی"])
+        self.assertEqual(self.titles("برگشتی"), [])
+        self.assertEqual(self.titles("ارث"), [])
+        self.assertEqual(self.index.version, get_version(QUESTIONS))
+
+    def test_refresh_rebuilds_after_delete(self):
+        # Deleted in another process, whose index this one never sees
+        autocomplete._index = None
+        with self.captureOnCommitCallbacks(execute=True):
+            self.questions[1].delete()
+        autocomplete._index = self.index
+        index = autocomplete.refresh_autocomplete_index()
+        self.assertIsNot(index, self.index)
+        self.assertEqual(len(index), 3)
+        self.assertEqual(index.search("ارث"), [])
+
+    def test_signals_update_index(self):
+        version = get_version(QUESTIONS)
+        with self.captureOnCommitCallbacks(execute=True):
+            question = RecentQuestion.objects.create(question="طلاق غیابی")
+            # Nothing changes before the commit
+            self.assertEqual(get_version(QUESTIONS), version)
+            self.assertEqual(self.titles("غیا"), [])
+        self.assertEqual(self.titles("غیا"), ["طلاق غیابی"])
+        self.assertEqual(self.titles("طلاق")[0], "طلاق غیابی")
+        with self.captureOnCommitCallbacks(execute=True):
+            question.delete()
+        self.assertEqual(self.titles("غیا"), [])
+        self.assertEqual(self.index.version, get_version(QUESTIONS))
+
+    def test_search_view_tops_up_from_descriptions(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            RecentQuestion.objects.create(
+                question="تقسیم ترکه", description="سهم ارث فرزندان", category="civil"
+            )
+        response = self.client.get(reverse("main:search_questions") + "?q=ارث")
+        self.assertEqual(
+            [row["question"] for row in response.json()["questions"]],
+            ["تقسیم ارث", "تقسیم ترکه"],
+        )
+
+    def test_search_view_without_index(self):
+        autocomplete._index = None
+        response = self.client.get(reverse("main:search_questions") + "?q=ارث")
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("X-Autocomplete-Index-Size", response)
+        self.assertEqual(
+            [row["question"] for row in response.json()["questions"]], ["تقسیم ارث"]
+        )
+
+
+class ImportExportTests(TestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.path = os.path.join(directory, "qa.jsonl")
+        lawyer = User.objects.create_user("lawyer", first_name="وکیل", is_staff=True)
+        for i in range(3):
+            question = RecentQuestion.objects.create(question=f"سوال {i}")
+            LawyerAnswer.objects.create(
+                question=question, lawyer=lawyer, answer=f"پاسخ {i}", short_answer="-"
+            )
+        call_command("export_qa", self.path, stdout=StringIO())
+        self.expected = list(
+            RecentQuestion.objects.order_by("pk").values_list("pk", "question")
+        )
+
+    def run_import(self, *args):
+        call_command("import_qa", self.path, "--batch-size=1", *args, stdout=StringIO())
+
+    def clear(self):
+        RecentQuestion.objects.all().delete()
+        User.objects.all().delete()
+
+    def test_resume_after_truncated_export(self):
+        with open(self.path, "rb") as f:
+            complete = f.read()
+        # The export was cut off in the middle of the third question
+        lines = complete.splitlines(keepends=True)
+        with open(self.path, "wb") as f:
+            f.write(b"".join(lines[:3]) + lines[3][:20])
+        self.clear()
+        with self.assertRaisesMessage(CommandError, "export_qa --resume"):
+            self.run_import()
+        self.assertEqual(RecentQuestion.objects.count(), 1)
+        self.assertTrue(os.path.exists(self.path + ".checkpoint"))
+
+        # What export_qa --resume leaves: the torn line completed, the rest
+        # appended
+        with open(self.path, "wb") as f:
+            f.write(complete)
+        first = self.expected[0][0]
+        RecentQuestion.objects.filter(pk=first).update(question="ویرایش‌شده")
+        # Resumes after the first question, which is therefore not written again
+        self.run_import()
+        self.assertEqual(
+            list(RecentQuestion.objects.order_by("pk").values_list("pk", "question")),
+            [(first, "ویرایش‌شده"), *self.expected[1:]],
+        )
+        self.assertEqual(LawyerAnswer.objects.count(), 3)
+        self.assertFalse(os.path.exists(self.path + ".checkpoint"))
+
+    def test_refuses_to_resume_changed_file(self):
+        with open(self.path, "rb") as f:
+            lines = f.read().splitlines(keepends=True)
+        with open(self.path, "wb") as f:
+            f.write(b"".join(lines[:3]) + b"{")
+        self.clear()
+        with self.assertRaises(CommandError):
+            self.run_import()
+        # A new export under the same name
+        with open(self.path, "wb") as f:
+            f.write(b"".join(lines[:1] + lines[2:]))
+        with self.assertRaisesMessage(CommandError, "--restart"):
+            self.run_import()
+        self.run_import("--restart")
+        self.assertEqual(RecentQuestion.objects.count(), 3)
+        self.assertEqual(LawyerAnswer.objects.count(), 3)
+
+
+class WarmupTests(TestCase):
+    def test_warmup(self):
+        report = warmup()
+        loader = engines["django"].engine.template_loaders[0]
+        # Compiled into the cached loader, ready for the first request
+        self.assertIn("main/home.html", loader.get_template_cache)
+        self.assertIn("main/base.html", loader.get_template_cache)
+        self.assertEqual(report["templates_count"], 12)
+        self.assertGreaterEqual(report["urls_count"], 13)
+        self.assertEqual(report["content_count"], 3)
+        self.assertGreater(report["warmup"], 0)
+
+
+class StaticBundleTests(TestCase):
+    def test_minify_css(self):
+        self.assertEqual(
+            minify_css('a :hover , b > c {\n  content: " ; } " ; /* x */\n}\n'),
+            'a :hover,b>c{content:" ; } "}\n',
+        )
+
+    def test_minify_js(self):
+        source = (
+            "// comment\n"
+            "    const url = `${base}/x`; /* inline */\n"
+            "    html = `\n        <p>  ${a ? `${b}` : ''}  </p>`;\n"
+            '    let s = "// kept", r = /a\\/b/g;\n'
+        )
+        self.assertEqual(
+            minify_js(source),
+            "const url = `${base}/x`;\n"
+            "html = `\n        <p>  ${a ? `${b}` : ''}  </p>`;\n"
+            'let s = "// kept", r = /a\\/b/g;\n',
+        )
+
+    def test_bundles_up_to_date(self):
+        call_command("minify_static", check=True, stdout=StringIO())
+
+    def test_base_links_bundles(self):
+        content = self.client.get(reverse("main:contact")).content.decode()
+        self.assertIn("/static/css/site.min.css", content)
+        self.assertIn('data-search-url="/search/questions/"', content)
+        self.assertNotIn("<style>", content)
+
+    def test_base_links_built_tailwind(self):
+        content = self.client.get(reverse("main:contact")).content.decode()
+        self.assertIn("/static/css/tailwind.min.css", content)
+        self.assertNotIn("cdn.tailwindcss.com", content)
+
+    def test_oklch_to_hex(self):
+        self.assertEqual(
+            oklch_to_hex(
+                "a{color:oklch(62.3% .214 259.815)}"
+                "b{color:oklch(100% 0 0)}"
+                "c{color:oklch(63.7% .237 25.331 / 50%)}"
+            ),
+            "a{color:#2b7fff}b{color:#ffffff}c{color:#fb2c3680}",
+        )
+
+    def test_tailwind_colors_are_srgb(self):
+        path = finders.find("css/tailwind.min.css")
+        with open(path, encoding="utf-8") as handle:
+            self.assertNotIn("oklch(", handle.read())
+
+    @unittest.skipUnless(shutil.which("tailwindcss"), "needs the Tailwind CLI")
+    def test_tailwind_up_to_date(self):
+        call_command("build_css", check=True, stdout=StringIO())
+
+
+@override_settings(HTML_MINIFY=True, RESPONSE_COMPRESSION=True, PAGE_CACHE_ENABLED=True)
+class CompressionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_minify_html(self):
+        self.assertEqual(
+            minify_html(
+                '<div  class="a\n   b"  title="x  y">\n    hi   <!-- c -->\n'
+                "<pre>  a\n  b</pre> <script>  x  </script>\n"
+                "<textarea>\n  t</textarea><!--[if IE]> x <![endif]--></div>\n"
+            ),
+            '<div class="a\nb" title="x  y">\nhi \n'
+            "<pre>  a\n  b</pre> <script>  x  </script>\n"
+            "<textarea>\n  t</textarea><!--[if IE]> x <![endif]--></div>\n",
+        )
+
+    def test_gzip_response(self):
+        url = reverse("main:questions_list")
+        plain = self.client.get(url)
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING="gzip, deflate")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertIn("Accept-Encoding", response["Vary"])
+        self.assertEqual(gzip.decompress(response.content), plain.content)
+        self.assertEqual(plain.content.decode(), minify_html(plain.content.decode()))
+        self.assertNotIn("Content-Encoding", plain)
+
+    def test_malformed_accept_encoding(self):
+        url = reverse("main:questions_list")
+        for header in ("gzip;q=1.0.0", "br;q=.", "gzip;q=2", "gzip;q=x, br;q=0"):
+            response = self.client.get(url, HTTP_ACCEPT_ENCODING=header)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn("Content-Encoding", response)
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING="br;q=., gzip;q=0.5")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+
+    def test_page_cache_stores_compressed_variants(self):
+        url = reverse("main:phone_consultation")
+        miss = self.client.get(url, HTTP_ACCEPT_ENCODING="gzip")
+        hit = self.client.get(url, HTTP_ACCEPT_ENCODING="gzip")
+        plain = self.client.get(url)
+        self.assertEqual((miss["X-Page-Cache"], hit["X-Page-Cache"]), ("MISS", "HIT"))
+        self.assertEqual(hit["Content-Encoding"], "gzip")
+        self.assertEqual(gzip.decompress(hit.content), plain.content)
+        self.assertEqual(hit.content, miss.content)
+        self.assertNotIn("Content-Encoding", plain)
+
+
+@override_settings(PAGE_CACHE_ENABLED=True)
+class PageCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.url = reverse("main:phone_consultation")
+
+    def get(self, url=None, **extra):
+        return self.client.get(url or self.url, **extra)["X-Page-Cache"]
+
+    def lock_key(self, url):
+        request = RequestFactory().get(url)
+        return AnonymousPageCacheMiddleware(None).cache_key(request) + ":lock"
+
+    def test_query_strings_share_one_entry(self):
+        self.assertEqual(self.get(), "MISS")
+        self.assertEqual(self.get(self.url + "?x=1"), "HIT")
+        self.assertEqual(self.get(self.url + "?utm_source=a&x=2"), "HIT")
+        with override_settings(PAGE_CACHE_QUERY_PARAMS=["lang"]):
+            self.client = self.client_class()
+            self.assertEqual(self.get(self.url + "?lang=en&x=1"), "MISS")
+            self.assertEqual(self.get(self.url + "?x=2&lang=en"), "HIT")
+            self.assertEqual(self.get(self.url + "?x=3"), "HIT")
+
+    def test_canonical_url_without_query_string(self):
+        response = self.client.get(self.url + "?evil=attacker")
+        self.assertEqual(response["X-Page-Cache"], "MISS")
+        response = self.client.get(self.url)
+        self.assertEqual(response["X-Page-Cache"], "HIT")
+        self.assertContains(
+            response, f'<link rel="canonical" href="http://testserver{self.url}"'
+        )
+        self.assertNotContains(response, "attacker")
+
+    def test_stale_while_revalidate(self):
+        self.assertEqual(self.get(), "MISS")
+        bump_version(FAQS)
+        # Another worker is regenerating the page
+        lock = self.lock_key(self.url)
+        cache.set(lock, 1)
+        self.assertEqual(self.get(), "STALE")
+        cache.delete(lock)
+        self.assertEqual(self.get(), "REFRESH")
+        self.assertIsNone(cache.get(lock))
+        self.assertEqual(self.get(), "HIT")
+
+    def test_invalidated_by_its_own_versions(self):
+        home = reverse("main:home")
+        self.assertEqual(self.get(), "MISS")
+        self.assertEqual(self.get(home), "MISS")
+        # Landing pages show no questions or answers
+        bump_version(QUESTIONS)
+        self.assertEqual(self.get(), "HIT")
+        self.assertEqual(self.get(home), "REFRESH")
+        bump_version(SERVICES)
+        self.assertEqual(self.get(), "HIT")
+        self.assertEqual(self.get(home), "REFRESH")
+        bump_version(FAQS)
+        self.assertEqual(self.get(), "REFRESH")
+        self.assertEqual(self.get(home), "REFRESH")
+
+    @override_settings(PAGE_CACHE_TTL=-1)
+    def test_expired_page_refreshed(self):
+        self.assertEqual(self.get(), "MISS")
+        self.assertEqual(self.get(), "REFRESH")
+
+    def test_bypass(self):
+        user = User.objects.create_user("visitor", password="x")
+        self.client.force_login(user)
+        self.assertEqual(self.get(), "BYPASS")
+        self.client.logout()
+        self.assertEqual(self.get(), "MISS")
+        self.assertEqual(self.client.post(self.url).status_code, 405)
+        self.assertEqual(self.get(), "HIT")
+        # Pages outside PAGE_CACHE_VERSIONS are not labelled at all
+        response = self.client.get(reverse("main:questions_list"))
+        self.assertNotIn("X-Page-Cache", response)
+
+    def test_csrf_and_cookies_not_stored(self):
+        # Pages with a CSRF form could never be stored, so they are not
+        # looked up or counted as misses
+        response = self.client.get(reverse("main:contact"))
+        self.assertIn("csrftoken", response.cookies)
+        self.assertNotIn("X-Page-Cache", response)
+        middleware = AnonymousPageCacheMiddleware(None)
+        request = RequestFactory().get(self.url)
+        response = HttpResponse("x")
+        self.assertTrue(middleware.is_storable(request, response))
+        response.set_cookie("tracking", "1")
+        self.assertFalse(middleware.is_storable(request, response))
+
+
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.lawyer = User.objects.create_user("lawyer", password="x", is_staff=True)
+        cls.question = RecentQuestion.objects.create(question="سوال", category="civil")
+        cls.answer = LawyerAnswer.objects.create(
+            question=cls.question, lawyer=cls.lawyer, answer="پاسخ", short_answer="پاسخ"
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.url = reverse("main:question_detail", args=[self.question.pk])
+
+    def revalidate(self, url, response):
+        return self.client.get(
+            url,
+            HTTP_IF_NONE_MATCH=response["ETag"],
+            HTTP_IF_MODIFIED_SINCE=response.get("Last-Modified", ""),
+        )
+
+    def test_question_not_modified(self):
+        response = self.client.get(self.url)
+        self.assertIn("no-cache", response["Cache-Control"])
+        with self.assertNumQueries(1):
+            not_modified = self.revalidate(self.url, response)
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(not_modified["ETag"], response["ETag"])
+        self.assertEqual(not_modified.content, b"")
+        since = self.client.get(
+            self.url, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"]
+        )
+        self.assertEqual(since.status_code, 304)
+
+    def test_question_changes(self):
+        response = self.client.get(self.url)
+        # Hiding an answer moves the question's updated_at via the counters
+        self.answer.is_active = False
+        self.answer.save()
+        changed = self.revalidate(self.url, response)
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed["ETag"], response["ETag"])
+        LawyerAnswer.objects.filter(pk=self.answer.pk).update(is_active=True)
+        self.answer.refresh_from_db()
+        self.answer.answer = "پاسخ تازه"
+        self.answer.save()
+        self.assertEqual(self.revalidate(self.url, changed).status_code, 200)
+
+    def test_list_not_modified(self):
+        url = reverse("main:questions_list")
+        response = self.client.get(url)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.revalidate(url, response).status_code, 304)
+        bump_version(QUESTIONS)
+        self.assertEqual(self.revalidate(url, response).status_code, 200)
+
+    def test_logged_in_users_get_full_pages(self):
+        self.client.force_login(self.lawyer)
+        response = self.client.get(self.url)
+        self.assertNotIn("ETag", response)
+        self.assertEqual(
+            self.client.get(self.url, HTTP_IF_NONE_MATCH="*").status_code, 200
+        )
+
+    def test_missing_question(self):
+        response = self.client.get(reverse("main:question_detail", args=[0]))
+        self.assertEqual(response.status_code, 404)
+
+
+@override_settings(SITEMAP_CHUNK_SIZE=10)
+class SitemapTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.lawyer = User.objects.create_user("lawyer", password="x", is_staff=True)
+        cls.questions = [
+            RecentQuestion.objects.create(question=f"سوال {n}", category="civil")
+            for n in range(3)
+        ]
+        cls.hidden = RecentQuestion.objects.create(
+            question="پنهان", category="civil", is_active=False
+        )
+
+    def setUp(self):
+        self.output = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.output)
+
+    def chunk_url(self, question):
+        return reverse("main:sitemap_questions", args=[question.pk // 10])
+
+    def generate(self, *args):
+        call_command(
+            "generate_sitemaps",
+            "--base-url=https://example.com",
+            f"--output={self.output}",
+            *args,
+            stdout=StringIO(),
+        )
+
+    def test_index_lists_chunks(self):
+        response = self.client.get(reverse("main:sitemap_index"))
+        self.assertEqual(response["Content-Type"], "application/xml; charset=utf-8")
+        self.assertContains(response, reverse("main:sitemap_pages"))
+        self.assertContains(response, self.chunk_url(self.questions[0]))
+
+    def test_chunk_streams_questions(self):
+        question = self.questions[0]
+        answered_at = timezone.now() + timedelta(days=1)
+        answer = LawyerAnswer.objects.create(
+            question=question, lawyer=self.lawyer, answer="پاسخ", short_answer="پاسخ"
+        )
+        LawyerAnswer.objects.filter(pk=answer.pk).update(updated_at=answered_at)
+        response = self.client.get(self.chunk_url(question))
+        self.assertTrue(response.streaming)
+        content = b"".join(response.streaming_content).decode()
+        url = reverse("main:question_detail", args=[question.pk])
+        self.assertIn(
+            f"<loc>http://testserver{url}</loc>"
+            f"<lastmod>{answered_at.isoformat(timespec='seconds')}</lastmod>",
+            content,
+        )
+        hidden = reverse("main:question_detail", args=[self.hidden.pk])
+        self.assertNotIn(f"{hidden}<", content)
+
+    def test_streamed_chunk_is_gzipped(self):
+        url = self.chunk_url(self.questions[0])
+        plain = b"".join(self.client.get(url).streaming_content)
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(gzip.decompress(b"".join(response.streaming_content)), plain)
+
+    def test_serves_generated_files(self):
+        self.generate()
+        with override_settings(SITEMAP_ROOT=self.output), self.assertNumQueries(0):
+            response = self.client.get(reverse("main:sitemap_index"))
+            gzipped = self.client.get(
+                self.chunk_url(self.questions[0]), HTTP_ACCEPT_ENCODING="gzip"
+            )
+        self.assertContains(response, "https://example.com/sitemap-pages.xml")
+        self.assertEqual(gzipped["Content-Encoding"], "gzip")
+        content = gzip.decompress(b"".join(gzipped.streaming_content)).decode()
+        self.assertIn(f"https://example.com/question/{self.questions[0].pk}/", content)
+
+    def test_incremental_generation(self):
+        self.generate()
+        for name in os.listdir(self.output):
+            os.utime(os.path.join(self.output, name), (0, 0))
+        self.generate()
+        path = os.path.join(
+            self.output, sitemaps.chunk_name(self.questions[0].pk // 10)
+        )
+        self.assertEqual(os.path.getmtime(path), 0)
+
+        question = RecentQuestion.objects.create(question="تازه", category="civil")
+        self.generate()
+        path = os.path.join(self.output, sitemaps.chunk_name(question.pk // 10))
+        self.assertNotEqual(os.path.getmtime(path), 0)
+        with open(path) as handle:
+            self.assertIn(f"/question/{question.pk}/", handle.read())
+
+        RecentQuestion.objects.update(is_active=False)
+        self.generate("--full")
+        self.assertEqual(
+            [name for name in os.listdir(self.output) if "questions" in name], []
+        )
+
+    def test_empty_chunk_not_found(self):
+        response = self.client.get(reverse("main:sitemap_questions", args=[999]))
+        self.assertEqual(response.status_code, 404)
+
+    def test_robots_txt(self):
+        response = self.client.get("/robots.txt")
+        self.assertContains(response, "Sitemap: http://testserver/sitemap.xml")
+
+
+@override_settings(AUTOCOMPLETE_REFRESH_INTERVAL=None)
+class RateLimitTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        ratelimit.get_store().clear()
+
+    def test_token_bucket(self):
+        capacity, per_second = ratelimit.parse_rate("2/10s")
+        self.assertEqual((capacity, per_second), (2, 0.2))
+        bucket = None
+        waits = []
+        for now in (0, 0, 0, 2.5, 5):
+            bucket, wait = ratelimit.refill(bucket, capacity, per_second, now)
+            waits.append(wait)
+        self.assertEqual(waits, [0, 0, 5, 2.5, 0])
+
+    @override_settings(RATE_LIMITS={"search_questions": {"ip": "2/m"}})
+    def test_search_rejected(self):
+        url = reverse("main:search_questions") + "?q=x"
+        before = metrics.local_counters().get("ratelimit.search_questions.ip", 0)
+        for _ in range(2):
+            self.assertEqual(self.client.get(url).status_code, 200)
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response.json()["questions"], [])
+        self.assertEqual(response["Retry-After"], "30")
+        self.assertEqual(
+            metrics.local_counters()["ratelimit.search_questions.ip"], before + 1
+        )
+        other = self.client.get(url, REMOTE_ADDR="10.0.0.2")
+        self.assertEqual(other.status_code, 200)
+
+    @override_settings(RATE_LIMITS={"consultation_request": {"phone": "1/h"}})
+    def test_consultation_phone_rejected(self):
+        url = reverse("main:consultation_request")
+        self.client.post(url, {"phone": "09121234567"}, REMOTE_ADDR="10.0.0.1")
+        with self.assertNumQueries(0):
+            response = self.client.post(
+                url, {"phone": "+98 ۹۱۲ ۱۲۳ ۴۵۶۷"}, REMOTE_ADDR="10.0.0.2"
+            )
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+    @override_settings(
+        RATE_LIMIT_STORE="cache", RATE_LIMITS={"search_questions": {"ip": "1/m"}}
+    )
+    def test_shared_store(self):
+        url = reverse("main:search_questions") + "?q=x"
+        self.assertEqual(self.client.get(url).status_code, 200)
+        # Another worker sees the same bucket through the cache
+        self.assertIsNot(ratelimit.get_store(), ratelimit.get_store())
+        self.assertEqual(self.client.get(url).status_code, 429)
+
+    def test_client_ip_behind_proxy(self):
+        factory = RequestFactory()
+        proxied = factory.get("/", REMOTE_ADDR="172.17.0.1", HTTP_X_REAL_IP="5.6.7.8")
+        self.assertEqual(ratelimit.client_ip(proxied), "5.6.7.8")
+        # A client connecting directly cannot pick its own address
+        spoofed = factory.get("/", REMOTE_ADDR="5.6.7.8", HTTP_X_REAL_IP="1.2.3.4")
+        self.assertEqual(ratelimit.client_ip(spoofed), "5.6.7.8")
+        with override_settings(RATE_LIMIT_IP_HEADER="HTTP_X_FORWARDED_FOR"):
+            forwarded = factory.get(
+                "/", REMOTE_ADDR="127.0.0.1", HTTP_X_FORWARDED_FOR="1.2.3.4, 5.6.7.8"
+            )
+            self.assertEqual(ratelimit.client_ip(forwarded), "5.6.7.8")
+
+    @override_settings(RATE_LIMITS={"search_questions": {"ip": "1/m"}})
+    def test_visitors_behind_proxy_have_own_buckets(self):
+        url = reverse("main:search_questions") + "?q=x"
+        for address in ("5.6.7.8", "5.6.7.9"):
+            response = self.client.get(url, HTTP_X_REAL_IP=address)
+            self.assertEqual(response.status_code, 200)
+        response = self.client.get(url, HTTP_X_REAL_IP="5.6.7.8")
+        self.assertEqual(response.status_code, 429)
+
+    @override_settings(RATE_LIMITS={"search_questions": {"session": "1/m"}})
+    def test_session_bucket(self):
+        url = reverse("main:search_questions") + "?q=x"
+        name = ratelimit.session_cookie_name()
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(name, response.cookies)
+        # Its own, new bucket
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn(name, response.cookies)
+        self.assertEqual(self.client.get(url).status_code, 429)
+        # Dropping or forging the cookie lands in the bucket of this IP's
+        # clients without a session, which the first request used up
+        for cookie in (None, "forged"):
+            client = self.client_class()
+            if cookie:
+                client.cookies[name] = cookie
+            self.assertEqual(client.get(url).status_code, 429)
+        other = self.client_class().get(url, REMOTE_ADDR="10.0.0.2")
+        self.assertEqual(other.status_code, 200)
+
+    @override_settings(RATE_LIMITS={"consultation_request": {"session": "1/h"}})
+    def test_consultation_session_rejected(self):
+        url = reverse("main:consultation_request")
+        response = self.client.post(url, REMOTE_ADDR="10.0.0.1")
+        self.assertIn(ratelimit.session_cookie_name(), response.cookies)
+        self.assertEqual(self.client.post(url, REMOTE_ADDR="10.0.0.1").status_code, 200)
+        response = self.client.post(url, REMOTE_ADDR="10.0.0.2")
+        self.assertEqual(response.status_code, 429)
+        # The form itself is not limited and hands out no session
+        response = self.client_class().get(url)
+        self.assertNotIn(ratelimit.session_cookie_name(), response.cookies)
+
+    def test_ipv6_clients_grouped_by_network(self):
+        request = RequestFactory().get("/", REMOTE_ADDR="2001:db8::1")
+        other = RequestFactory().get("/", REMOTE_ADDR="2001:db8::ffff")
+        self.assertEqual(ratelimit.client_ip(request), "2001:db8::/64")
+        self.assertEqual(ratelimit.client_ip(request), ratelimit.client_ip(other))
@@ -1,11 +1,23 @@
+from django.conf import settings
 from django.urls import path
 
-from . import views
+from . import async_views, views
+
+# Read-only pages have async twins for ASGI deployments
+live = async_views if getattr(settings, "ASYNC_VIEWS", False) else views
 
 app_name = "main"
 
 urlpatterns = [
-    path("", views.home, name="home"),
+    path("", live.home, name="home"),
+    path("robots.txt", views.robots_txt, name="robots_txt"),
+    path("sitemap.xml", views.sitemap_index, name="sitemap_index"),
+    path("sitemap-pages.xml", views.sitemap_pages, name="sitemap_pages"),
+    path(
+        "sitemap-questions-<int:chunk>.xml",
+        views.sitemap_questions,
+        name="sitemap_questions",
+    ),
     path(
         "test-consultation-types/",
         views.TestConsultationTypesView.as_view(),
@@ -24,48 +36,48 @@ urlpatterns = [
     ),
     path(
         "question/<int:pk>/",
-        views.QuestionDetailView.as_view(),
+        live.QuestionDetailView.as_view(),
         name="question_detail",
     ),
     # New consultation pages
     path(
         "24-hours-legal-consultation/",
-        views.TwentyFourHoursConsultationView.as_view(),
+        live.TwentyFourHoursConsultationView.as_view(),
         name="24_hours_consultation",
     ),
     path(
         "phone-legal-consultation/",
-        views.PhoneConsultationView.as_view(),
+        live.PhoneConsultationView.as_view(),
         name="phone_consultation",
     ),
     path(
         "in-person-legal-consultation/",
-        views.InPersonConsultationView.as_view(),
+        live.InPersonConsultationView.as_view(),
         name="in_person_consultation",
     ),
     path(
         "quick-legal-advice/",
-        views.QuickLegalAdviceView.as_view(),
+        live.QuickLegalAdviceView.as_view(),
         name="quick_legal_advice",
     ),
     path(
         "contact/",
-        views.ContactView.as_view(),
+        live.ContactView.as_view(),
         name="contact",
     ),
     path(
         "retired-judge-consultation/",
-        views.RetiredJudgeConsultationView.as_view(),
+        live.RetiredJudgeConsultationView.as_view(),
         name="retired_judge_consultation",
     ),
     path(
         "search/questions/",
-        views.SearchQuestionsView.as_view(),
+        live.SearchQuestionsView.as_view(),
         name="search_questions",
     ),
     path(
         "questions/",
-        views.QuestionsListView.as_view(),
+        live.QuestionsListView.as_view(),
         name="questions_list",
     ),
 ]
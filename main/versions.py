@@ -0,0 +1,64 @@
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+KEY_PREFIX = "main:version:"
+
+# Bumped whenever a RecentQuestion is saved or deleted
+QUESTIONS = "questions"
+
+# Bumped whenever a LawyerAnswer is saved or deleted
+ANSWERS = "answers"
+
+# Admin-managed content, one counter per model
+FAQS = "faqs"
+SERVICES = "services"
+CONSULTATION_TYPES = "consultation_types"
+SITE_CONTENT = "site_content"
+CONTENT_VERSIONS = (FAQS, SERVICES, CONSULTATION_TYPES, SITE_CONTENT)
+
+
+def _cache():
+    return caches[getattr(settings, "VERSION_CACHE_ALIAS", "default")]
+
+
+def _seed():
+    # A clock-based seed means a flushed cache never hands out a version
+    # number that was already used before the flush.
+    return int(time.time() * 1000)
+
+
+def get_version(name):
+    """Return the current value of the named content version counter"""
+    cache = _cache()
+    key = KEY_PREFIX + name
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _seed(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def get_versions(*names):
+    """Return a dict of several version counters in one cache round trip"""
+    cache = _cache()
+    keys = {KEY_PREFIX + name: name for name in names}
+    found = cache.get_many(list(keys))
+    versions = {keys[key]: value for key, value in found.items()}
+    for name in names:
+        if name not in versions:
+            versions[name] = get_version(name)
+    return versions
+
+
+def bump_version(name):
+    """Invalidate everything derived from ``name`` and return the new version"""
+    cache = _cache()
+    key = KEY_PREFIX + name
+    try:
+        return cache.incr(key)
+    except ValueError:
+        version = _seed()
+        cache.set(key, version, timeout=None)
+        return version
@@ -1,32 +1,51 @@
+import json
+import os
+
+from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.db.models import Q, Count
-from django.http import JsonResponse
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import (
+    FileResponse,
+    Http404,
+    HttpResponse,
+    JsonResponse,
+    StreamingHttpResponse,
+)
 from django.shortcuts import get_object_or_404, redirect, render
-from django.urls import reverse_lazy
+from django.urls import reverse, reverse_lazy
+from django.utils.cache import patch_vary_headers
 from django.views.generic import DetailView, ListView, View
 from django.views.generic.edit import FormView
 
+from . import compression, conditional, sitemaps
+from .autocomplete import get_autocomplete_index
+from .caching import VersionedLRUCache
+from .content import get_content_snapshot
 from .forms import ConsultationRequestForm
 from .models import (
-    FAQ,
     ConsultationRequest,
     ConsultationType,
     LawyerAnswer,
     RecentQuestion,
-    Service,
 )
+from .pagination import KeysetPaginationMixin
+from .ratelimit import RateLimitMixin
+from .search import get_search_backend, serialize_question, tokenize
+from .stats import get_question_stats
+from .versions import QUESTIONS, get_version
+
+SITEMAP_CONTENT_TYPE = "application/xml; charset=utf-8"
 
 
 def home(request):
     """Home page view with dynamic content"""
-    faqs = FAQ.objects.filter(is_active=True).order_by("order", "created_at")[:6]
-    services = Service.objects.filter(is_active=True).order_by("order", "created_at")
+    content = get_content_snapshot()
+    faqs = content.faqs[:6]
+    services = content.services
 
     # Get consultation types
-    consultation_types = ConsultationType.objects.filter(is_active=True).order_by(
-        "order", "created_at"
-    )
+    consultation_types = content.consultation_types
 
     # Get recent questions and answers
     recent_questions = RecentQuestion.objects.filter(is_active=True).order_by(
@@ -48,9 +67,11 @@ def home(request):
     return render(request, "main/home.html", context)
 
 
-class ConsultationRequestView(FormView):
+class ConsultationRequestView(RateLimitMixin, FormView):
     """Consultation request form view"""
 
+    rate_limit = "consultation_request"
+    rate_limit_methods = ("POST",)
     template_name = "main/consultation_request.html"
     form_class = ConsultationRequestForm
     success_url = reverse_lazy("consultation_request")
@@ -95,7 +116,7 @@ class TestConsultationTypesView(View):
         return render(request, "main/test/consultation_types.html", context)
 
 
-class ConsultationRequestListView(LoginRequiredMixin, ListView):
+class ConsultationRequestListView(LoginRequiredMixin, KeysetPaginationMixin, ListView):
     """List of consultation requests for admin users"""
 
     model = ConsultationRequest
@@ -114,6 +135,20 @@ class QuestionDetailView(DetailView):
     template_name = "main/question_detail.html"
     context_object_name = "question"
 
+    def get_queryset(self):
+        return conditional.dated_questions()
+
+    def get(self, request, *args, **kwargs):
+        self.object = self.get_object()
+        validators = conditional.validators_for(
+            request, conditional.question_validators, self.object
+        )
+        response = conditional.not_modified(request, validators)
+        if response is None:
+            context = self.get_context_data(object=self.object)
+            response = self.render_to_response(context)
+        return conditional.add_validators(response, validators)
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         # Get the answers for this question
@@ -129,13 +164,13 @@ class TwentyFourHoursConsultationView(View):
     """24-hour legal consultation page view"""
 
     def get(self, request):
+        content = get_content_snapshot()
+
         # Get consultation types for 24-hour service
-        consultation_types = ConsultationType.objects.filter(
-            is_active=True, type_key__in=["phone", "online"]
-        ).order_by("order", "created_at")
+        consultation_types = content.consultation_types_for("phone", "online")
 
         # Get FAQs related to 24-hour consultation
-        faqs = FAQ.objects.filter(is_active=True).order_by("order", "created_at")[:8]
+        faqs = content.faqs[:8]
 
         context = {
             "consultation_types": consultation_types,
@@ -148,13 +183,13 @@ class PhoneConsultationView(View):
     """Phone legal consultation page view"""
 
     def get(self, request):
+        content = get_content_snapshot()
+
         # Get consultation types for phone service
-        consultation_types = ConsultationType.objects.filter(
-            is_active=True, type_key="phone"
-        ).order_by("order", "created_at")
+        consultation_types = content.consultation_types_for("phone")
 
         # Get FAQs related to phone consultation
-        faqs = FAQ.objects.filter(is_active=True).order_by("order", "created_at")[:8]
+        faqs = content.faqs[:8]
 
         context = {
             "consultation_types": consultation_types,
@@ -167,13 +202,13 @@ class InPersonConsultationView(View):
     """In-person legal consultation page view"""
 
     def get(self, request):
+        content = get_content_snapshot()
+
         # Get consultation types for in-person service
-        consultation_types = ConsultationType.objects.filter(
-            is_active=True, type_key="in_person"
-        ).order_by("order", "created_at")
+        consultation_types = content.consultation_types_for("in_person")
 
         # Get FAQs related to in-person consultation
-        faqs = FAQ.objects.filter(is_active=True).order_by("order", "created_at")[:8]
+        faqs = content.faqs[:8]
 
         context = {
             "consultation_types": consultation_types,
@@ -186,13 +221,13 @@ class QuickLegalAdviceView(View):
     """Quick legal advice page view"""
 
     def get(self, request):
+        content = get_content_snapshot()
+
         # Get consultation types for quick advice
-        consultation_types = ConsultationType.objects.filter(
-            is_active=True, type_key__in=["phone", "online"]
-        ).order_by("order", "created_at")
+        consultation_types = content.consultation_types_for("phone", "online")
 
         # Get FAQs related to quick advice
-        faqs = FAQ.objects.filter(is_active=True).order_by("order", "created_at")[:8]
+        faqs = content.faqs[:8]
 
         context = {
             "consultation_types": consultation_types,
@@ -205,13 +240,13 @@ class ContactView(View):
     """Contact page view"""
 
     def get(self, request):
+        content = get_content_snapshot()
+
         # Get consultation types for the form
-        consultation_types = ConsultationType.objects.filter(is_active=True).order_by(
-            "order", "created_at"
-        )
+        consultation_types = content.consultation_types
 
         # Get FAQs for contact page
-        faqs = FAQ.objects.filter(is_active=True).order_by("order", "created_at")[:6]
+        faqs = content.faqs[:6]
 
         context = {
             "consultation_types": consultation_types,
@@ -224,13 +259,15 @@ class RetiredJudgeConsultationView(View):
     """Retired judge consultation page view"""
 
     def get(self, request):
+        content = get_content_snapshot()
+
         # Get consultation types for retired judge service
-        consultation_types = ConsultationType.objects.filter(
-            is_active=True, type_key__in=["phone", "online", "in_person"]
-        ).order_by("order", "created_at")
+        consultation_types = content.consultation_types_for(
+            "phone", "online", "in_person"
+        )
 
         # Get FAQs related to retired judge consultation
-        faqs = FAQ.objects.filter(is_active=True).order_by("order", "created_at")[:8]
+        faqs = content.faqs[:8]
 
         context = {
             "consultation_types": consultation_types,
@@ -239,45 +276,81 @@ class RetiredJudgeConsultationView(View):
         return render(request, "main/retired_judge_consultation.html", context)
 
 
-class SearchQuestionsView(View):
+class SearchQuestionsView(RateLimitMixin, View):
     """Search questions in database"""
 
+    rate_limit = "search_questions"
+    rate_limit_methods = ("GET",)
+    limit = 10
+    cache = VersionedLRUCache(
+        maxsize=getattr(settings, "SEARCH_CACHE_SIZE", 1024),
+        ttl=getattr(settings, "SEARCH_CACHE_TTL", 60),
+    )
+
     def get(self, request):
         query = request.GET.get("q", "").strip()
 
         if not query:
             return JsonResponse({"questions": []})
 
-        # Search in questions and descriptions
-        questions = (
-            RecentQuestion.objects.filter(
-                Q(question__icontains=query) | Q(description__icontains=query)
-            )
-            .filter(is_active=True)
-            .order_by("-created_at")[:10]
-        )
+        # Spelling variants of the same query share one cache entry
+        key = " ".join(tokenize(query))
+        version = get_version(QUESTIONS)
+        body = self.cache.get(key, version)
+        if body is not None:
+            return self.json_response(body, "HIT")
+
+        body, index, indexed_version = self.search(query)
+        self.store(key, version, body, index, indexed_version)
+        return self.json_response(body, "MISS", index)
 
+    def search(self, query):
+        """Return the JSON body for ``query``, the index used and its version"""
         results = []
-        for question in questions:
-            results.append(
-                {
-                    "id": question.id,
-                    "question": question.question,
-                    "description": question.description[:100] + "..."
-                    if question.description and len(question.description) > 100
-                    else question.description,
-                    "category": question.get_category_display()
-                    if hasattr(question, "get_category_display")
-                    else "",
-                    "url": question.get_absolute_url(),
-                    "created_at": question.created_at.strftime("%Y/%m/%d"),
-                }
-            )
+        index = indexed_version = None
+        if getattr(settings, "AUTOCOMPLETE_ENABLED", True):
+            # Typeahead is answered from the in-process title index
+            index = get_autocomplete_index()
+            if index is not None:
+                indexed_version = index.version
+                results = index.search(query)[: self.limit]
+
+        if len(results) < self.limit:
+            # Top up from ranked full-text search, which also covers descriptions
+            seen = {row["id"] for row in results}
+            for question in get_search_backend().search(query, limit=self.limit):
+                if question.id not in seen:
+                    results.append(serialize_question(question))
+            results = results[: self.limit]
+
+        body = json.dumps({"questions": results}, cls=DjangoJSONEncoder).encode()
+        return body, index, indexed_version
+
+    def store(self, key, version, body, index, indexed_version):
+        """Cache ``body`` under ``version`` unless an outdated index built it
+
+        Until its background refresh catches up the index still answers from
+        the old questions; cached, those results would outlive the bump.
+        """
+        if index is None or indexed_version == version:
+            self.cache.set(key, version, body)
+
+    def rate_limited(self, wait):
+        return JsonResponse(
+            {"questions": [], "error": "تعداد جستجوها بیش از حد مجاز است."},
+            status=429,
+        )
 
-        return JsonResponse({"questions": results})
+    def json_response(self, body, cache_state, index=None):
+        response = HttpResponse(body, content_type="application/json")
+        response["X-Search-Cache"] = cache_state
+        if index is not None:
+            response["X-Autocomplete-Index-Bytes"] = index.memory_usage()
+            response["X-Autocomplete-Index-Size"] = len(index)
+        return response
 
 
-class QuestionsListView(ListView):
+class QuestionsListView(KeysetPaginationMixin, ListView):
     """List all questions with filtering and sorting"""
 
     model = RecentQuestion
@@ -285,57 +358,119 @@ class QuestionsListView(ListView):
     context_object_name = "questions"
     paginate_by = 12
 
+    def get(self, request, *args, **kwargs):
+        validators = conditional.validators_for(request, conditional.list_validators)
+        response = conditional.not_modified(request, validators)
+        if response is None:
+            response = super().get(request, *args, **kwargs)
+        return conditional.add_validators(response, validators)
+
     def get_queryset(self):
         queryset = RecentQuestion.objects.filter(is_active=True)
 
         # Category filtering
-        category = self.request.GET.get("category")
-        if category and category != "all":
-            queryset = queryset.filter(category=category)
+        self.category = self.request.GET.get("category")
+        if self.category and self.category != "all":
+            queryset = queryset.filter(category=self.category)
+        else:
+            self.category = None
 
         # Sorting
+        self.answered = None
+        self.keyset_ordering = ("-created_at", "-id")
         sort_by = self.request.GET.get("sort", "newest")
         if sort_by == "newest":
             queryset = queryset.order_by("-created_at")
         elif sort_by == "oldest":
+            self.keyset_ordering = ("created_at", "id")
             queryset = queryset.order_by("created_at")
         elif sort_by == "answered":
+            self.answered = True
             queryset = queryset.filter(is_answered=True).order_by("-created_at")
         elif sort_by == "unanswered":
+            self.answered = False
             queryset = queryset.filter(is_answered=False).order_by("-created_at")
 
         return queryset
 
+    def get_pagination_count(self):
+        # The cached statistics already know the size of every filter
+        self.stats = get_question_stats()
+        return self.stats.count(category=self.category, answered=self.answered)
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
 
         # Add category choices for filter
         context["category_choices"] = RecentQuestion.CATEGORY_CHOICES
+        context["category_facets"] = self.stats.facets()
         context["current_category"] = self.request.GET.get("category", "all")
         context["current_sort"] = self.request.GET.get("sort", "newest")
 
         # Add statistics
-        context["total_questions"] = RecentQuestion.objects.filter(
-            is_active=True
-        ).count()
-        context["answered_questions"] = RecentQuestion.objects.filter(
-            is_active=True, is_answered=True
-        ).count()
-        context["unanswered_questions"] = RecentQuestion.objects.filter(
-            is_active=True, is_answered=False
-        ).count()
-
-        # Get answers count for each question
-        question_ids = [q.id for q in context["questions"]]
-        answers_count = (
-            LawyerAnswer.objects.filter(question_id__in=question_ids, is_active=True)
-            .values("question_id")
-            .annotate(count=Count("id"))
-        )
+        context["total_questions"] = self.stats.total
+        context["answered_questions"] = self.stats.answered
+        context["unanswered_questions"] = self.stats.unanswered
 
-        answers_dict = {item["question_id"]: item["count"] for item in answers_count}
+        return context
 
-        for question in context["questions"]:
-            question.answers_count = answers_dict.get(question.id, 0)
 
-        return context
+def sitemap_file(request, name):
+    """A pre-generated sitemap from SITEMAP_ROOT, gzipped if accepted, or None"""
+    root = getattr(settings, "SITEMAP_ROOT", None)
+    if not root:
+        return None
+    gzipped = compression.accepted_encoding(request, ("gzip",))
+    try:
+        response = FileResponse(
+            open(os.path.join(root, name + (".gz" if gzipped else "")), "rb"),
+            content_type=SITEMAP_CONTENT_TYPE,
+        )
+    except FileNotFoundError:
+        return None
+    patch_vary_headers(response, ("Accept-Encoding",))
+    if gzipped:
+        response["Content-Encoding"] = "gzip"
+    return response
+
+
+def sitemap_base_url(request):
+    return request.build_absolute_uri("/").rstrip("/")
+
+
+def sitemap_index(request):
+    """Index of the page sitemap and every question chunk"""
+    response = sitemap_file(request, "sitemap.xml")
+    if response is None:
+        body = sitemaps.render_index(sitemap_base_url(request), sitemaps.chunk_stats())
+        response = HttpResponse("".join(body), content_type=SITEMAP_CONTENT_TYPE)
+    return response
+
+
+def sitemap_pages(request):
+    response = sitemap_file(request, "sitemap-pages.xml")
+    if response is None:
+        body = sitemaps.render_pages(sitemap_base_url(request))
+        response = HttpResponse("".join(body), content_type=SITEMAP_CONTENT_TYPE)
+    return response
+
+
+def sitemap_questions(request, chunk):
+    """One chunk of question pages, streamed row by row from the database"""
+    response = sitemap_file(request, sitemaps.chunk_name(chunk))
+    if response is None:
+        if not sitemaps.chunk_exists(chunk):
+            raise Http404("No such sitemap")
+        response = StreamingHttpResponse(
+            sitemaps.render_questions(sitemap_base_url(request), chunk),
+            content_type=SITEMAP_CONTENT_TYPE,
+        )
+    return response
+
+
+def robots_txt(request):
+    sitemap = request.build_absolute_uri(reverse("main:sitemap_index"))
+    return HttpResponse(
+        f"User-agent: *\nAllow: /\n\nSitemap: {sitemap}\n",
+        content_type="text/plain",
+    )
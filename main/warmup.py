@@ -0,0 +1,117 @@
+"""Boot-time warmup, so the first request of a worker is not the slow one
+
+``warmup()`` compiles the app's templates into the cached template loader,
+builds the URL resolver, fills the model metadata caches and primes the
+content caches. Gunicorn runs it from ``gunicorn.conf.py`` (in the master
+when the app is preloaded, so workers inherit the result); ``manage.py
+warmup`` runs it by hand and prints the report.
+"""
+
+import logging
+import time
+from pathlib import Path
+
+from django.apps import apps
+from django.template import TemplateSyntaxError
+from django.template.loader import get_template
+from django.urls import URLResolver, get_resolver
+
+logger = logging.getLogger(__name__)
+
+# Seconds spent in each startup phase; dadpars_site.wsgi/asgi record the
+# import and setup phases, warmup() adds its own steps
+startup_report = {}
+
+
+def record_startup(phase, seconds):
+    startup_report[phase] = seconds
+
+
+def compile_templates():
+    """Load every template of the main app, return how many compiled"""
+    root = Path(apps.get_app_config("main").path) / "templates"
+    compiled = 0
+    for path in sorted(root.rglob("*.html")):
+        name = path.relative_to(root).as_posix()
+        try:
+            get_template(name)
+        except TemplateSyntaxError:
+            logger.exception("Template %s does not compile", name)
+        else:
+            compiled += 1
+    return compiled
+
+
+def resolve_urls(resolver=None):
+    """Build every URL resolver's lookup tables, return the number of routes"""
+    resolver = resolver or get_resolver()
+    # Populates the reverse, namespace and app dictionaries in one go;
+    # included resolvers only do so when first used
+    resolver.reverse_dict
+    routes = 0
+    for pattern in resolver.url_patterns:
+        if isinstance(pattern, URLResolver):
+            routes += resolve_urls(pattern)
+        else:
+            routes += 1
+    return routes
+
+
+def load_model_metadata():
+    models = apps.get_models()
+    for model in models:
+        model._meta.get_fields()
+        model._meta.concrete_fields
+    return len(models)
+
+
+def prime_content_caches():
+    """Fill the process-local caches, return how many steps succeeded"""
+    from .autocomplete import build_autocomplete_index
+    from .content import get_content_snapshot
+    from .stats import get_question_stats
+
+    primed = 0
+    for prime in (get_content_snapshot, get_question_stats, build_autocomplete_index):
+        try:
+            prime()
+        except Exception:
+            # A cold cache is slower, not broken; never keep the site down
+            logger.exception("Cache warmup step %s failed", prime.__name__)
+        else:
+            primed += 1
+    return primed
+
+
+STEPS = (
+    ("templates", compile_templates),
+    ("urls", resolve_urls),
+    ("models", load_model_metadata),
+    ("content", prime_content_caches),
+)
+
+
+def warmup():
+    """Run every warmup step and return the startup report"""
+    started = time.perf_counter()
+    for name, step in STEPS:
+        step_started = time.perf_counter()
+        startup_report[f"{name}_count"] = step()
+        startup_report[f"warmup_{name}"] = time.perf_counter() - step_started
+    startup_report["warmup"] = time.perf_counter() - started
+    return dict(startup_report)
+
+
+def format_report(report):
+    """One log line: phase durations, then what the warmup went through"""
+    durations = ", ".join(
+        f"{phase} {value * 1000:.0f}ms"
+        for phase, value in report.items()
+        if not phase.endswith("_count")
+    )
+    counts = ", ".join(
+        f"{value} {phase[: -len('_count')]}"
+        for phase, value in report.items()
+        if phase.endswith("_count")
+    )
+    return f"{durations} ({counts})"
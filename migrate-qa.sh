@@ -13,28 +13,27 @@ CONTAINER_NAME="dadparsir-web"
 echo "Migrating Questions and Answers from local SQLite to PostgreSQL server..."
 echo ""
 
-# First, let's check if the data file exists and has content
-if [ ! -f "qa_data.json" ]; then
-    echo "❌ Error: qa_data.json not found!"
-    exit 1
-fi
+# Export the questions, answers and their lawyers as JSON Lines
+echo "Exporting questions and answers..."
+python manage.py export_qa qa_data.jsonl
 
-echo "✅ Found qa_data.json with $(cat qa_data.json | grep -c '"model":') records"
+echo "✅ Exported qa_data.jsonl with $(wc -l < qa_data.jsonl) records"
 
 # Transfer the data file to the server
 echo "Transferring data to server..."
-sshpass -p "$SERVER_PASSWORD" scp -o StrictHostKeyChecking=no qa_data.json ${SERVER_USER}@${SERVER_IP}:/tmp/
+sshpass -p "$SERVER_PASSWORD" scp -o StrictHostKeyChecking=no qa_data.jsonl ${SERVER_USER}@${SERVER_IP}:/tmp/
 
 # Run the migration on the server
 echo ""
 echo "Running migration on server..."
 ssh_commands="
     # Copy data to container
-    docker cp /tmp/qa_data.json ${CONTAINER_NAME}:/app/
+    docker cp /tmp/qa_data.jsonl ${CONTAINER_NAME}:/app/
 
-    # Load the new data (this will update existing questions and add answers)
+    # Upsert the data in batches (updates existing questions and adds answers);
+    # rerunning after an interruption resumes from the last committed batch
     echo 'Loading Questions and Answers data...'
-    docker exec ${CONTAINER_NAME} python manage.py loaddata /app/qa_data.json
+    docker exec ${CONTAINER_NAME} python manage.py import_qa /app/qa_data.jsonl
 
     # Verify the data was loaded
     echo ''
@@ -44,22 +43,22 @@ from main.models import RecentQuestion, LawyerAnswer
 
 print(f'Recent Questions: {RecentQuestion.objects.count()}')
 print(f'Lawyer Answers: {LawyerAnswer.objects.count()}')
+print(f'Unanswered: {RecentQuestion.objects.filter(answers_count=0).count()}')
 
-# Show questions with their answers
-for q in RecentQuestion.objects.all():
+# Show the latest questions with their answers
+questions = RecentQuestion.objects.order_by('-created_at').prefetch_related('answers')
+for q in questions[:10]:
     print(f'\\nQuestion: {q.question[:50]}...')
-    answers = LawyerAnswer.objects.filter(question=q)
-    if answers:
-        for a in answers:
-            print(f'  Answer: {a.short_answer[:50]}...')
-            print(f'  By: {a.lawyer_title}')
-    else:
+    for a in q.answers.all():
+        print(f'  Answer: {a.short_answer[:50]}...')
+        print(f'  By: {a.lawyer_title}')
+    if not q.answers_count:
         print('  No answers yet')
 PYTHON_EOF
 
     # Clean up
-    rm -f /tmp/qa_data.json
-    docker exec ${CONTAINER_NAME} rm -f /app/qa_data.json
+    rm -f /tmp/qa_data.jsonl
+    docker exec ${CONTAINER_NAME} rm -f /app/qa_data.jsonl
 
     # Restart the container to ensure all changes are reflected
     echo 'Restarting container to refresh the site...'